@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Agent Batch Routing - Score many task descriptions in one pass
+
+This module provides AgentFeatureMatrix, an agent × phrase feature matrix
+built from the compiled match index once per registry snapshot, and
+select_agents_batch(), which scores a whole list of task descriptions
+against it with matrix operations (e.g. to replay historical tasks when
+tuning confidence_threshold and activation keywords).
+
+Design Principles:
+- Identical results to uncached AgentRegistry.select_agent (same floats,
+  same order); the batch path does not use the routing cache
+- Phrase matching, scoring, filtering and ranking are matrix operations over
+  segment / word features; substring hits come from the index's phrase trie
+- NumPy is optional: without it the batch falls back to the scalar path
+- Optional process pool (processes > 1), worthwhile for large replays
+
+Usage:
+    from commands.lib.agent_registry import AgentRegistry
+
+    registry = AgentRegistry()
+    results = registry.select_agents_batch(["实现登录", "修复bug"], top_k=3)
+    results = registry.select_agents_batch(tasks, top_k=3, processes=4)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from commands.lib.agent_registry import (
+    CHAR_MATCH_RATIO,
+    AgentMatch,
+    AgentRegistry,
+    PHRASE_KEYWORD,
+    PHRASE_SCENARIO,
+    PRIORITY_BOOST,
+    PRIORITY_ORDER,
+    RegistrySnapshot,
+    TaskQuery,
+)
+
+# Tasks scored per matrix block (bounds the tasks × phrases hit matrix)
+DEFAULT_CHUNK_SIZE = 1024
+
+# (agent_name, score, matched_keywords, matched_scenarios, reason)
+MatchTuple = Tuple[str, float, List[str], List[str], str]
+
+
+class AgentFeatureMatrix:
+    """
+    Agent × feature matrices for one registry snapshot
+
+    Features are the segments (CJKSegmenter.phrase_segments) and English
+    word tokens of the compiled keyword/scenario phrases. For a block of tasks:
+
+    - segment_matrix @ task_segments gives, per (task, phrase), the number of
+      phrase segments present in the task (the fuzzy 40%/60% ratio)
+    - word_matrix @ task_words gives English whole-word overlaps
+    - hits @ keyword_matrix / scenario_matrix gives per-agent match counts
+
+    Substring hits (phrase inside task, task inside phrase) come from the
+    index's phrase trie and first-character postings, one scan per task.
+    """
+
+    def __init__(self, snapshot: RegistrySnapshot):
+        if np is None:
+            raise ImportError("numpy is required for AgentFeatureMatrix")
+
+        self.snapshot = snapshot
+        index = snapshot.index
+        self.agents = list(snapshot.agents.values())
+        self.agent_rows = {agent.name: row for row, agent in enumerate(self.agents)}
+
+        # Phrase columns in (agent, kind, idx) order, so hits come out sorted
+        self.phrases: List[Tuple[str, str, int]] = []
+        for agent in self.agents:
+            for kind, phrases in (
+                (PHRASE_KEYWORD, agent.activation_keywords),
+                (PHRASE_SCENARIO, agent.activation_scenarios),
+            ):
+                self.phrases.extend((agent.name, kind, idx) for idx in range(len(phrases)))
+        phrase_columns = {key: col for col, key in enumerate(self.phrases)}
+        n_phrases, n_agents = len(self.phrases), len(self.agents)
+
+        # Contiguous column ranges per agent: (start, keywords_end, end)
+        self.agent_columns: List[Tuple[int, int, int]] = []
+        start = 0
+        for agent in self.agents:
+            kw_end = start + len(agent.activation_keywords)
+            end = kw_end + len(agent.activation_scenarios)
+            self.agent_columns.append((start, kw_end, end))
+            start = end
+
+        # Phrase -> agent membership
+        # float64 throughout: matmuls go through BLAS and small counts stay exact
+        self.keyword_matrix = np.zeros((n_phrases, n_agents))
+        self.scenario_matrix = np.zeros((n_phrases, n_agents))
+        for col, (name, kind, _) in enumerate(self.phrases):
+            target = self.keyword_matrix if kind == PHRASE_KEYWORD else self.scenario_matrix
+            target[col, self.agent_rows[name]] = 1
+
+        # Segment features (CJKSegmenter.phrase_segments) and English word features
+        self.index = index
+        self.segment_vocab = {seg: i for i, seg in enumerate(index.segment_postings)}
+        self.segment_matrix = np.zeros((n_phrases, len(self.segment_vocab)))
+        for segment, keys in index.segment_postings.items():
+            for key in keys:
+                self.segment_matrix[phrase_columns[key], self.segment_vocab[segment]] = 1
+        self.phrase_columns = phrase_columns
+
+        self.word_vocab = {word: i for i, word in enumerate(index.word_postings)}
+        self.word_matrix = np.zeros((n_phrases, len(self.word_vocab)))
+        for word, keys in index.word_postings.items():
+            for key in keys:
+                self.word_matrix[phrase_columns[key], self.word_vocab[word]] = 1
+
+        # Per-phrase constants
+        self.phrase_empty = np.array([not index.clean_phrases[key] for key in self.phrases])
+        self.segment_counts = np.array(
+            [index.segment_counts.get(key, 1) for key in self.phrases], dtype=np.float64
+        )
+        self.phrase_ratio = np.array(
+            [CHAR_MATCH_RATIO[kind] for _, kind, _ in self.phrases], dtype=np.float64
+        )
+        self.phrase_chinese = np.array([key in index.chinese_phrases for key in self.phrases])
+
+        # Per-agent constants
+        self.boost = np.array(
+            [PRIORITY_BOOST.get(a.priority, (0.0, ''))[0] for a in self.agents],
+            dtype=np.float64
+        )
+        self.has_boost = np.array([a.priority in PRIORITY_BOOST for a in self.agents])
+        self.active = np.array([a.status == 'active' for a in self.agents])
+        self.priority_rank = np.array(
+            [PRIORITY_ORDER.get(a.priority, 0) for a in self.agents], dtype=np.int64
+        )
+
+    def hits(self, queries: List[TaskQuery]):
+        """
+        Task × phrase hit matrix, identical to AgentMatchIndex.lookup
+
+        Returns:
+            bool array of shape (tasks, phrases)
+        """
+        n_tasks = len(queries)
+        index = self.index
+        task_segments = np.zeros((n_tasks, len(self.segment_vocab)))
+        task_words = np.zeros((n_tasks, len(self.word_vocab)))
+        substring_hits = np.zeros((n_tasks, len(self.phrases)), dtype=bool)
+        has_chinese = np.zeros(n_tasks, dtype=bool)
+        empty_task = np.zeros(n_tasks, dtype=bool)
+
+        for row, query in enumerate(queries):
+            has_chinese[row] = query.has_chinese
+            empty_task[row] = not query.clean
+            if query.clean:
+                for segment in index.segmenter.features(query.lower):
+                    col = self.segment_vocab.get(segment)
+                    if col is not None:
+                        task_segments[row, col] = 1
+                # Phrase ⊂ task (trie scan) and task ⊂ phrase (string check)
+                for phrase_clean in index.phrase_lexicon.find_words(query.clean):
+                    for key in index.clean_postings[phrase_clean]:
+                        substring_hits[row, self.phrase_columns[key]] = True
+                if len(query.clean) <= index.max_phrase_length:
+                    for key in index.char_postings.get(query.clean[0], ()):
+                        if query.clean in index.clean_phrases[key]:
+                            substring_hits[row, self.phrase_columns[key]] = True
+            if not query.has_chinese:
+                for word in query.words:
+                    col = self.word_vocab.get(word)
+                    if col is not None:
+                        task_words[row, col] = 1
+
+        # 1. Segment path (Chinese phrases, or every phrase for Chinese tasks)
+        segment_path = (has_chinese[:, None] | self.phrase_chinese[None, :]) & ~empty_task[:, None]
+        matched_count = task_segments @ self.segment_matrix.T
+        ratio_hit = (
+            (matched_count > 0)
+            & (matched_count / self.segment_counts[None, :] >= self.phrase_ratio[None, :])
+        )
+        hits = segment_path & (ratio_hit | substring_hits)
+
+        # Empty cleaned task matches Chinese phrases; empty phrases match Chinese tasks
+        hits |= empty_task[:, None] & self.phrase_chinese[None, :]
+        hits |= (has_chinese & ~empty_task)[:, None] & self.phrase_empty[None, :]
+
+        # 2. Word path: English phrases against English-only tasks
+        hits |= (task_words @ self.word_matrix.T) > 0
+
+        return hits
+
+    def score(self, hits):
+        """
+        Vectorized scores for a task × phrase hit matrix
+
+        Mirrors AgentRegistry._score_matches operation by operation
+        (0.0 + keyword part + scenario part + boost) so the float64
+        results are bit-identical to the scalar path.
+
+        Returns:
+            (scores, eligible) arrays of shape (tasks, agents)
+        """
+        hit_counts = hits.astype(np.float64)
+        kw_counts = hit_counts @ self.keyword_matrix
+        sc_counts = hit_counts @ self.scenario_matrix
+
+        scores = 0.0 + np.minimum(0.3 * kw_counts, 0.6)
+        scores = scores + np.minimum(0.4 * sc_counts, 0.4)
+        scores = np.where(self.has_boost, scores + self.boost, scores)
+
+        any_hit = (kw_counts + sc_counts) > 0
+        eligible = self.active & (any_hit | self.has_boost) & (scores > 0)
+        return scores, eligible
+
+    def rank(self, scores, eligible, top_k: int) -> List[List[int]]:
+        """
+        Top-k agent rows per task, ordered like select_agent
+
+        Sort key is (score desc, priority desc), ties keep agent load order.
+        """
+        shape = scores.shape
+        # Ineligible agents sort last; lexsort's last key is the primary key
+        primary = np.where(eligible, -scores, np.inf)
+        secondary = np.broadcast_to(-self.priority_rank, shape)
+        load_order = np.broadcast_to(np.arange(shape[1]), shape)
+        order = np.lexsort((load_order, secondary, primary), axis=-1)[:, :top_k]
+
+        top_eligible = np.take_along_axis(eligible, order, axis=-1)
+        return [
+            [agent_row for agent_row, ok in zip(rows, oks) if ok]
+            for rows, oks in zip(order.tolist(), top_eligible.tolist())
+        ]
+
+
+def _match_tuples(
+    registry: AgentRegistry, matrix: 'AgentFeatureMatrix', queries: List[TaskQuery], top_k: int
+) -> List[List[MatchTuple]]:
+    """Score a list of tasks against one feature matrix"""
+    results: List[List[MatchTuple]] = []
+
+    for start in range(0, len(queries), DEFAULT_CHUNK_SIZE):
+        block = queries[start:start + DEFAULT_CHUNK_SIZE]
+        hits = matrix.hits(block)
+        scores, eligible = matrix.score(hits)
+
+        for row, agent_rows in enumerate(matrix.rank(scores, eligible, top_k)):
+            task_matches = []
+            for agent_row in agent_rows:
+                agent = matrix.agents[agent_row]
+                start, kw_end, end = matrix.agent_columns[agent_row]
+                row_hits = hits[row, start:end].tolist()
+                split = kw_end - start
+                matched_kw = [
+                    phrase for phrase, hit in zip(agent.activation_keywords, row_hits[:split]) if hit
+                ]
+                matched_sc = [
+                    phrase for phrase, hit in zip(agent.activation_scenarios, row_hits[split:]) if hit
+                ]
+                score, reason = registry._score_matches(agent, matched_kw, matched_sc)
+                task_matches.append((agent.name, score, matched_kw, matched_sc, reason))
+            results.append(task_matches)
+
+    return results
+
+
+# ==================== Process pool workers ====================
+
+_worker_registry: Optional[AgentRegistry] = None
+
+
+def _init_worker(agents_dir: str) -> None:
+    """Load one registry per worker process (cheap with the agent catalog)"""
+    global _worker_registry
+    _worker_registry = AgentRegistry(agents_dir)
+
+
+def _worker_select(tasks: List[str], top_k: int) -> List[List[MatchTuple]]:
+    registry = _worker_registry
+    queries = [TaskQuery.of(task) for task in tasks]
+    if np is None:
+        return [
+            [(m.agent.name, m.score, m.matched_keywords, m.matched_scenarios, m.reason)
+             for m in registry._select_from_snapshot(registry.snapshot, query, top_k)]
+            for query in queries
+        ]
+    return _match_tuples(registry, AgentFeatureMatrix(registry.snapshot), queries, top_k)
+
+
+def select_agents_batch(
+    registry: AgentRegistry,
+    tasks: Sequence[Union[str, TaskQuery]],
+    top_k: int = 1,
+    processes: Optional[int] = None,
+    matrix: Optional[AgentFeatureMatrix] = None
+) -> List[List[AgentMatch]]:
+    """
+    Select agents for many tasks at once
+
+    Args:
+        registry: Registry to route against
+        tasks: Task descriptions (str or TaskQuery)
+        top_k: Number of matches per task
+        processes: Worker processes (None / 1 = in-process); any value > 1
+            splits the batch into one chunk per process. Worker start-up
+            (each reloads the registry) only pays off for large replays
+        matrix: Prebuilt feature matrix for registry.snapshot (optional)
+
+    Returns:
+        One AgentMatch list per task, identical to uncached select_agent(task, top_k)
+    """
+    snapshot = registry.snapshot
+
+    if processes and processes > 1 and tasks:
+        # Workers normalize their own chunk; only raw strings cross the pipe
+        texts = [str(task) for task in tasks]
+        chunk_size = -(-len(texts) // processes)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(str(registry.agents_dir),)
+        ) as pool:
+            tuples = [
+                item
+                for chunk_result in pool.map(_worker_select, chunks, [top_k] * len(chunks))
+                for item in chunk_result
+            ]
+    elif np is None:
+        return [
+            registry._select_from_snapshot(snapshot, TaskQuery.of(task), top_k)
+            for task in tasks
+        ]
+    else:
+        if matrix is None or matrix.snapshot is not snapshot:
+            matrix = AgentFeatureMatrix(snapshot)
+        queries = [TaskQuery.of(task) for task in tasks]
+        tuples = _match_tuples(registry, matrix, queries, top_k)
+
+    # Rebind to this process's Agent objects so results match select_agent
+    return [
+        [
+            AgentMatch(
+                agent=snapshot.agents[name],
+                score=score,
+                matched_keywords=matched_kw,
+                matched_scenarios=matched_sc,
+                reason=reason
+            )
+            for name, score, matched_kw, matched_sc, reason in task_tuples
+        ]
+        for task_tuples in tuples
+    ]
+
+
+def main():
+    """CLI: route every line of a file (or stdin) and print the top agent"""
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Batch agent routing")
+    parser.add_argument('tasks_file', nargs='?', help="One task per line (default: stdin)")
+    parser.add_argument('--top-k', type=int, default=1)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.tasks_file:
+        with open(args.tasks_file, 'r', encoding='utf-8') as f:
+            tasks = [line.rstrip('\n') for line in f if line.strip()]
+    else:
+        tasks = [line.rstrip('\n') for line in sys.stdin if line.strip()]
+
+    registry = AgentRegistry()
+    start = time.perf_counter()
+    results = registry.select_agents_batch(tasks, top_k=args.top_k, processes=args.processes)
+    elapsed = time.perf_counter() - start
+
+    for task, matches in zip(tasks, results):
+        routed = ', '.join(f"{m.agent.name}({m.score:.2f})" for m in matches) or '-'
+        print(f"{routed}\t{task}")
+
+    backend = 'numpy' if np is not None else 'scalar'
+    print(f"\nRouted {len(tasks)} tasks in {elapsed:.3f}s ({backend})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Agent Catalog - Persistent compiled cache of agent definitions
+
+This module provides AgentCatalog, a single cache file inside the agents
+directory holding the parsed Agent records of commands/agents/*_agent.md
+and the precomputed match index. Loading checks each agent file and
+reparses only those that changed.
+
+Design Principles:
+- Per-file invalidation: (mtime, size) fast check, content hash fallback
+- Only changed files are reparsed; unchanged records are reused
+- Cache failures never break loading (fall back to parsing)
+- Atomic cache writes (temp file + os.replace)
+
+Usage:
+    from commands.lib.agent_catalog import AgentCatalog
+
+    catalog = AgentCatalog(agents_dir, parse_file=parse, build_index=AgentMatchIndex)
+    agents, index = catalog.load()
+    print(catalog.stats)
+
+    # Prebuild (make catalog / install.sh):
+    python3 -m commands.lib.agent_catalog
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Cache file stored next to the *_agent.md files
+CATALOG_FILENAME = ".agent_catalog.pickle"
+
+# Bump when Agent / AgentMatchIndex layout changes to invalidate old caches
+CATALOG_VERSION = 2
+
+# Agent definition file pattern
+AGENT_FILE_GLOB = "*_agent.md"
+
+
+@dataclass
+class FileFingerprint:
+    """Identity of an agent file at the time it was parsed"""
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+@dataclass
+class CatalogEntry:
+    """One cached agent file: fingerprint plus parsed Agent record"""
+    fingerprint: FileFingerprint
+    agent: Any
+
+
+@dataclass
+class CatalogStats:
+    """Counters describing the last load"""
+    cache_loaded: bool = False    # A valid cache file was read
+    reused: int = 0               # Files reused without reading
+    rehashed: int = 0             # Files read but unchanged (hash match)
+    reparsed: int = 0             # Files parsed (new or changed)
+    removed: int = 0              # Cached files no longer present
+    failed: List[str] = field(default_factory=list)
+    index_rebuilt: bool = False
+    cache_written: bool = False
+
+
+class AgentCatalog:
+    """
+    Compiled, mtime-keyed cache of parsed agent definitions
+
+    The catalog does not know how to parse agents or build indexes itself;
+    AgentRegistry passes its parser and index builder in, which keeps this
+    module free of import cycles.
+    """
+
+    def __init__(
+        self,
+        agents_dir: Path,
+        parse_file: Callable[[Path, str], Any],
+        build_index: Callable[[Dict[str, Any]], Any],
+        cache_path: Optional[Path] = None,
+    ):
+        """
+        Initialize agent catalog
+
+        Args:
+            agents_dir: Directory containing *_agent.md files
+            parse_file: Callable(file_path, text) -> Agent
+            build_index: Callable(agents_by_name) -> match index
+            cache_path: Cache file location (default: agents_dir/.agent_catalog.pickle)
+        """
+        self.agents_dir = Path(agents_dir)
+        self.parse_file = parse_file
+        self.build_index = build_index
+        self.cache_path = Path(cache_path) if cache_path else self.agents_dir / CATALOG_FILENAME
+        self.stats = CatalogStats()
+        # State of the last load; repeated loads (hot reload) skip the cache file
+        self._memory: Dict[str, Any] = {}
+
+    def load(self, rebuild: bool = False) -> Tuple[Dict[str, Any], Any]:
+        """
+        Load agents and match index, reparsing only changed files
+
+        Args:
+            rebuild: Ignore any existing cache and parse every file
+
+        Returns:
+            (agents_by_name, match_index)
+        """
+        self.stats = CatalogStats()
+        if rebuild:
+            cached = {}
+        elif self._memory:
+            cached = self._memory
+            self.stats.cache_loaded = True
+        else:
+            cached = self._read_cache()
+        cached_entries: Dict[str, CatalogEntry] = cached.get('entries', {})
+
+        entries: Dict[str, CatalogEntry] = {}
+        order: List[str] = []
+        dirty = False
+
+        for md_file in self.agents_dir.glob(AGENT_FILE_GLOB):
+            order.append(md_file.name)
+            try:
+                entry, changed = self._load_entry(md_file, cached_entries.get(md_file.name))
+            except Exception as e:
+                print(f"Warning: Failed to load {md_file.name}: {e}")
+                self.stats.failed.append(md_file.name)
+                continue
+            entries[md_file.name] = entry
+            dirty = dirty or changed
+
+        self.stats.removed = len(set(cached_entries) - set(entries))
+        files_changed = (
+            self.stats.reparsed > 0
+            or self.stats.removed > 0
+            or order != cached.get('order')
+        )
+
+        agents: Dict[str, Any] = {}
+        for name in order:
+            if name in entries:
+                agent = entries[name].agent
+                agents[agent.name] = agent
+
+        index = cached.get('index')
+        if index is None or files_changed:
+            index = self.build_index(agents)
+            self.stats.index_rebuilt = True
+
+        if dirty or files_changed or self.stats.index_rebuilt:
+            self._write_cache(entries, order, index)
+
+        self._memory = {'entries': entries, 'order': order, 'index': index}
+        return agents, index
+
+    def _load_entry(
+        self, md_file: Path, cached: Optional[CatalogEntry]
+    ) -> Tuple[CatalogEntry, bool]:
+        """
+        Resolve one agent file against its cached entry
+
+        Returns:
+            (entry, changed) - changed is True when the cache needs rewriting
+        """
+        stat = md_file.stat()
+        if cached and cached.fingerprint.mtime_ns == stat.st_mtime_ns \
+                and cached.fingerprint.size == stat.st_size:
+            self.stats.reused += 1
+            return cached, False
+
+        raw = md_file.read_bytes()
+        fingerprint = FileFingerprint(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            sha256=hashlib.sha256(raw).hexdigest(),
+        )
+
+        if cached and cached.fingerprint.sha256 == fingerprint.sha256:
+            # Touched but not modified: keep parsed record, refresh fingerprint
+            self.stats.rehashed += 1
+            return CatalogEntry(fingerprint=fingerprint, agent=cached.agent), True
+
+        agent = self.parse_file(md_file, raw.decode('utf-8'))
+        self.stats.reparsed += 1
+        return CatalogEntry(fingerprint=fingerprint, agent=agent), True
+
+    def _read_cache(self) -> Dict[str, Any]:
+        """Read cache file, returning {} if missing, stale or unreadable"""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable agent catalog {self.cache_path.name}: {e}")
+            return {}
+
+        if not isinstance(data, dict) or data.get('version') != CATALOG_VERSION:
+            return {}
+
+        self.stats.cache_loaded = True
+        return data
+
+    def _write_cache(self, entries: Dict[str, CatalogEntry], order: List[str], index: Any) -> None:
+        """Atomically write the cache file (best effort)"""
+        data = {
+            'version': CATALOG_VERSION,
+            'entries': entries,
+            'order': order,
+            'index': index,
+        }
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=self.cache_path.name, suffix='.tmp', dir=str(self.cache_path.parent)
+            )
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.cache_path)
+            self.stats.cache_written = True
+        except OSError:
+            # Read-only install or missing permissions: run without cache
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def clear(self) -> None:
+        """Delete the cache file if present"""
+        try:
+            self.cache_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def main():
+    """CLI: prebuild the agent catalog cache"""
+    import argparse
+    from commands.lib.agent_registry import AgentRegistry
+
+    parser = argparse.ArgumentParser(description="Prebuild compiled agent catalog")
+    parser.add_argument('agents_dir', nargs='?', default=None,
+                        help="Agents directory (default: commands/agents/)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Reuse unchanged entries instead of rebuilding everything")
+    args = parser.parse_args()
+
+    registry = AgentRegistry(args.agents_dir, rebuild_catalog=not args.incremental)
+    stats = registry.catalog_stats
+
+    print(f"Agent catalog: {registry.agents_dir / CATALOG_FILENAME}")
+    print(f"  Agents: {len(registry.agents)}")
+    print(f"  Reparsed: {stats.reparsed}, reused: {stats.reused + stats.rehashed}")
+    if stats.failed:
+        print(f"  Failed: {', '.join(stats.failed)}")
+    if not stats.cache_written and (stats.reparsed or stats.index_rebuilt):
+        print("  ⚠️  Cache not written (directory not writable)")
+
+
+if __name__ == '__main__':
+    main()
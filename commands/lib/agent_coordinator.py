@@ -24,8 +24,9 @@ from typing import Optional, Dict, Any, List
 from pathlib import Path
 from datetime import datetime
 
-from .agent_registry import AgentRegistry, Agent, AgentMatch
+from .agent_registry import Agent, AgentMatch, get_agent_registry
 from .agent_decision_engine import AgentDecisionEngine, DecisionResult
+from .request_context import RequestContext
 
 
 class AgentCoordinator:
@@ -48,7 +49,7 @@ class AgentCoordinator:
         if self._initialized:
             return
 
-        self.registry = AgentRegistry()
+        self.registry = get_agent_registry()
         self.current_agent: Optional[Agent] = None
         self.task_description: str = ""
         self.usage_stats: List[Dict] = []
@@ -60,7 +61,8 @@ class AgentCoordinator:
         task_description: str,
         command_name: str,
         auto_activate: bool = True,
-        min_confidence: float = 0.65
+        min_confidence: float = 0.65,
+        request_context: Optional[RequestContext] = None
     ) -> Dict[str, Any]:
         """
         拦截命令执行，选择合适的 agent
@@ -70,6 +72,7 @@ class AgentCoordinator:
             command_name: 当前执行的命令名（如 wf_05_code）
             auto_activate: 是否自动激活
             min_confidence: 最低置信度阈值 (默认 0.65，足以激活推荐的 agent)
+            request_context: 请求级共享上下文 (复用同一请求中已完成的 agent 匹配和 MCP 推荐)
 
         Returns:
             agent_context: {
@@ -85,9 +88,10 @@ class AgentCoordinator:
             }
         """
         self.task_description = task_description
+        ctx = RequestContext.of(task_description, request_context)
 
         # Step 1: 选择 agent
-        matches = self.registry.select_agent(task_description, top_k=3)
+        matches = ctx.select_agent(self.registry, top_k=3)
 
         if not matches:
             return self._create_fallback_context(command_name)
@@ -107,7 +111,7 @@ class AgentCoordinator:
             self.current_agent = best_match.agent
 
         # Step 3: 构建 agent 上下文
-        mcp_hints = self._extract_mcp_hints(best_match.agent)
+        mcp_hints = self._extract_mcp_hints(best_match.agent, ctx)
 
         context = {
             'agent': best_match.agent,
@@ -177,12 +181,15 @@ class AgentCoordinator:
 
         return context
 
-    def _extract_mcp_hints(self, agent: Agent) -> List[Dict[str, Any]]:
+    def _extract_mcp_hints(
+        self, agent: Agent, request_context: Optional[RequestContext] = None
+    ) -> List[Dict[str, Any]]:
         """
         智能提取 MCP 工具推荐（使用 MCPSelector V2 API）
 
         Args:
             agent: Agent 对象
+            request_context: 请求级共享上下文 (可选)
 
         Returns:
             List of Dict containing:
@@ -209,7 +216,8 @@ class AgentCoordinator:
             recommendations = selector.select_tools_v2(
                 agent=agent,
                 task_description=self.task_description,
-                auto_filter=True  # Filter out low-confidence tools
+                auto_filter=True,  # Filter out low-confidence tools
+                request_context=request_context
             )
 
             # Convert MCPToolRecommendation objects to dicts
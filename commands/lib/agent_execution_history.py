@@ -10,11 +10,12 @@ Agent Execution History - 执行历史管理
 - 持久化存储执行数据
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 import json
 import logging
+import math
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -160,6 +161,36 @@ class AgentExecutionHistory:
             "average_execution_time": avg_time,
         }
 
+    def get_duration_percentiles(
+        self, agent_id: str, percentiles: Sequence[int] = (50, 90)
+    ) -> Dict[str, float]:
+        """
+        获取特定 Agent 执行时长的分位数（最近秩法）
+
+        只统计 execution_time > 0 的记录；agent_id 与记录的 agent_id
+        或 agent_name 任一相同即视为该 Agent 的记录。
+
+        Args:
+            agent_id: Agent ID 或名称
+            percentiles: 需要的分位数 (0-100)
+
+        Returns:
+            {"count": 样本数, "p50": 秒, "p90": 秒, ...}；无样本时分位数为 0.0
+        """
+        durations = sorted(
+            r.execution_time for r in self.records
+            if (r.agent_id == agent_id or r.agent_name == agent_id) and r.execution_time > 0
+        )
+
+        result: Dict[str, float] = {"count": len(durations)}
+        for p in percentiles:
+            if durations:
+                rank = max(1, math.ceil(p / 100 * len(durations)))
+                result[f"p{p}"] = durations[min(rank, len(durations)) - 1]
+            else:
+                result[f"p{p}"] = 0.0
+        return result
+
     def get_global_statistics(self) -> Dict[str, Any]:
         """
         获取全局执行统计
@@ -20,6 +20,7 @@ from commands.lib.agent_command_executor import AgentCommandExecutor, ExecutionR
 from commands.lib.agent_feedback_system import AgentFeedbackSystem
 from commands.lib.agent_execution_history import AgentExecutionHistory
 from commands.lib.agent_registry import Agent
+from commands.lib.request_context import RequestContext
 from commands.lib.multi_agent_orchestrator import (
     MultiAgentOrchestrator,
     ExecutionMode,
@@ -102,7 +103,8 @@ class AgentExecutionPipeline:
         self.decision_engine = AgentDecisionEngine()
         self.executor = AgentCommandExecutor()
         self.feedback_system = AgentFeedbackSystem()
-        self.orchestrator = MultiAgentOrchestrator()
+        # 执行时长记录在反馈系统的历史中，供编排计划估算时间
+        self.orchestrator = MultiAgentOrchestrator(history=self.feedback_system.history)
 
         # 初始化历史记录
         if self.config.enable_history:
@@ -119,7 +121,8 @@ class AgentExecutionPipeline:
         self,
         user_input: str,
         command_name: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        request_context: Optional[RequestContext] = None
     ) -> PipelineResult:
         """
         执行单个 Agent 的完整流程
@@ -128,9 +131,14 @@ class AgentExecutionPipeline:
             user_input: 用户输入/任务描述
             command_name: 当前执行的命令名
             context: 上下文信息
+            request_context: 请求级共享上下文 (默认为本次调用新建，须与 user_input 为同一任务)；
+                以 'request_context' 键传给决策阶段，统计写入 metadata['request_stats']
 
         Returns:
             PipelineResult: 执行结果
+
+        Raises:
+            ValueError: request_context 属于其他任务
         """
         start_time = datetime.now()
         self._pipeline_counter += 1
@@ -140,6 +148,7 @@ class AgentExecutionPipeline:
             success=False,
             pipeline_id=pipeline_id
         )
+        ctx = RequestContext.of(user_input, request_context)
 
         try:
             # Stage 1: 决策引擎
@@ -149,7 +158,7 @@ class AgentExecutionPipeline:
             decision_result = self.decision_engine.analyze_and_recommend(
                 user_input=user_input,
                 command_name=command_name,
-                context=context or {}
+                context={**(context or {}), 'request_context': ctx}
             )
 
             decision_duration = (datetime.now() - decision_start).total_seconds() * 1000
@@ -161,6 +170,7 @@ class AgentExecutionPipeline:
                 result.success = True
                 result.metadata['skipped'] = True
                 result.metadata['reason'] = 'Low confidence decision'
+                result.metadata['request_stats'] = ctx.stats.as_dict()
                 logger.info(f"[{pipeline_id}] Skipped: Low confidence ({decision_result.confidence})")
                 return result
 
@@ -221,6 +231,7 @@ class AgentExecutionPipeline:
             result.error_stage = self._determine_error_stage(result)
             logger.error(f"[{pipeline_id}] Pipeline error: {e}", exc_info=True)
 
+        result.metadata['request_stats'] = ctx.stats.as_dict()
         return result
 
     def execute_multi_agent(
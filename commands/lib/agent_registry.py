@@ -13,20 +13,33 @@ Design Principles:
 - MCP integration awareness per agent
 
 Usage:
-    from commands.lib.agent_registry import AgentRegistry
+    from commands.lib.agent_registry import AgentRegistry, get_agent_registry
 
     registry = AgentRegistry()
+    shared = get_agent_registry()  # process-wide shared instance
+    live = AgentRegistry(watch=True)  # hot-reloads edited agent files
     agent = registry.select_agent("实现用户登录功能")
     print(f"Selected: {agent.name} (confidence: {agent.score})")
 """
 
+import heapq
 import os
 import re
+import threading
 import yaml
-from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
 from dataclasses import dataclass
 from pathlib import Path
 
+from commands.lib.agent_catalog import AgentCatalog, CatalogStats
+from commands.lib.agent_watcher import AgentDirectoryWatcher, BACKEND_AUTO
+from commands.lib.cjk_segmenter import CJKSegmenter
+from commands.lib.keyword_lexicon import LexiconHits, get_lexicon
+from commands.lib.routing_cache import RoutingCache
+
 # ==================== 正则表达式预编译优化 (Task 7.9) ====================
 # 目的：避免每次调用时重新编译正则表达式，提升性能 ≥20%
 #
@@ -44,6 +57,111 @@ PATTERN_FRONTMATTER = re.compile(r'^---\n(.*?)\n---\n', re.DOTALL)
 # 清理文本：删除除了中文、英文、数字外的所有字符
 PATTERN_CLEANUP_TEXT = re.compile(r'[^\u4e00-\u9fffa-zA-Z0-9]')
 
+# Prefer the libyaml C loader when rebuilding agent definitions
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# ==================== 匹配评分参数 ====================
+# Phrase kinds stored in the inverted index
+PHRASE_KEYWORD = 'keyword'
+PHRASE_SCENARIO = 'scenario'
+
+# Minimum share of phrase segments (CJKSegmenter.phrase_segments) that must
+# appear in the task (fuzzy path)
+CHAR_MATCH_RATIO = {
+    PHRASE_KEYWORD: 0.4,
+    PHRASE_SCENARIO: 0.6,
+}
+
+# Priority boost added on top of keyword/scenario scores
+PRIORITY_BOOST = {
+    'critical': (0.1, "关键级优先"),
+    'high': (0.05, "高优先级"),
+}
+
+# Tie-break order when scores are equal (critical > high > medium > low)
+PRIORITY_ORDER = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+
+# (agent_name, phrase_kind, phrase_index)
+PhraseKey = Tuple[str, str, int]
+
+
+def score_from_counts(priority: str, keyword_count: int, scenario_count: int) -> float:
+    """
+    Confidence score from matched phrase counts
+
+    Scoring logic:
+    - Keyword match: +0.3 per keyword (max 0.6)
+    - Scenario match: +0.4 per scenario (max 0.4)
+    - Priority boost: critical=+0.1, high=+0.05
+
+    Used for both real scores and per-agent upper bounds (all phrases
+    matched), so the two are always computed with the same arithmetic.
+    """
+    score = 0.0
+    score += min(0.3 * keyword_count, 0.6)
+    score += min(0.4 * scenario_count, 0.4)
+    if priority in PRIORITY_BOOST:
+        score += PRIORITY_BOOST[priority][0]
+    return score
+
+
+@dataclass(frozen=True)
+class TaskQuery:
+    """
+    Normalized view of one task description
+
+    Lowercasing, cleanup, word splitting, Chinese detection and the keyword
+    lexicon scan are computed once per request and shared by AgentRegistry,
+    TaskAnalyzer, MCPSelector and AgentRouter. Every entry point accepts
+    either a raw string or a TaskQuery (see TaskQuery.of).
+    """
+    text: str                    # Raw task description
+    lower: str                   # text.lower()
+    clean: str                   # lower without punctuation/whitespace
+    words: FrozenSet[str]        # Whitespace-split words of lower
+    cjk_chars: FrozenSet[str]    # Chinese characters in clean
+    has_chinese: bool
+
+    @classmethod
+    def from_text(cls, text: str) -> 'TaskQuery':
+        """Build a normalized query from a raw task description"""
+        lower = text.lower()
+        clean = PATTERN_CLEANUP_TEXT.sub('', lower)
+        cjk_chars = frozenset(PATTERN_CHINESE.findall(clean))
+        return cls(
+            text=text,
+            lower=lower,
+            clean=clean,
+            words=frozenset(lower.split()),
+            cjk_chars=cjk_chars,
+            has_chinese=bool(cjk_chars),
+        )
+
+    @classmethod
+    def of(cls, task: Union[str, 'TaskQuery']) -> 'TaskQuery':
+        """Return task unchanged if already normalized, otherwise normalize it"""
+        if isinstance(task, cls):
+            return task
+        return cls.from_text(task)
+
+    @cached_property
+    def lexicon_hits(self) -> LexiconHits:
+        """Keyword-table hits (intent, complexity, MCP, coordination), scanned once"""
+        return get_lexicon().scan(self.lower)
+
+    @property
+    def key(self) -> str:
+        """Cache key: lowercase text with collapsed whitespace (same routing result)"""
+        return ' '.join(self.lower.split())
+
+    @property
+    def is_english(self) -> bool:
+        """True if the task contains no Chinese characters"""
+        return not self.has_chinese
+
+    def __str__(self) -> str:
+        return self.text
+
 
 @dataclass
 class Agent:
@@ -80,6 +198,207 @@ class AgentMatch:
         return f"{self.agent.name}: {self.score:.2f} - {self.reason}"
 
 
+class AgentMatchIndex:
+    """
+    Inverted index over agent activation keywords and scenarios
+
+    Built once per registry load so that select_agent() only evaluates the
+    phrases that share a word token or a segment with the task, instead of
+    re-cleaning every phrase of every agent on each call.
+
+    Postings:
+    - word_postings: English word token -> [PhraseKey]
+      (phrases without Chinese, matched by whole-word intersection)
+    - segment_postings: segment -> [PhraseKey]
+      (CJKSegmenter.phrase_segments of each phrase, so the 40%/60%
+      segment ratio is computed from postings alone)
+    - phrase_lexicon / clean_postings: cleaned phrase -> [PhraseKey]
+      (phrase-inside-task substrings found with one trie scan)
+    - char_postings: character -> [PhraseKey]
+      (candidates for the task-inside-phrase substring check)
+
+    Matching semantics are identical to AgentRegistry._calculate_match_score.
+    """
+
+    def __init__(self, agents: Dict[str, Agent]):
+        self.word_postings: Dict[str, List[PhraseKey]] = defaultdict(list)
+        self.segment_postings: Dict[str, List[PhraseKey]] = defaultdict(list)
+        self.clean_postings: Dict[str, List[PhraseKey]] = defaultdict(list)
+        self.char_postings: Dict[str, List[PhraseKey]] = defaultdict(list)
+        self.segment_counts: Dict[PhraseKey, int] = {}
+        self.clean_phrases: Dict[PhraseKey, str] = {}
+        self.chinese_phrases: Set[PhraseKey] = set()
+        self.empty_phrases: List[PhraseKey] = []
+        self.max_phrase_length = 0
+
+        phrases = [
+            ((agent.name, kind, idx), phrase)
+            for agent in agents.values()
+            for kind, agent_phrases in (
+                (PHRASE_KEYWORD, agent.activation_keywords),
+                (PHRASE_SCENARIO, agent.activation_scenarios),
+            )
+            for idx, phrase in enumerate(agent_phrases)
+        ]
+        self.segmenter = CJKSegmenter.from_phrases(phrase for _, phrase in phrases)
+        for key, phrase in phrases:
+            self._add_phrase(key, phrase)
+        self.phrase_lexicon = CJKSegmenter(self.clean_postings)
+
+        # Freeze postings into plain dicts (no accidental inserts on lookup)
+        self.word_postings = dict(self.word_postings)
+        self.segment_postings = dict(self.segment_postings)
+        self.clean_postings = dict(self.clean_postings)
+        self.char_postings = dict(self.char_postings)
+
+    def _add_phrase(self, key: PhraseKey, phrase: str) -> None:
+        """Register one keyword/scenario phrase in the postings"""
+        phrase_lower = phrase.lower()
+        phrase_clean = PATTERN_CLEANUP_TEXT.sub('', phrase_lower)
+        self.clean_phrases[key] = phrase_clean
+
+        if PATTERN_CHINESE.search(phrase):
+            self.chinese_phrases.add(key)
+        else:
+            for word in set(phrase_lower.split()):
+                self.word_postings[word].append(key)
+
+        if not phrase_clean:
+            self.empty_phrases.append(key)
+            return
+
+        self.clean_postings[phrase_clean].append(key)
+        self.max_phrase_length = max(self.max_phrase_length, len(phrase_clean))
+        for char in set(phrase_clean):
+            self.char_postings[char].append(key)
+
+        segments = self.segmenter.phrase_segments(phrase)
+        self.segment_counts[key] = len(segments)
+        for segment in segments:
+            self.segment_postings[segment].append(key)
+
+    def lookup(self, task: Union[str, TaskQuery]) -> Dict[str, Dict[str, List[int]]]:
+        """
+        Find every phrase matching the task
+
+        Returns:
+            {agent_name: {phrase_kind: [phrase_index, ...]}} (indices sorted)
+        """
+        query = TaskQuery.of(task)
+        task_has_chinese = query.has_chinese
+        task_clean = query.clean
+        matched: Set[PhraseKey] = set()
+
+        # 1. Segment path: Chinese phrases, or every phrase for Chinese tasks
+        if not task_clean:
+            # Empty cleaned task is a substring of every phrase
+            matched.update(self.chinese_phrases)
+        else:
+            candidates: Set[PhraseKey] = set()
+
+            # Phrase ⊂ task: one trie scan finds every contained phrase
+            for phrase_clean in self.phrase_lexicon.find_words(task_clean):
+                candidates.update(self.clean_postings[phrase_clean])
+
+            # Task ⊂ phrase: only phrases containing the first task character
+            if len(task_clean) <= self.max_phrase_length:
+                for key in self.char_postings.get(task_clean[0], ()):
+                    if task_clean in self.clean_phrases[key]:
+                        candidates.add(key)
+
+            # Segment ratio: set intersection with the task features
+            segment_hits: Dict[PhraseKey, int] = defaultdict(int)
+            for segment in self.segmenter.features(query.lower):
+                for key in self.segment_postings.get(segment, ()):
+                    segment_hits[key] += 1
+            for key, hit_count in segment_hits.items():
+                if hit_count / self.segment_counts[key] >= CHAR_MATCH_RATIO[key[1]]:
+                    candidates.add(key)
+
+            if task_has_chinese:
+                matched.update(candidates)
+                # Empty cleaned phrase is a substring of every task
+                matched.update(self.empty_phrases)
+            else:
+                matched.update(candidates & self.chinese_phrases)
+
+        # 2. Word path: English phrases against English-only tasks
+        if not task_has_chinese:
+            for word in query.words:
+                matched.update(self.word_postings.get(word, ()))
+
+        hits: Dict[str, Dict[str, List[int]]] = {}
+        for agent_name, kind, idx in matched:
+            hits.setdefault(agent_name, {}).setdefault(kind, []).append(idx)
+        for kinds in hits.values():
+            for indices in kinds.values():
+                indices.sort()
+
+        return hits
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """
+    Immutable view of the loaded agents and their match index
+
+    AgentRegistry publishes a new snapshot on every reload by swapping a
+    single reference, so readers never lock and never see a partial update.
+    """
+    agents: Mapping[str, Agent]
+    index: AgentMatchIndex
+    version: int = 0
+    # (score_upper_bound, load_position, agent), highest bound first
+    bound_order: Tuple[Tuple[float, int, Agent], ...] = ()
+    # agent_router.WorkflowTemplates compiled from agents, shared by every router
+    templates: Any = None
+
+    @classmethod
+    def build(cls, agents: Dict[str, Agent], index: AgentMatchIndex, version: int = 0):
+        """Create a snapshot, precompute per-agent score upper bounds and workflow templates"""
+        from commands.lib.agent_router import WorkflowTemplates
+
+        agents = MappingProxyType(dict(agents))
+        bounds = [
+            (
+                score_from_counts(
+                    agent.priority,
+                    len(agent.activation_keywords),
+                    len(agent.activation_scenarios)
+                ),
+                position,
+                agent
+            )
+            for position, agent in enumerate(agents.values())
+        ]
+        bounds.sort(key=lambda b: (-b[0], b[1]))
+        return cls(
+            agents=agents,
+            index=index,
+            version=version,
+            bound_order=tuple(bounds),
+            templates=WorkflowTemplates(agents)
+        )
+
+
+def resolve_agents_dir(agents_dir: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Resolve agents directory to an absolute path
+
+    Args:
+        agents_dir: Path to agents directory (default: commands/agents/)
+
+    Returns:
+        Resolved absolute path (used as the shared registry pool key)
+    """
+    if agents_dir is None:
+        # Auto-detect agents directory relative to this file
+        current_dir = Path(__file__).parent.parent
+        agents_dir = current_dir / "agents"
+
+    return Path(agents_dir).resolve()
+
+
 class AgentRegistry:
     """
     Central registry for agent management and intelligent routing
@@ -92,47 +411,159 @@ class AgentRegistry:
     - MCP integration awareness
     """
 
-    def __init__(self, agents_dir: Optional[str] = None):
+    def __init__(
+        self,
+        agents_dir: Optional[str] = None,
+        use_catalog: bool = True,
+        rebuild_catalog: bool = False,
+        watch: bool = False,
+        watch_interval: float = 1.0,
+        cache_size: int = 256,
+        cache_ttl: float = 300.0
+    ):
         """
         Initialize agent registry
 
         Args:
             agents_dir: Path to agents directory (default: commands/agents/)
+            use_catalog: Load through the compiled agent catalog cache
+            rebuild_catalog: Ignore cached entries and reparse every file
+            watch: Hot-reload when agent files change (see watch())
+            watch_interval: Polling interval in seconds for the watcher
+            cache_size: select_agent result cache entries (0 disables caching)
+            cache_ttl: Seconds a cached routing result stays valid
         """
-        if agents_dir is None:
-            # Auto-detect agents directory relative to this file
-            current_dir = Path(__file__).parent.parent
-            agents_dir = current_dir / "agents"
+        self.agents_dir = resolve_agents_dir(agents_dir)
+        self._snapshot: Optional[RegistrySnapshot] = None
+        self.use_catalog = use_catalog
+        self.catalog_stats: Optional[CatalogStats] = None
+        self._catalog: Optional[AgentCatalog] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[AgentDirectoryWatcher] = None
+        self._feature_matrix = None  # agent_batch.AgentFeatureMatrix, built lazily
+        # Invalidated automatically when reload() publishes a new snapshot
+        self.routing_cache: Optional[RoutingCache] = (
+            RoutingCache(max_size=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+        )
+        self._load_agents(rebuild_catalog)
+
+        if watch:
+            self.watch(poll_interval=watch_interval)
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """Current immutable snapshot (read once per operation for consistency)"""
+        return self._snapshot
+
+    @property
+    def agents(self) -> Mapping[str, Agent]:
+        """Loaded agents by name (read-only view of the current snapshot)"""
+        return self._snapshot.agents
 
-        self.agents_dir = Path(agents_dir)
-        self.agents: Dict[str, Agent] = {}
-        self._load_agents()
+    @property
+    def _index(self) -> AgentMatchIndex:
+        return self._snapshot.index
 
-    def _load_agents(self) -> None:
-        """Load all agent definitions from markdown files"""
+    @property
+    def segmenter(self) -> CJKSegmenter:
+        """Chinese segmenter whose dictionary is every loaded keyword/scenario"""
+        return self._snapshot.index.segmenter
+
+    def _load_agents(self, rebuild_catalog: bool = False) -> None:
+        """Load all agent definitions from markdown files (or the catalog cache)"""
         if not self.agents_dir.exists():
             raise FileNotFoundError(f"Agents directory not found: {self.agents_dir}")
 
-        for md_file in self.agents_dir.glob("*_agent.md"):
-            try:
-                agent = self._parse_agent_file(md_file)
-                self.agents[agent.name] = agent
-            except Exception as e:
-                print(f"Warning: Failed to load {md_file.name}: {e}")
+        if self.use_catalog:
+            # Parsed records and the match index come from the compiled
+            # catalog; only new or modified files are reparsed
+            if self._catalog is None:
+                self._catalog = AgentCatalog(
+                    self.agents_dir,
+                    parse_file=self._parse_agent_text,
+                    build_index=AgentMatchIndex
+                )
+            agents, index = self._catalog.load(rebuild=rebuild_catalog)
+            self.catalog_stats = self._catalog.stats
+        else:
+            agents = {}
+            for md_file in self.agents_dir.glob("*_agent.md"):
+                try:
+                    agent = self._parse_agent_file(md_file)
+                    agents[agent.name] = agent
+                except Exception as e:
+                    print(f"Warning: Failed to load {md_file.name}: {e}")
+
+            # Build the inverted keyword/scenario index once per load
+            index = AgentMatchIndex(agents)
+
+        # Publish a fully built snapshot with one reference swap (copy-on-write)
+        version = self._snapshot.version + 1 if self._snapshot else 0
+        self._snapshot = RegistrySnapshot.build(agents, index, version)
 
         print(f"Loaded {len(self.agents)} agents from {self.agents_dir}")
 
+    def reload(self, rebuild_catalog: bool = False) -> 'AgentRegistry':
+        """
+        Reload agent definitions in place
+
+        Only new or modified files are reparsed (when using the catalog).
+        Every component holding this registry sees the new agents after
+        the call returns; concurrent readers keep using the old snapshot.
+
+        Args:
+            rebuild_catalog: Ignore cached entries and reparse every file
+
+        Returns:
+            self
+        """
+        with self._reload_lock:
+            self._load_agents(rebuild_catalog)
+        return self
+
+    def watch(self, poll_interval: float = 1.0, backend: str = BACKEND_AUTO) -> AgentDirectoryWatcher:
+        """
+        Start hot-reloading when agent files change
+
+        Uses inotify where available and stat polling otherwise.
+
+        Args:
+            poll_interval: Seconds between polls / watcher wake-ups
+            backend: 'auto', 'inotify' or 'polling'
+
+        Returns:
+            The running AgentDirectoryWatcher
+        """
+        if self._watcher is None or not self._watcher.running:
+            self._watcher = AgentDirectoryWatcher(
+                self.agents_dir,
+                on_change=self.reload,
+                poll_interval=poll_interval,
+                backend=backend
+            ).start()
+        return self._watcher
+
+    def stop_watching(self) -> None:
+        """Stop hot-reloading (no-op if not watching)"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
     def _parse_agent_file(self, file_path: Path) -> Agent:
         """Parse agent definition from markdown file with YAML frontmatter"""
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
+        return self._parse_agent_text(file_path, content)
+
+    def _parse_agent_text(self, file_path: Path, content: str) -> Agent:
+        """Parse agent definition from already-read markdown content"""
         # Extract YAML frontmatter
-        match = re.match(r'^---\n(.*?)\n---\n', content, re.DOTALL)
+        match = PATTERN_FRONTMATTER.match(content)
         if not match:
             raise ValueError(f"No YAML frontmatter found in {file_path.name}")
 
-        frontmatter = yaml.safe_load(match.group(1))
+        frontmatter = yaml.load(match.group(1), Loader=YAML_LOADER)
 
         return Agent(
             name=frontmatter['agent_name'],
@@ -151,44 +582,223 @@ class AgentRegistry:
             file_path=str(file_path)
         )
 
-    def select_agent(self, task_description: str, top_k: int = 1) -> List[AgentMatch]:
+    def select_agent(
+        self, task_description: Union[str, TaskQuery], top_k: int = 1
+    ) -> List[AgentMatch]:
         """
         Select best agent(s) for a given task description
 
         Args:
-            task_description: User's task description or request
+            task_description: User's task description or request (str or TaskQuery)
             top_k: Number of top matches to return (default: 1)
 
         Returns:
             List of AgentMatch objects sorted by confidence score
         """
-        matches = []
+        snapshot = self._snapshot
+        query = TaskQuery.of(task_description)
+
+        cache = self.routing_cache
+        if cache is not None:
+            cached = cache.get(query.key, query.clean, context=top_k, generation=snapshot)
+            if cached is not None:
+                return list(cached)
+
+        matches = self._select_from_snapshot(snapshot, query, top_k)
+
+        if cache is not None:
+            cache.put(query.key, query.clean, tuple(matches), context=top_k, generation=snapshot)
+        return matches
+
+    def _select_from_snapshot(
+        self, snapshot: RegistrySnapshot, query: TaskQuery, top_k: int
+    ) -> List[AgentMatch]:
+        """Uncached heap-based top-k selection against one snapshot"""
+        hits = snapshot.index.lookup(query)
+        k = top_k if top_k > 0 else len(snapshot.agents)
+
+        # Min-heap of the best k: (score, priority, -load_position, agent).
+        # Ordering matches a stable sort by (score, priority) descending.
+        heap: List[Tuple[float, int, int, Agent]] = []
+
+        for upper_bound, position, agent in snapshot.bound_order:
+            if len(heap) >= k and upper_bound < heap[0][0]:
+                # Agents are visited by descending upper bound: none of the
+                # remaining ones can reach the current k-th score
+                break
 
-        for agent in self.agents.values():
             if agent.status != 'active':
                 continue
 
-            score, matched_kw, matched_sc, reason = self._calculate_match_score(
-                agent, task_description
+            # Agents without phrase hits can only score their priority boost
+            agent_hits = hits.get(agent.name)
+            if agent_hits is None and agent.priority not in PRIORITY_BOOST:
+                continue
+
+            agent_hits = agent_hits or {}
+            score = score_from_counts(
+                agent.priority,
+                len(agent_hits.get(PHRASE_KEYWORD, ())),
+                len(agent_hits.get(PHRASE_SCENARIO, ()))
             )
+            if score <= 0:
+                continue
+
+            entry = (score, PRIORITY_ORDER.get(agent.priority, 0), -position, agent)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:3] > heap[0][:3]:
+                heapq.heapreplace(heap, entry)
 
-            if score > 0:
-                matches.append(AgentMatch(
-                    agent=agent,
-                    score=score,
-                    matched_keywords=matched_kw,
-                    matched_scenarios=matched_sc,
-                    reason=reason
-                ))
-
-        # Sort by score (descending) and priority (critical > high > medium > low)
-        priority_order = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
-        matches.sort(
-            key=lambda m: (m.score, priority_order.get(m.agent.priority, 0)),
-            reverse=True
+        # Matched phrase lists and reasons only for the returned agents
+        matches = []
+        for _, _, _, agent in sorted(heap, key=lambda e: e[:3], reverse=True):
+            score, matched_kw, matched_sc, reason = self._indexed_match_score(agent, hits)
+            matches.append(AgentMatch(
+                agent=agent,
+                score=score,
+                matched_keywords=matched_kw,
+                matched_scenarios=matched_sc,
+                reason=reason
+            ))
+
+        return matches if top_k > 0 else matches[:top_k]
+
+    def find_agents(
+        self,
+        task_description: Union[str, TaskQuery],
+        min_score: float = 0.0,
+        limit: Optional[int] = None
+    ) -> Iterator[AgentMatch]:
+        """
+        Stream every agent scoring at least min_score, best first
+
+        Same ordering as select_agent (score, then priority, then load
+        order). Agents are visited by descending score upper bound, and a
+        match is yielded as soon as no unvisited agent can outrank it, so
+        consumers that stop early (or pass limit) never score the tail.
+
+        Args:
+            task_description: User's task description (str or TaskQuery)
+            min_score: Minimum confidence score to yield (scores must also be > 0)
+            limit: Stop after this many matches (None = no limit)
+
+        Yields:
+            AgentMatch objects in descending score order
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        snapshot = self._snapshot
+        hits = snapshot.index.lookup(task_description)
+        bound_order = snapshot.bound_order
+
+        # Max-heap of scored, not yet yielded agents: (-score, -priority, position, agent)
+        pending: List[Tuple[float, int, int, Agent]] = []
+        next_agent = 0
+        yielded = 0
+
+        while True:
+            # Score agents until the best pending one provably comes next
+            while next_agent < len(bound_order):
+                upper_bound, position, agent = bound_order[next_agent]
+                if upper_bound < min_score:
+                    next_agent = len(bound_order)  # nobody left can qualify
+                    break
+                if pending and upper_bound < -pending[0][0]:
+                    break
+                next_agent += 1
+
+                if agent.status != 'active':
+                    continue
+                agent_hits = hits.get(agent.name)
+                if agent_hits is None and agent.priority not in PRIORITY_BOOST:
+                    continue
+                agent_hits = agent_hits or {}
+                score = score_from_counts(
+                    agent.priority,
+                    len(agent_hits.get(PHRASE_KEYWORD, ())),
+                    len(agent_hits.get(PHRASE_SCENARIO, ()))
+                )
+                if score > 0 and score >= min_score:
+                    heapq.heappush(
+                        pending,
+                        (-score, -PRIORITY_ORDER.get(agent.priority, 0), position, agent)
+                    )
+
+            if not pending:
+                return
+
+            agent = heapq.heappop(pending)[3]
+            score, matched_kw, matched_sc, reason = self._indexed_match_score(agent, hits)
+            yield AgentMatch(
+                agent=agent,
+                score=score,
+                matched_keywords=matched_kw,
+                matched_scenarios=matched_sc,
+                reason=reason
+            )
+
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
+    def select_agents_batch(
+        self,
+        tasks: Sequence[Union[str, TaskQuery]],
+        top_k: int = 1,
+        processes: Optional[int] = None
+    ) -> List[List[AgentMatch]]:
+        """
+        Select agents for many tasks at once (vectorized with NumPy)
+
+        Results are identical to calling select_agent(task, top_k) for each
+        task with the routing cache bypassed. Falls back to the scalar path
+        when NumPy is not installed.
+
+        Args:
+            tasks: Task descriptions (str or TaskQuery)
+            top_k: Number of top matches per task
+            processes: Worker processes, used whenever > 1; workers load
+                agents_dir from disk, so this pays off for large replays
+                only (None = in-process)
+
+        Returns:
+            One list of AgentMatch objects per task, in input order
+        """
+        from commands.lib import agent_batch
+
+        snapshot = self._snapshot
+        matrix = None
+        if agent_batch.np is not None:
+            cached = self._feature_matrix
+            if cached is None or cached.snapshot is not snapshot:
+                cached = agent_batch.AgentFeatureMatrix(snapshot)
+                self._feature_matrix = cached
+            matrix = cached
+
+        return agent_batch.select_agents_batch(
+            self, tasks, top_k=top_k, processes=processes, matrix=matrix
         )
 
-        return matches[:top_k]
+    def _indexed_match_score(
+        self, agent: Agent, hits: Dict[str, Dict[str, List[int]]]
+    ) -> Tuple[float, List[str], List[str], str]:
+        """
+        Score an agent from AgentMatchIndex.lookup() hits
+
+        Returns:
+            (score, matched_keywords, matched_scenarios, reason)
+        """
+        agent_hits = hits.get(agent.name, {})
+        matched_kw = [
+            agent.activation_keywords[i] for i in agent_hits.get(PHRASE_KEYWORD, [])
+        ]
+        matched_sc = [
+            agent.activation_scenarios[i] for i in agent_hits.get(PHRASE_SCENARIO, [])
+        ]
+        score, reason = self._score_matches(agent, matched_kw, matched_sc)
+        return score, matched_kw, matched_sc, reason
 
     def _contains_chinese(self, text: str) -> bool:
         """检测文本是否包含中文字符"""
@@ -196,7 +806,7 @@ class AgentRegistry:
         return bool(PATTERN_CHINESE.search(text))
 
     def _calculate_match_score(
-        self, agent: Agent, task_description: str
+        self, agent: Agent, task_description: Union[str, TaskQuery]
     ) -> Tuple[float, List[str], List[str], str]:
         """
         Calculate match score for an agent against task description
@@ -209,107 +819,93 @@ class AgentRegistry:
         Returns:
             (score, matched_keywords, matched_scenarios, reason)
         """
-        task_lower = task_description.lower()
-        score = 0.0
+        query = TaskQuery.of(task_description)
+        segmenter = self.segmenter
+        task_features = None
         matched_kw = []
         matched_sc = []
-        reasons = []
 
-        # 1. Keyword matching (max 0.6)
-        keyword_score = 0.0
+        def segment_match(phrase: str, kind: str) -> bool:
+            # 中文短语：子串包含，或足够比例的分词片段出现在任务中
+            nonlocal task_features
+            phrase_clean = PATTERN_CLEANUP_TEXT.sub('', phrase.lower())
+
+            # 策略1: 简单包含
+            if phrase_clean in query.clean or query.clean in phrase_clean:
+                return True
+
+            # 策略2: 分词片段匹配度（关键词 ≥40%，场景 ≥60%），集合求交
+            if task_features is None:
+                task_features = segmenter.features(query.lower)
+            segments = segmenter.phrase_segments(phrase)
+            return len(segments & task_features) / len(segments) >= CHAR_MATCH_RATIO[kind]
+
+        # 1. Keyword matching
         for keyword in agent.activation_keywords:
-            # 智能匹配：支持中文分词和英文单词匹配
-            is_matched = False
-
-            if self._contains_chinese(keyword) or self._contains_chinese(task_lower):
-                # 中文关键词：使用字符匹配（类似场景匹配）
-                # 使用预编译的正则表达式 (Task 7.9 优化)
-                keyword_clean = PATTERN_CLEANUP_TEXT.sub('', keyword.lower())
-                task_clean = PATTERN_CLEANUP_TEXT.sub('', task_lower)
-
-                # 策略1: 简单包含
-                if keyword_clean in task_clean or task_clean in keyword_clean:
-                    is_matched = True
-                else:
-                    # 策略2: 字符匹配度（至少40%的关键词字符出现在任务中，降低阈值以提高灵敏度）
-                    matched_count = sum(1 for char in keyword_clean if char in task_clean)
-                    if len(keyword_clean) > 0:
-                        match_ratio = matched_count / len(keyword_clean)
-                        is_matched = match_ratio >= 0.4
+            # 智能匹配：中文使用分词匹配，英文使用单词匹配
+            if query.has_chinese or self._contains_chinese(keyword):
+                is_matched = segment_match(keyword, PHRASE_KEYWORD)
             else:
                 # 英文关键词：使用单词匹配
                 keyword_words = set(keyword.lower().split())
-                task_words = set(task_lower.split())
-                is_matched = bool(keyword_words & task_words)
+                is_matched = bool(keyword_words & query.words)
 
             if is_matched:
-                keyword_score += 0.3
                 matched_kw.append(keyword)
-        keyword_score = min(keyword_score, 0.6)
-        score += keyword_score
 
-        if matched_kw:
-            reasons.append(f"关键词匹配: {', '.join(matched_kw)}")
-
-        # 2. Scenario matching (max 0.4)
-        scenario_score = 0.0
+        # 2. Scenario matching
         for scenario in agent.activation_scenarios:
-            # 智能匹配：中文使用模糊匹配，英文使用单词匹配
-            is_matched = False
-
-            if self._contains_chinese(scenario) or self._contains_chinese(task_lower):
-                # 中文场景：使用模糊匹配策略
-                # 策略1: 场景包含在任务中（子串）
-                # 策略2: 提取关键字符，检查足够多的字符出现在任务中
-                # 使用预编译的正则表达式 (Task 7.9 优化)
-
-                # 移除空格和标点，只保留中文和英文字母数字
-                scenario_clean = PATTERN_CLEANUP_TEXT.sub('', scenario.lower())
-                task_clean = PATTERN_CLEANUP_TEXT.sub('', task_lower)
-
-                # 策略1: 简单包含检查
-                if scenario_clean in task_clean or task_clean in scenario_clean:
-                    is_matched = True
-                else:
-                    # 策略2: 字符匹配度检查（至少60%的场景字符出现在任务中，降低阈值以提高灵敏度）
-                    matched_count = sum(1 for char in scenario_clean if char in task_clean)
-                    if len(scenario_clean) > 0:
-                        match_ratio = matched_count / len(scenario_clean)
-                        is_matched = match_ratio >= 0.6
+            # 智能匹配：中文使用分词模糊匹配，英文使用单词匹配
+            if query.has_chinese or self._contains_chinese(scenario):
+                is_matched = segment_match(scenario, PHRASE_SCENARIO)
             else:
                 # 英文场景：使用单词交集匹配
                 scenario_words = set(scenario.lower().split())
-                task_words = set(task_lower.split())
-                is_matched = bool(scenario_words & task_words)
+                is_matched = bool(scenario_words & query.words)
 
             if is_matched:
-                scenario_score += 0.4
                 matched_sc.append(scenario)
 
-        scenario_score = min(scenario_score, 0.4)
-        score += scenario_score
+        score, reason = self._score_matches(agent, matched_kw, matched_sc)
+
+        return score, matched_kw, matched_sc, reason
+
+    def _score_matches(
+        self, agent: Agent, matched_kw: List[str], matched_sc: List[str]
+    ) -> Tuple[float, str]:
+        """
+        Turn matched phrases into a confidence score and reason string
+
+        Score arithmetic lives in score_from_counts().
+
+        Returns:
+            (score, reason)
+        """
+        score = score_from_counts(agent.priority, len(matched_kw), len(matched_sc))
+        reasons = []
+
+        if matched_kw:
+            reasons.append(f"关键词匹配: {', '.join(matched_kw)}")
 
         if matched_sc:
             reasons.append(f"场景匹配: {matched_sc[0]}")
 
-        # 3. Priority boost
-        if agent.priority == 'critical':
-            score += 0.1
-            reasons.append("关键级优先")
-        elif agent.priority == 'high':
-            score += 0.05
-            reasons.append("高优先级")
+        # Priority boost
+        if agent.priority in PRIORITY_BOOST:
+            reasons.append(PRIORITY_BOOST[agent.priority][1])
 
-        # 4. Check confidence threshold
+        # Check confidence threshold
         threshold = agent.decision_criteria.get('confidence_threshold', 0.80)
         if score >= threshold:
             reasons.append(f"超过阈值 {threshold}")
 
         reason = "; ".join(reasons) if reasons else "无匹配"
 
-        return score, matched_kw, matched_sc, reason
+        return score, reason
 
-    def should_auto_activate(self, agent_name: str, task_description: str) -> bool:
+    def should_auto_activate(
+        self, agent_name: str, task_description: Union[str, TaskQuery]
+    ) -> bool:
         """
         Check if an agent should auto-activate for a task
 
@@ -382,7 +978,7 @@ class AgentRegistry:
 
         return agent.mcp_integrations
 
-    def suggest_workflow(self, task_description: str) -> Dict[str, any]:
+    def suggest_workflow(self, task_description: Union[str, TaskQuery]) -> Dict[str, any]:
         """
         Suggest a multi-agent workflow for a task
 
@@ -425,6 +1021,115 @@ class AgentRegistry:
         }
 
 
+class AgentRegistryPool:
+    """
+    Process-wide cache of shared AgentRegistry instances
+
+    One parsed, indexed registry per resolved agents directory. Components
+    get a registry instead of constructing their own, so the number of
+    TaskAnalyzer / AgentRouter / orchestrator instances no longer affects
+    parse time or memory. Registries stay pooled until evicted or cleared;
+    holders need no cleanup.
+
+    Usage:
+        registry = pool.get()            # loaded on first use, then shared
+        pool.refresh()                   # reload in place for all holders
+        pool.evict()                     # next get() loads a new instance
+    """
+
+    def __init__(self):
+        self._registries: Dict[Path, AgentRegistry] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, agents_dir: Union[str, Path]) -> bool:
+        return resolve_agents_dir(agents_dir) in self._registries
+
+    def get(self, agents_dir: Optional[Union[str, Path]] = None) -> AgentRegistry:
+        """
+        Get the shared registry for agents_dir, loading it on first use
+
+        Args:
+            agents_dir: Path to agents directory (default: commands/agents/)
+
+        Returns:
+            Shared AgentRegistry instance
+        """
+        key = resolve_agents_dir(agents_dir)
+        with self._lock:
+            registry = self._registries.get(key)
+            if registry is None:
+                registry = AgentRegistry(key)
+                self._registries[key] = registry
+            return registry
+
+    def evict(self, agents_dir: Optional[Union[str, Path]] = None) -> Optional[AgentRegistry]:
+        """
+        Remove a registry from the pool (current holders keep using it)
+
+        Args:
+            agents_dir: Path to agents directory (default: commands/agents/)
+
+        Returns:
+            The evicted registry, or None if it was not pooled
+        """
+        with self._lock:
+            registry = self._registries.pop(resolve_agents_dir(agents_dir), None)
+        if registry is not None:
+            registry.stop_watching()
+        return registry
+
+    def refresh(
+        self,
+        agents_dir: Optional[Union[str, Path]] = None,
+        rebuild_catalog: bool = False
+    ) -> Optional[AgentRegistry]:
+        """
+        Reload a pooled registry in place (all holders see the update)
+
+        Args:
+            agents_dir: Path to agents directory (default: commands/agents/)
+            rebuild_catalog: Ignore cached entries and reparse every file
+
+        Returns:
+            The refreshed registry, or None if it is not pooled
+        """
+        key = resolve_agents_dir(agents_dir)
+        with self._lock:
+            registry = self._registries.get(key)
+            if registry is not None:
+                registry.reload(rebuild_catalog)
+            return registry
+
+    def clear(self) -> None:
+        """Drop all pooled registries"""
+        with self._lock:
+            for registry in self._registries.values():
+                registry.stop_watching()
+            self._registries.clear()
+
+
+# Global registry pool
+_registry_pool = AgentRegistryPool()
+
+
+def get_registry_pool() -> AgentRegistryPool:
+    """Get the process-wide AgentRegistryPool"""
+    return _registry_pool
+
+
+def get_agent_registry(agents_dir: Optional[Union[str, Path]] = None) -> AgentRegistry:
+    """
+    Get the shared AgentRegistry for agents_dir
+
+    Args:
+        agents_dir: Path to agents directory (default: commands/agents/)
+
+    Returns:
+        Shared AgentRegistry instance
+    """
+    return _registry_pool.get(agents_dir)
+
+
 def main():
     """CLI interface for testing AgentRegistry"""
     import sys
@@ -8,6 +8,10 @@ working together on complex tasks.
 Design Principles:
 - Support three coordination modes: sequential, parallel, hierarchical
 - Dynamic workflow generation based on task complexity
+- Single/sequential/parallel shapes precompiled per agent (WorkflowTemplates);
+  routing only picks a template and stamps the match confidence onto it
+- Time estimates follow the critical path with per-agent durations from
+  AgentExecutionHistory (WorkflowEstimator)
 - Conflict detection and resolution
 - Progress tracking across multiple agents
 - Graceful degradation when agents fail
@@ -24,11 +28,19 @@ Usage:
     print(f"Agents: {[a.name for a in workflow['agents']]}")
 """
 
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass
+from typing import List, Dict, Mapping, Optional, Any, Sequence, Tuple, Union
+from dataclasses import dataclass, replace
 from enum import Enum
 
-from commands.lib.agent_registry import AgentRegistry, Agent, AgentMatch
+from commands.lib.agent_execution_history import AgentExecutionHistory
+from commands.lib.agent_registry import (
+    AgentRegistry, Agent, AgentMatch, TaskQuery, get_agent_registry
+)
+from commands.lib.keyword_lexicon import TABLE_COORDINATION
+from commands.lib.request_context import RequestContext
+from commands.lib.routing_cache import RoutingCache
+from commands.lib.workflow_dag import WorkflowValidation, validate_workflow
+from commands.lib.workflow_estimator import WorkflowEstimator
 
 
 class CoordinationMode(Enum):
@@ -76,6 +88,168 @@ Explanation: {self.explanation}
 """
 
 
+# Confidence multiplier per templated mode (more coordination = higher risk)
+TEMPLATE_CONFIDENCE_FACTOR = {
+    CoordinationMode.SINGLE: 1.0,
+    CoordinationMode.SEQUENTIAL: 0.95,
+    CoordinationMode.PARALLEL: 0.90,
+}
+
+
+@dataclass(frozen=True)
+class WorkflowTemplate:
+    """Task-independent workflow shape for one (primary agent, mode)"""
+    mode: CoordinationMode
+    primary_agent: Agent
+    steps: Tuple[WorkflowStep, ...]
+    explanation: str
+    confidence_factor: float
+
+    def instantiate(self, score: float, estimated_time: str) -> AgentWorkflow:
+        """Stamp a match score and time estimate onto a fresh copy of the template"""
+        return AgentWorkflow(
+            mode=self.mode,
+            primary_agent=self.primary_agent,
+            steps=[replace(step, dependencies=list(step.dependencies)) for step in self.steps],
+            estimated_time=estimated_time,
+            confidence=score * self.confidence_factor,
+            explanation=self.explanation
+        )
+
+
+class WorkflowTemplates:
+    """
+    Precompiled single / sequential / parallel templates for every agent
+
+    The shape of these workflows depends only on the primary agent's
+    collaboration_modes and on which collaborators are active, never on
+    the task text, so they are compiled once per registry snapshot
+    (RegistrySnapshot.templates) and shared by every router.
+    Hierarchical workflows depend on the task's matches and are not templated.
+    """
+
+    MODES = (CoordinationMode.SINGLE, CoordinationMode.SEQUENTIAL, CoordinationMode.PARALLEL)
+
+    def __init__(self, agents: Mapping[str, Agent]):
+        """
+        Compile templates
+
+        Args:
+            agents: Loaded agents by name (collaborators are resolved here)
+        """
+        self.agents = agents
+        self._templates: Dict[Tuple[str, CoordinationMode], WorkflowTemplate] = {
+            (agent.name, mode): self.compile(agent, mode, agents)
+            for agent in agents.values()
+            for mode in self.MODES
+        }
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get(self, agent: Agent, mode: CoordinationMode) -> WorkflowTemplate:
+        """Template for agent as primary in mode"""
+        template = self._templates.get((agent.name, mode))
+        if template is None or template.primary_agent is not agent:
+            # Agent not from this snapshot (e.g. matched before a reload)
+            template = self.compile(agent, mode, self.agents)
+        return template
+
+    @classmethod
+    def compile(
+        cls, agent: Agent, mode: CoordinationMode, agents: Mapping[str, Agent]
+    ) -> WorkflowTemplate:
+        """
+        Build and validate one template
+
+        Raises:
+            ValueError: If mode is not templated or a step depends on an
+                agent that no earlier step provides
+        """
+        if mode == CoordinationMode.SINGLE:
+            steps = [WorkflowStep(agent=agent, role="primary", dependencies=[])]
+            explanation = f"{agent.name} can handle this task independently"
+        elif mode == CoordinationMode.SEQUENTIAL:
+            steps = cls._sequential_steps(agent, agents)
+            explanation = f"Sequential workflow: {' → '.join([s.agent.name for s in steps])}"
+        elif mode == CoordinationMode.PARALLEL:
+            steps = cls._parallel_steps(agent, agents)
+            workers = sum(1 for s in steps if s.role == "worker")
+            explanation = f"Parallel workflow with {workers} concurrent agents"
+        else:
+            raise ValueError(f"No workflow template for mode: {mode.value}")
+
+        cls._validate(agent, steps)
+        return WorkflowTemplate(
+            mode=mode,
+            primary_agent=agent,
+            steps=tuple(steps),
+            explanation=explanation,
+            confidence_factor=TEMPLATE_CONFIDENCE_FACTOR[mode]
+        )
+
+    @staticmethod
+    def _collaborators(agent: Agent, mode: str, agents: Mapping[str, Agent]) -> List[Agent]:
+        """Active collaborators of agent declared with the given mode"""
+        collaborators = []
+        for collab in agent.collaboration_modes:
+            if collab.get('mode') != mode:
+                continue
+            collab_agent = agents.get(collab.get('agent'))
+            if collab_agent and collab_agent.status == 'active':
+                collaborators.append(collab_agent)
+        return collaborators
+
+    @classmethod
+    def _sequential_steps(cls, agent: Agent, agents: Mapping[str, Agent]) -> List[WorkflowStep]:
+        """A → B → C: primary, then each collaborator depends on the previous step"""
+        steps = [WorkflowStep(agent=agent, role="primary", dependencies=[])]
+        for collab_agent in cls._collaborators(agent, 'sequential', agents):
+            steps.append(WorkflowStep(
+                agent=collab_agent,
+                role="collaborator",
+                dependencies=[steps[-1].agent.name]  # Depends on previous
+            ))
+        return steps
+
+    @classmethod
+    def _parallel_steps(cls, agent: Agent, agents: Mapping[str, Agent]) -> List[WorkflowStep]:
+        """A ‖ B ‖ C → Merge: workers depend on the coordinator, the merge on all workers"""
+        steps = [WorkflowStep(agent=agent, role="coordinator", dependencies=[])]
+        parallel_agents = cls._collaborators(agent, 'parallel', agents)
+
+        # Parallel workers (all depend on coordinator, all in group 1)
+        for collab_agent in parallel_agents:
+            steps.append(WorkflowStep(
+                agent=collab_agent,
+                role="worker",
+                dependencies=[agent.name],
+                parallel_group=1
+            ))
+
+        # Merge step (primary agent consolidates results)
+        if parallel_agents:
+            steps.append(WorkflowStep(
+                agent=agent,
+                role="primary",
+                dependencies=[a.name for a in parallel_agents]
+            ))
+        return steps
+
+    @staticmethod
+    def _validate(agent: Agent, steps: List[WorkflowStep]) -> None:
+        """Every dependency must name an agent of an earlier step"""
+        provided = set()
+        for step in steps:
+            missing = [dep for dep in step.dependencies if dep not in provided]
+            if missing:
+                raise ValueError(
+                    f"Invalid workflow template for {agent.name}: "
+                    f"{step.agent.name} depends on {missing} before they run"
+                )
+            provided.add(step.agent.name)
+
+
 class AgentRouter:
     """
     Multi-agent coordination and workflow orchestration
@@ -88,29 +262,95 @@ class AgentRouter:
     - Progress tracking
     """
 
-    def __init__(self, registry: Optional[AgentRegistry] = None):
+    def __init__(
+        self,
+        registry: Optional[AgentRegistry] = None,
+        cache_size: int = 128,
+        cache_ttl: float = 300.0,
+        history: Optional[AgentExecutionHistory] = None
+    ):
         """
         Initialize agent router
 
         Args:
-            registry: AgentRegistry instance (creates new if None)
+            registry: AgentRegistry instance (shared pooled registry if None)
+            cache_size: route() result cache entries (0 disables caching)
+            cache_ttl: Seconds a cached workflow stays valid
+            history: Execution history for time estimates (default durations if None)
         """
-        self.registry = registry or AgentRegistry()
+        self.registry = registry or get_agent_registry()
+        self.estimator = WorkflowEstimator(history)
+        # Keyed on (mode, normalized task); invalidated when the registry reloads
+        self.routing_cache: Optional[RoutingCache] = (
+            RoutingCache(max_size=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+        )
+
+    @property
+    def templates(self) -> WorkflowTemplates:
+        """Workflow templates of the current registry snapshot (compiled with it on load)"""
+        return self.registry.snapshot.templates
 
-    def route(self, task_description: str, mode: Optional[str] = None) -> AgentWorkflow:
+    def route(
+        self,
+        task_description: Union[str, TaskQuery],
+        mode: Optional[str] = None,
+        request_context: Optional[RequestContext] = None
+    ) -> AgentWorkflow:
         """
         Route a task to appropriate agents and generate workflow
 
         Args:
-            task_description: User's task description
+            task_description: User's task description (str or TaskQuery)
             mode: Optional override for coordination mode
                   ("single", "sequential", "parallel", "hierarchical")
+            request_context: Shared per-request memo (agent matches are
+                  selected at most once per request; a cache hit hands
+                  the cached selection to it)
 
         Returns:
             AgentWorkflow with complete execution plan
         """
+        task_description = TaskQuery.of(task_description)
+        ctx = RequestContext.of(task_description, request_context)
+
+        cache = self.routing_cache
+        generation = getattr(self.registry, 'snapshot', None)
+        if cache is not None:
+            cached = cache.get(
+                task_description.key, task_description.clean,
+                context=mode, generation=generation
+            )
+            if cached is not None:
+                workflow, selection = cached
+                # Later callers in this request reuse the cached selection
+                if selection is not None:
+                    ctx.adopt_selection(self.registry, selection)
+                return self._copy_workflow(workflow)
+
+        workflow = self._route_uncached(task_description, mode, ctx)
+
+        if cache is not None:
+            cache.put(
+                task_description.key, task_description.clean,
+                (workflow, ctx.selection(self.registry)),
+                context=mode, generation=generation
+            )
+            return self._copy_workflow(workflow)
+        return workflow
+
+    def _copy_workflow(self, workflow: AgentWorkflow) -> AgentWorkflow:
+        """Copy a cached workflow so callers can modify steps safely"""
+        return replace(workflow, steps=[
+            replace(step, dependencies=list(step.dependencies))
+            for step in workflow.steps
+        ])
+
+    def _route_uncached(
+        self, task_description: TaskQuery, mode: Optional[str], request_context: RequestContext
+    ) -> AgentWorkflow:
+        """Full routing: agent selection, mode detection and workflow generation"""
         # Step 1: Get primary agent and collaborators
-        matches = self.registry.select_agent(task_description, top_k=3)
+        matches = request_context.select_agent(self.registry, top_k=3)
 
         if not matches:
             raise ValueError("No suitable agents found for task")
@@ -127,20 +367,21 @@ class AgentRouter:
             )
 
         # Step 3: Generate workflow based on mode
-        if coord_mode == CoordinationMode.SINGLE:
-            workflow = self._create_single_workflow(primary_match)
-        elif coord_mode == CoordinationMode.SEQUENTIAL:
-            workflow = self._create_sequential_workflow(primary_match, task_description)
-        elif coord_mode == CoordinationMode.PARALLEL:
-            workflow = self._create_parallel_workflow(primary_match, task_description)
-        else:  # HIERARCHICAL
-            workflow = self._create_hierarchical_workflow(primary_match, task_description)
+        if coord_mode == CoordinationMode.HIERARCHICAL:
+            workflow = self._create_hierarchical_workflow(
+                primary_match, task_description, request_context
+            )
+        else:
+            # Task-independent shape: stamp the score onto the precompiled template
+            workflow = self._instantiate(
+                self.templates.get(primary_agent, coord_mode), primary_match.score
+            )
 
         return workflow
 
     def _determine_coordination_mode(
         self,
-        task_description: str,
+        task_description: Union[str, TaskQuery],
         primary_agent: Agent,
         matches: List[AgentMatch]
     ) -> CoordinationMode:
@@ -153,20 +394,14 @@ class AgentRouter:
         - Parallel: Independent sub-tasks that can run concurrently
         - Hierarchical: Complex task requiring PM coordination
         """
-        desc_lower = task_description.lower()
+        hits = TaskQuery.of(task_description).lexicon_hits
 
         # Check for hierarchical indicators
-        hierarchical_keywords = [
-            '系统', '架构', '完整', '端到端', 'system', 'architecture', 'complete', 'full'
-        ]
-        if any(kw in desc_lower for kw in hierarchical_keywords):
+        if hits.has(TABLE_COORDINATION, 'hierarchical'):
             return CoordinationMode.HIERARCHICAL
 
         # Check for parallel indicators
-        parallel_keywords = [
-            '同时', '并行', '多个', 'parallel', 'multiple', 'concurrent'
-        ]
-        if any(kw in desc_lower for kw in parallel_keywords):
+        if hits.has(TABLE_COORDINATION, 'parallel'):
             return CoordinationMode.PARALLEL
 
         # Check if primary agent has collaborators defined
@@ -188,128 +423,43 @@ class AgentRouter:
 
     def _create_single_workflow(self, primary_match: AgentMatch) -> AgentWorkflow:
         """Create workflow for single agent"""
-        step = WorkflowStep(
-            agent=primary_match.agent,
-            role="primary",
-            dependencies=[]
-        )
-
-        return AgentWorkflow(
-            mode=CoordinationMode.SINGLE,
-            primary_agent=primary_match.agent,
-            steps=[step],
-            estimated_time=self._estimate_time([step]),
-            confidence=primary_match.score,
-            explanation=f"{primary_match.agent.name} can handle this task independently"
+        return self._instantiate(
+            self.templates.get(primary_match.agent, CoordinationMode.SINGLE), primary_match.score
         )
 
     def _create_sequential_workflow(
         self,
         primary_match: AgentMatch,
-        task_description: str
+        task_description: Union[str, TaskQuery]
     ) -> AgentWorkflow:
         """
         Create sequential workflow (A → B → C)
 
         Example: Architect → Code → Test → Review
         """
-        steps = []
-        primary_agent = primary_match.agent
-
-        # Step 1: Primary agent
-        steps.append(WorkflowStep(
-            agent=primary_agent,
-            role="primary",
-            dependencies=[]
-        ))
-
-        # Step 2-N: Add collaborators in sequence
-        for collab in primary_agent.collaboration_modes:
-            if collab.get('mode') != 'sequential':
-                continue
-
-            collab_agent_name = collab.get('agent')
-            collab_agent = self.registry.get_agent(collab_agent_name)
-
-            if collab_agent and collab_agent.status == 'active':
-                steps.append(WorkflowStep(
-                    agent=collab_agent,
-                    role="collaborator",
-                    dependencies=[steps[-1].agent.name]  # Depends on previous
-                ))
-
-        return AgentWorkflow(
-            mode=CoordinationMode.SEQUENTIAL,
-            primary_agent=primary_agent,
-            steps=steps,
-            estimated_time=self._estimate_time(steps),
-            confidence=primary_match.score * 0.95,  # Slight reduction for coordination
-            explanation=f"Sequential workflow: {' → '.join([s.agent.name for s in steps])}"
+        return self._instantiate(
+            self.templates.get(primary_match.agent, CoordinationMode.SEQUENTIAL), primary_match.score
         )
 
     def _create_parallel_workflow(
         self,
         primary_match: AgentMatch,
-        task_description: str
+        task_description: Union[str, TaskQuery]
     ) -> AgentWorkflow:
         """
         Create parallel workflow (A ‖ B ‖ C → Merge)
 
         Example: Multiple reviewers analyzing different aspects simultaneously
         """
-        steps = []
-        primary_agent = primary_match.agent
-
-        # Step 1: Primary agent (coordinator)
-        coordinator_step = WorkflowStep(
-            agent=primary_agent,
-            role="coordinator",
-            dependencies=[]
-        )
-        steps.append(coordinator_step)
-
-        # Step 2: Parallel workers
-        parallel_agents = []
-        for collab in primary_agent.collaboration_modes:
-            if collab.get('mode') != 'parallel':
-                continue
-
-            collab_agent_name = collab.get('agent')
-            collab_agent = self.registry.get_agent(collab_agent_name)
-
-            if collab_agent and collab_agent.status == 'active':
-                parallel_agents.append(collab_agent)
-
-        # Add parallel workers (all depend on coordinator, all in group 1)
-        for agent in parallel_agents:
-            steps.append(WorkflowStep(
-                agent=agent,
-                role="worker",
-                dependencies=[coordinator_step.agent.name],
-                parallel_group=1
-            ))
-
-        # Step 3: Merge step (primary agent consolidates results)
-        if parallel_agents:
-            steps.append(WorkflowStep(
-                agent=primary_agent,
-                role="primary",
-                dependencies=[a.name for a in parallel_agents]
-            ))
-
-        return AgentWorkflow(
-            mode=CoordinationMode.PARALLEL,
-            primary_agent=primary_agent,
-            steps=steps,
-            estimated_time=self._estimate_time(steps, parallel=True),
-            confidence=primary_match.score * 0.90,  # Reduction for coordination complexity
-            explanation=f"Parallel workflow with {len(parallel_agents)} concurrent agents"
+        return self._instantiate(
+            self.templates.get(primary_match.agent, CoordinationMode.PARALLEL), primary_match.score
         )
 
     def _create_hierarchical_workflow(
         self,
         primary_match: AgentMatch,
-        task_description: str
+        task_description: Union[str, TaskQuery],
+        request_context: Optional[RequestContext] = None
     ) -> AgentWorkflow:
         """
         Create hierarchical workflow (PM → {Worker1, Worker2, ...})
@@ -334,8 +484,10 @@ class AgentRouter:
         steps.append(coordinator_step)
 
         # Step 2: Identify worker agents based on task
-        # Get top 3 agents for the task
-        matches = self.registry.select_agent(task_description, top_k=3)
+        # Get top 3 agents for the task (reuses the selection made by route())
+        matches = RequestContext.of(task_description, request_context).select_agent(
+            self.registry, top_k=3
+        )
 
         # Add workers
         for match in matches:
@@ -360,28 +512,25 @@ class AgentRouter:
             mode=CoordinationMode.HIERARCHICAL,
             primary_agent=pm_agent,
             steps=steps,
-            estimated_time=self._estimate_time(steps, parallel=True),
+            estimated_time=self._estimate_time(steps),
             confidence=primary_match.score * 0.85,  # More coordination = higher risk
             explanation=f"PM coordinates {len(worker_names)} specialized agents"
         )
 
-    def _estimate_time(self, steps: List[WorkflowStep], parallel: bool = False) -> str:
+    def _estimate_time(self, steps: Sequence[WorkflowStep]) -> str:
         """
         Estimate total workflow execution time
 
-        Args:
-            steps: List of workflow steps
-            parallel: Whether parallel execution is involved
+        Critical path over the step dependencies, with per-agent p50/p90
+        durations from the execution history (see WorkflowEstimator).
         """
-        if len(steps) == 1:
-            return "15-30 minutes"
+        return self.estimator.estimate(
+            [(step.agent.name, step.dependencies) for step in steps]
+        ).format()
 
-        if parallel:
-            # Parallel workflows take time of longest branch + coordination overhead
-            return f"{30 * len(steps)}-{60 * len(steps)} minutes"
-        else:
-            # Sequential workflows accumulate time
-            return f"{20 * len(steps)}-{40 * len(steps)} minutes"
+    def _instantiate(self, template: WorkflowTemplate, score: float) -> AgentWorkflow:
+        """Workflow from a template with the match score and a current time estimate"""
+        return template.instantiate(score, self._estimate_time(template.steps))
 
     def suggest_manual_override(self, user_input: str) -> Optional[Dict[str, str]]:
         """
@@ -412,28 +561,25 @@ class AgentRouter:
 
         return None
 
-    def detect_conflicts(self, steps: List[WorkflowStep]) -> List[str]:
+    def validate(self, steps: Sequence[WorkflowStep]) -> WorkflowValidation:
         """
-        Detect potential conflicts in workflow
+        Validate workflow dependencies in linear time
 
         Returns:
-            List of conflict warnings
+            WorkflowValidation with cycles, missing dependencies, unreachable
+            steps, duplicate agents and the topological levels
         """
-        conflicts = []
-
-        # Check for duplicate agents
-        agent_names = [s.agent.name for s in steps]
-        duplicates = [name for name in agent_names if agent_names.count(name) > 1]
-        if duplicates:
-            conflicts.append(f"Duplicate agents detected: {set(duplicates)}")
+        return validate_workflow([(step.agent.name, step.dependencies) for step in steps])
 
-        # Check for circular dependencies
-        dependencies_map = {s.agent.name: s.dependencies for s in steps}
-        for agent_name, deps in dependencies_map.items():
-            if agent_name in deps:
-                conflicts.append(f"Circular dependency: {agent_name} depends on itself")
+    def detect_conflicts(self, steps: List[WorkflowStep]) -> List[str]:
+        """
+        Detect potential conflicts in workflow
 
-        return conflicts
+        Returns:
+            List of conflict warnings (duplicates, cycles, missing
+            dependencies and unreachable steps)
+        """
+        return self.validate(steps).conflicts()
 
 
 def main():
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Agent Watcher - Detect changes to agent definition files
+
+Watches commands/agents/*_agent.md and calls back when any definition is
+created, modified, moved or deleted. AgentRegistry uses it to hot-reload
+long-running sessions without rebuilding the registry.
+
+Design Principles:
+- inotify on Linux (via libc, no extra dependency), stat polling elsewhere
+- Callback runs on a single daemon thread; changes are debounced
+- Watcher failures never affect the registry (callback errors are logged)
+
+Usage:
+    from commands.lib.agent_watcher import AgentDirectoryWatcher
+
+    watcher = AgentDirectoryWatcher(agents_dir, on_change=registry.reload)
+    watcher.start()
+    ...
+    watcher.stop()
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+# Agent definition file suffix (matches AGENT_FILE_GLOB in agent_catalog)
+AGENT_FILE_SUFFIX = "_agent.md"
+
+# Watcher backends
+BACKEND_AUTO = 'auto'
+BACKEND_INOTIFY = 'inotify'
+BACKEND_POLLING = 'polling'
+
+# inotify 事件掩码 (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+INOTIFY_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+    | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+
+# struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# Editors write in several syscalls; wait this long for the burst to settle
+DEBOUNCE_SECONDS = 0.05
+
+
+class PollingBackend:
+    """Detect changes by comparing (mtime, size) of agent files"""
+
+    name = BACKEND_POLLING
+
+    def __init__(self, agents_dir: Path):
+        self.agents_dir = agents_dir
+        self._signature = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        signature = {}
+        try:
+            with os.scandir(self.agents_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(AGENT_FILE_SUFFIX):
+                        stat = entry.stat()
+                        signature[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return signature
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep for timeout, then report whether any agent file changed"""
+        threading.Event().wait(timeout)
+        signature = self._scan()
+        changed = signature != self._signature
+        self._signature = signature
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyBackend:
+    """Detect changes with Linux inotify through libc"""
+
+    name = BACKEND_INOTIFY
+
+    def __init__(self, agents_dir: Path):
+        libc_name = ctypes.util.find_library('c')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify not supported on this platform")
+
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(str(agents_dir)), INOTIFY_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {agents_dir}")
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to timeout for events; True if an agent file changed"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+                offset += length
+                if name.endswith(AGENT_FILE_SUFFIX):
+                    changed = True
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def create_backend(agents_dir: Path, backend: str = BACKEND_AUTO):
+    """
+    Create a change-detection backend
+
+    Args:
+        agents_dir: Directory to watch
+        backend: 'auto' (inotify if available), 'inotify' or 'polling'
+
+    Returns:
+        Backend instance with wait(timeout) -> bool and close()
+    """
+    if backend == BACKEND_POLLING:
+        return PollingBackend(agents_dir)
+    if backend == BACKEND_INOTIFY:
+        return InotifyBackend(agents_dir)
+    if backend != BACKEND_AUTO:
+        raise ValueError(f"Unknown watcher backend: {backend}")
+
+    try:
+        return InotifyBackend(agents_dir)
+    except (OSError, AttributeError):
+        return PollingBackend(agents_dir)
+
+
+class AgentDirectoryWatcher:
+    """
+    Background watcher that calls on_change when agent files change
+
+    The callback runs on the watcher thread, never concurrently with itself.
+    """
+
+    def __init__(
+        self,
+        agents_dir: Path,
+        on_change: Callable[[], None],
+        poll_interval: float = 1.0,
+        backend: str = BACKEND_AUTO
+    ):
+        """
+        Initialize watcher
+
+        Args:
+            agents_dir: Directory containing *_agent.md files
+            on_change: Callback invoked after a (debounced) change
+            poll_interval: Seconds between polls (also the inotify wake-up interval)
+            backend: 'auto', 'inotify' or 'polling'
+        """
+        self.agents_dir = Path(agents_dir)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.backend_name = backend
+        self.backend = None
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'AgentDirectoryWatcher':
+        """Start the watcher thread (no-op if already running)"""
+        if self.running:
+            return self
+        self.backend = create_backend(self.agents_dir, self.backend_name)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"agent-watcher:{self.agents_dir.name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the watcher thread and release the backend"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout if timeout is not None else self.poll_interval + 1)
+            self._thread = None
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.backend.wait(self.poll_interval):
+                continue
+            # Let multi-step editor writes settle, then swallow their events
+            self._stop.wait(DEBOUNCE_SECONDS)
+            if self._stop.is_set():
+                break
+            self._drain()
+            try:
+                self.on_change()
+                self.reloads += 1
+            except Exception as e:
+                print(f"Warning: Agent reload failed: {e}")
+
+    def _drain(self) -> None:
+        """Consume events already queued by the backend"""
+        if self.backend.name == BACKEND_INOTIFY:
+            self.backend.wait(0)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Cancellation - Deadlines and cooperative cancellation tokens
+
+This module provides CancellationToken, which carries a deadline and a
+cancel reason down to the code doing the work of a workflow step, so that
+code can check it (or wait on it) and stop early, and current_token(),
+which returns the token of the running step.
+
+Design Principles:
+- One root token per workflow (its deadline is the workflow deadline) and
+  one child token per step (its deadline is the step timeout, never later
+  than the parent's); cancelling a token cancels its children
+- Reasons tell why work stopped: cancelled (user), timeout (step budget),
+  deadline (workflow deadline)
+- Cooperative: executors call raise_if_cancelled() / wait() or register
+  on_cancel() callbacks; the engine still discards results of executors
+  that ignore their token
+- current_token(): the token of the running step, without changing the
+  step_executor(step, context) signature (ContextVar, so coroutines run
+  by the step see it too)
+- Thread-safe; monotonic clock
+
+Usage:
+    from commands.lib.cancellation import current_token
+
+    def step_executor(step, context):
+        token = current_token()
+        for chunk in call_agent(step, context):
+            token.raise_if_cancelled()
+            ...
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+# Why a token was cancelled
+CANCELLED = "cancelled"     # cancel() by the user
+TIMEOUT = "timeout"         # Step budget exhausted
+DEADLINE = "deadline"       # Workflow deadline passed
+
+_MESSAGES = {CANCELLED: "Cancelled", TIMEOUT: "Timed out", DEADLINE: "Workflow deadline exceeded"}
+
+
+class OperationCancelled(Exception):
+    """Raised by raise_if_cancelled(); reason is CANCELLED, TIMEOUT or DEADLINE"""
+
+    def __init__(self, reason: str):
+        super().__init__(_MESSAGES.get(reason, reason))
+        self.reason = reason
+
+
+class CancellationToken:
+    """
+    Cancellation flag with an optional deadline, linked to a parent token
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        parent: Optional['CancellationToken'] = None,
+        expiry_reason: str = TIMEOUT
+    ):
+        """
+        Initialize cancellation token
+
+        Args:
+            timeout: Seconds from now until the token expires (None = no own deadline)
+            parent: Token whose cancellation and deadline also apply to this one
+            expiry_reason: Reason reported once the own deadline has passed
+        """
+        self.timeout = timeout
+        self.expiry_reason = expiry_reason
+        self._parent = parent
+        self._reason: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+        deadline = time.monotonic() + max(0.0, timeout) if timeout is not None else None
+        if parent is not None and parent.deadline is not None:
+            deadline = parent.deadline if deadline is None else min(deadline, parent.deadline)
+        self.deadline = deadline
+
+        if parent is not None:
+            parent.on_cancel(lambda: self.cancel(parent.reason or CANCELLED))
+
+    def child(self, timeout: Optional[float] = None) -> 'CancellationToken':
+        """Token cancelled with this one, expiring after timeout (TIMEOUT) at the latest"""
+        return CancellationToken(timeout, parent=self)
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Why the token is cancelled (None while it is not)"""
+        if self._reason is not None:
+            return self._reason
+        if self._parent is not None:
+            reason = self._parent.reason
+            if reason is not None:
+                return reason
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return self.expiry_reason
+        return None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (None = no deadline)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = CANCELLED) -> None:
+        """Cancel the token and its children, running on_cancel callbacks once"""
+        with self._lock:
+            if self._reason is not None:
+                return
+            self._reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        self._event.set()
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run callback when the token is cancelled (immediately if it already is)
+
+        Expiry alone does not run callbacks; whoever watches the deadline
+        calls cancel(). Returns a function that unregisters the callback.
+        """
+        with self._lock:
+            if self._reason is None:
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        """Raise OperationCancelled if the token is cancelled or expired"""
+        reason = self.reason
+        if reason is not None:
+            raise OperationCancelled(reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sleep until cancelled, expired or timeout elapsed
+
+        Returns:
+            True if the token is cancelled (use instead of time.sleep)
+        """
+        limit = self.remaining()
+        if timeout is not None:
+            limit = timeout if limit is None else min(limit, timeout)
+        self._event.wait(limit)
+        return self.cancelled
+
+    @contextmanager
+    def activate(self) -> Iterator['CancellationToken']:
+        """Make this token current_token() inside the block"""
+        reset = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(reset)
+
+    def _unregister(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+_current: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    'cancellation_token', default=None
+)
+
+
+def current_token() -> CancellationToken:
+    """Token of the running step (a token that never cancels outside a step)"""
+    token = _current.get()
+    return token if token is not None else CancellationToken()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+CJK Segmenter - Dictionary-based Chinese word segmentation
+
+This module provides CJKSegmenter, which splits Chinese text (no spaces
+between words) into dictionary words and character bigrams. AgentRegistry
+segments agent phrases with it once at index build time and matches them
+against the segment set of a task with a set intersection.
+
+Design Principles:
+- Dictionary = Chinese runs of all agent keywords and scenarios (or any
+  word list passed to the constructor)
+- Trie with forward maximum matching (FMM); text not covered by the
+  dictionary falls back to overlapping character bigrams
+- ASCII letters/digits are kept as whole tokens
+- Pure Python, picklable (stored inside the compiled agent catalog)
+
+Usage:
+    from commands.lib.cjk_segmenter import CJKSegmenter
+
+    segmenter = CJKSegmenter.from_phrases(["用户登录", "调试", "程序出现错误"])
+    segmenter.segment("实现用户登录功能")          # ['实现', '用户登录', '功能']
+    segmenter.phrase_segments("调试过程")          # {'调试', '过程'}
+    segmenter.features("需要调试") & {'调试', '过程'}
+
+    # CLI (dictionary = current agent definitions):
+    python3 -m commands.lib.cjk_segmenter "修复用户登录的错误"
+"""
+
+import re
+from typing import FrozenSet, Iterable, List, Optional, Set
+
+# 分段：连续的中文字符 (group 1) 或连续的英文字母/数字 (group 2)
+PATTERN_SEGMENT_RUN = re.compile(r'([\u4e00-\u9fff]+)|([a-zA-Z0-9]+)')
+
+# 中文片段：用于从短语中提取词典词条
+PATTERN_CJK_RUN = re.compile(r'[\u4e00-\u9fff]+')
+
+# Trie terminal marker (never a real character key)
+_END = ''
+
+
+class CJKSegmenter:
+    """
+    Trie-based forward maximum matching segmenter with bigram fallback
+
+    Dictionary words are stored lowercase; find_words() expects lowercase
+    text for ASCII words (Chinese is unaffected by case).
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        """
+        Initialize segmenter
+
+        Args:
+            words: Dictionary words (empty strings are ignored)
+        """
+        self._trie: dict = {}
+        self.max_word_length = 0
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    @classmethod
+    def from_phrases(cls, phrases: Iterable[str]) -> 'CJKSegmenter':
+        """Build a dictionary from the Chinese runs (2+ chars) of phrases"""
+        return cls(
+            run
+            for phrase in phrases
+            for run in PATTERN_CJK_RUN.findall(phrase)
+            if len(run) >= 2
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, word: str) -> bool:
+        node = self._trie
+        for char in word.lower():
+            node = node.get(char)
+            if node is None:
+                return False
+        return _END in node
+
+    def add(self, word: str) -> None:
+        """Add one dictionary word"""
+        word = word.lower()
+        if not word:
+            return
+        node = self._trie
+        for char in word:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            node[_END] = True
+            self._size += 1
+            self.max_word_length = max(self.max_word_length, len(word))
+
+    def find_words(self, text: str) -> Set[str]:
+        """All dictionary words occurring anywhere in text (substring semantics)"""
+        found = set()
+        trie = self._trie
+        for start in range(len(text)):
+            node = trie.get(text[start])
+            end = start + 1
+            while node is not None:
+                if _END in node:
+                    found.add(text[start:end])
+                if end == len(text):
+                    break
+                node = node.get(text[end])
+                end += 1
+        return found
+
+    def segment(
+        self,
+        text: str,
+        bigram_fallback: bool = True,
+        max_word_length: Optional[int] = None
+    ) -> List[str]:
+        """
+        Segment text into tokens (in order)
+
+        Args:
+            text: Text to segment (punctuation and whitespace are dropped)
+            bigram_fallback: Split Chinese spans not in the dictionary into
+                overlapping bigrams (False keeps each span whole)
+            max_word_length: Longest dictionary word to use (default: any)
+
+        Returns:
+            Dictionary words, fallback spans/bigrams and ASCII tokens
+        """
+        tokens: List[str] = []
+        for match in PATTERN_SEGMENT_RUN.finditer(text):
+            cjk, other = match.groups()
+            if other:
+                tokens.append(other)
+            else:
+                limit = self.max_word_length if max_word_length is None else max_word_length
+                tokens.extend(self._segment_run(cjk, bigram_fallback, limit))
+        return tokens
+
+    def phrase_segments(self, phrase: str) -> FrozenSet[str]:
+        """
+        Matching units of a keyword/scenario phrase
+
+        Each Chinese run is segmented without using itself as a dictionary
+        word, so a phrase that is in the dictionary still splits into its
+        shorter words (or bigrams).
+        """
+        segments: Set[str] = set()
+        for match in PATTERN_SEGMENT_RUN.finditer(phrase.lower()):
+            cjk, other = match.groups()
+            if other:
+                segments.add(other)
+            else:
+                segments.update(self._segment_run(cjk, True, len(cjk) - 1))
+        return frozenset(segments)
+
+    def features(self, text: str) -> Set[str]:
+        """
+        Every matching unit present in text
+
+        ASCII tokens, plus for each Chinese run: its characters, its bigrams
+        and all dictionary words it contains. A phrase segment is present in
+        the text iff it is in this set.
+        """
+        features: Set[str] = set()
+        for match in PATTERN_SEGMENT_RUN.finditer(text.lower()):
+            cjk, other = match.groups()
+            if other:
+                features.add(other)
+                continue
+            features.update(cjk)
+            features.update(cjk[i:i + 2] for i in range(len(cjk) - 1))
+            if len(cjk) > 2:
+                features.update(self.find_words(cjk))
+        return features
+
+    def _longest_match(self, run: str, start: int, max_length: int) -> int:
+        """Length of the longest dictionary word at run[start:] (0 if none)"""
+        node = self._trie
+        longest = 0
+        end = min(len(run), start + max_length)
+        for pos in range(start, end):
+            node = node.get(run[pos])
+            if node is None:
+                break
+            if _END in node:
+                longest = pos - start + 1
+        return longest
+
+    def _segment_run(self, run: str, bigram_fallback: bool, max_length: int) -> List[str]:
+        """Forward maximum matching over one Chinese run"""
+        tokens: List[str] = []
+        unknown_start = pos = 0
+        while pos < len(run):
+            length = self._longest_match(run, pos, max_length) if max_length > 0 else 0
+            if length:
+                if unknown_start < pos:
+                    tokens.extend(self._fallback(run[unknown_start:pos], bigram_fallback))
+                tokens.append(run[pos:pos + length])
+                pos += length
+                unknown_start = pos
+            else:
+                pos += 1
+        if unknown_start < len(run):
+            tokens.extend(self._fallback(run[unknown_start:], bigram_fallback))
+        return tokens
+
+    @staticmethod
+    def _fallback(span: str, bigram_fallback: bool) -> List[str]:
+        """Split a span not covered by the dictionary"""
+        if not bigram_fallback or len(span) <= 2:
+            return [span]
+        return [span[i:i + 2] for i in range(len(span) - 1)]
+
+
+def main():
+    """CLI: segment text with the dictionary built from agent definitions"""
+    import argparse
+    from commands.lib.agent_registry import AgentRegistry
+
+    parser = argparse.ArgumentParser(description="Segment Chinese text with the agent dictionary")
+    parser.add_argument('text', help="Text to segment")
+    parser.add_argument('--no-bigrams', action='store_true',
+                        help="Keep unknown spans whole instead of splitting into bigrams")
+    args = parser.parse_args()
+
+    segmenter = AgentRegistry().segmenter
+    print(f"Dictionary: {len(segmenter)} words")
+    print(' / '.join(segmenter.segment(args.text, bigram_fallback=not args.no_bigrams)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Context Store - Bounded, reference-based context passing between steps
+
+This module provides ContextStore, which holds each step output of a
+workflow once, and StepContext, the read-only view a dependent step gets:
+its declared dependencies mapped to lightweight references, materialized
+only when read and optionally clipped to a per-dependency ContextBudget.
+
+Design Principles:
+- One stored output per step; dependents hold ContextRef (index, name,
+  size, digest), never copies
+- A step sees its declared dependencies only (the predecessor steps its
+  dependencies resolve to; in sequential mode, the previous step)
+- Per-dependency budget in tokens (4 characters ≈ 1 token, as in
+  doc_loader) and/or UTF-8 bytes; oversized outputs keep head and tail
+  with an omission marker between them
+- Unlimited unless the caller sets a budget (CoordinationEngine default);
+  StepContext.clipped lists the dependencies a step read in clipped form
+- Clipped views are computed once per (step, budget) and shared by all
+  dependents
+- fingerprint() identifies the inputs a step sees without materializing
+  them (used by the step cache)
+
+Usage:
+    from commands.lib.context_store import ContextBudget, ContextStore, StepContext
+
+    store = ContextStore()
+    ref = store.put(0, "architect-agent", design_document)
+    context = StepContext(store, [ref], ContextBudget(max_tokens=500))
+    context["architect-agent"]     # head … tail of the design, ≤ 2000 chars
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# doc_loader.estimate_tokens convention
+CHARS_PER_TOKEN = 4
+
+# Default per-dependency budget of CoordinationEngine
+DEFAULT_CONTEXT_TOKENS = 2000
+
+# Share of the budget kept from the start of an output (the rest from its end)
+DEFAULT_HEAD_RATIO = 0.5
+
+
+@dataclass(frozen=True)
+class ContextRef:
+    """Reference to one stored step output"""
+    step_index: int
+    agent_name: str
+    chars: int
+    digest: str  # sha256 of the full output
+
+
+@dataclass(frozen=True)
+class ContextBudget:
+    """
+    Per-dependency size limit (None = unlimited)
+
+    The omission marker is not counted against the budget.
+    """
+    max_tokens: Optional[int] = DEFAULT_CONTEXT_TOKENS
+    max_bytes: Optional[int] = None
+    head_ratio: float = DEFAULT_HEAD_RATIO
+
+    @classmethod
+    def unlimited(cls) -> "ContextBudget":
+        return cls(max_tokens=None, max_bytes=None)
+
+    def apply(self, text: str) -> str:
+        """Clip text to the budget, keeping head and tail"""
+        if self.max_tokens is not None:
+            text = self._clip_chars(text, self.max_tokens * CHARS_PER_TOKEN)
+        if self.max_bytes is not None:
+            text = self._clip_bytes(text, self.max_bytes)
+        return text
+
+    def _split(self, limit: int) -> Tuple[int, int]:
+        head = int(limit * min(1.0, max(0.0, self.head_ratio)))
+        return head, limit - head
+
+    def _clip_chars(self, text: str, limit: int) -> str:
+        if len(text) <= limit:
+            return text
+        head, tail = self._split(limit)
+        omitted = len(text) - head - tail
+        return text[:head] + omission_marker(omitted, "chars") + (text[-tail:] if tail else "")
+
+    def _clip_bytes(self, text: str, limit: int) -> str:
+        encoded = text.encode('utf-8')
+        if len(encoded) <= limit:
+            return text
+        head, tail = self._split(limit)
+        # Cut on byte offsets; partial UTF-8 sequences at the cuts are dropped
+        head_text = encoded[:head].decode('utf-8', 'ignore')
+        tail_text = encoded[len(encoded) - tail:].decode('utf-8', 'ignore') if tail else ""
+        omitted = len(encoded) - len(head_text.encode('utf-8')) - len(tail_text.encode('utf-8'))
+        return head_text + omission_marker(omitted, "bytes") + tail_text
+
+
+def omission_marker(amount: int, unit: str) -> str:
+    return f"\n…[{amount} {unit} omitted]…\n"
+
+
+class ContextStore:
+    """
+    Step outputs of one workflow execution, stored once
+    """
+
+    def __init__(self):
+        self._outputs: Dict[int, str] = {}
+        self._refs: Dict[int, ContextRef] = {}
+        self._views: Dict[Tuple[int, ContextBudget], str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def put(self, step_index: int, agent_name: str, output: str) -> ContextRef:
+        """Store a step output and return its reference"""
+        ref = ContextRef(
+            step_index=step_index,
+            agent_name=agent_name,
+            chars=len(output),
+            digest=hashlib.sha256(output.encode('utf-8')).hexdigest()
+        )
+        with self._lock:
+            self._outputs[step_index] = output
+            self._refs[step_index] = ref
+            self._views = {k: v for k, v in self._views.items() if k[0] != step_index}
+        return ref
+
+    def ref(self, step_index: int) -> Optional[ContextRef]:
+        return self._refs.get(step_index)
+
+    def get(self, ref: ContextRef) -> str:
+        """Full output"""
+        return self._outputs[ref.step_index]
+
+    def view(self, ref: ContextRef, budget: ContextBudget) -> str:
+        """Output clipped to budget (computed once per budget)"""
+        key = (ref.step_index, budget)
+        with self._lock:
+            cached = self._views.get(key)
+        if cached is None:
+            cached = budget.apply(self._outputs[ref.step_index])
+            with self._lock:
+                self._views[key] = cached
+        return cached
+
+
+class StepContext(Mapping[str, str]):
+    """
+    Read-only context of one step: dependency agent name -> clipped output
+
+    Outputs are materialized lazily, on first access.
+    """
+
+    def __init__(self, store: ContextStore, refs: Sequence[ContextRef], budget: ContextBudget):
+        """
+        Initialize step context
+
+        Args:
+            store: Store holding the outputs
+            refs: Dependency references in step order (a later step of the
+                same agent replaces an earlier one)
+            budget: Per-dependency size limit
+        """
+        self.store = store
+        self.budget = budget
+        self.refs: Dict[str, ContextRef] = {ref.agent_name: ref for ref in refs}
+        self._materialized: Dict[str, str] = {}
+        self._clipped: List[str] = []
+
+    def __getitem__(self, agent_name: str) -> str:
+        value = self._materialized.get(agent_name)
+        if value is None:
+            ref = self.refs[agent_name]
+            value = self.store.view(ref, self.budget)
+            self._materialized[agent_name] = value
+            if value != self.store.get(ref):
+                self._clipped.append(agent_name)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.refs)
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def __repr__(self) -> str:
+        return f"StepContext({list(self.refs)})"
+
+    @property
+    def materialized(self) -> List[str]:
+        """Dependencies read so far"""
+        return list(self._materialized)
+
+    @property
+    def clipped(self) -> List[str]:
+        """Dependencies read so far whose output the budget clipped"""
+        return list(self._clipped)
+
+    def fingerprint(self) -> str:
+        """Hash of what this context shows (dependency digests and budget), without materializing"""
+        payload = repr((
+            sorted((name, ref.digest) for name, ref in self.refs.items()),
+            self.budget,
+        ))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
@@ -7,8 +7,32 @@ coordinating the execution of multiple agents working together on complex tasks.
 
 Design Principles:
 - Support three coordination modes: sequential, parallel, hierarchical
-- Progress tracking and cancellation support
-- Conflict detection and resolution
+- One ready-queue scheduler for every mode: a step starts as soon as its
+  dependencies complete, critical-path steps first, at most max_workers at
+  a time (async step executors run on an event loop inside their worker)
+- Workflow deadline and per-step budgets: each step gets a cancellation
+  token that expires at its step timeout or the workflow deadline,
+  whichever comes first; executors stop cooperatively via current_token().
+  Its share of the remaining deadline along its critical path is reported
+  as a soft target (StepTiming.target), never enforced
+- Step timing split into queued / running / timed-out; results and merged
+  context follow workflow step order regardless of completion order
+- Pipelined handoff: a step declaring streaming input starts once all its
+  dependencies are running and reads their output chunks as they are
+  produced (bounded per-reader lag = backpressure, see step_stream)
+- Outputs are stored once (ContextStore); a step receives a lazy view of
+  its declared dependencies only, unclipped unless a context_budget is set
+  (clipped dependencies are listed in metadata['clipped_context'])
+- Optional checkpoints after every completed step; resume(workflow_id)
+  continues a failed or cancelled workflow without rerunning finished steps
+- Optional content-addressed step cache: a step whose agent, role,
+  dependency outputs and task match an earlier run reuses its output
+- Progress tracking (monotonic) and cancellation support
+- Typed events (step started / output chunk / completed, conflicts) on a
+  non-blocking EventBus: `async for event in engine.events()` and JSONL
+  sinks never slow down the workflow
+- Conflict detection from per-output signatures (decision keywords +
+  MinHash), with LSH candidate pairs instead of comparing every pair
 - Graceful error handling and recovery
 - Result aggregation and validation
 
@@ -25,13 +49,55 @@ Usage:
     print(f"Output: {result.output}")
 """
 
+import asyncio
+import heapq
+import threading
 import time
-from typing import List, Dict, Optional, Any, Callable
-from dataclasses import dataclass, field
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Any, Callable, Iterator, Mapping, Tuple
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 
-from commands.lib.agent_router import AgentWorkflow, WorkflowStep
+from commands.lib.agent_router import AgentWorkflow, CoordinationMode, WorkflowStep
 from commands.lib.agent_registry import Agent
+from commands.lib.cancellation import (
+    CANCELLED,
+    DEADLINE,
+    CancellationToken,
+    OperationCancelled,
+)
+from commands.lib.workflow_dag import find_cycles, resolve_dependencies, topological_levels
+from commands.lib.workflow_estimator import WorkflowEstimator
+from commands.lib.context_store import ContextBudget, ContextStore, StepContext
+from commands.lib.output_conflicts import ConflictDetector
+from commands.lib.step_cache import StepCache
+from commands.lib.step_stream import DEFAULT_STREAM_BUFFER, PipelinedContext, StepStream
+from commands.lib.workflow_checkpoint import (
+    CheckpointStore,
+    StepCheckpoint,
+    WorkflowCheckpoint,
+    build_workflow,
+    workflow_definition,
+    workflow_hash,
+)
+from commands.lib.workflow_events import EventBus, EventSubscription, EventType
+
+# Concurrent worker steps per workflow execution
+DEFAULT_MAX_WORKERS = 4
+
+# Seconds between cancellation / timeout checks while a group is running
+POLL_INTERVAL = 0.05
+
+# Seconds interrupted steps get to stop cooperatively before their threads are abandoned
+CANCEL_GRACE = 0.2
+
+# step_executor(step, context) -> output: a str, an awaitable of str, or an
+# (async) iterable of str chunks streamed as step_output_chunk events.
+# context maps the step's dependency agents to their outputs (clipped to context_budget);
+# cancellation.current_token() is the step's token (budget and cancel reason).
+# Steps started early (streaming input) get a PipelinedContext with stream(name)
+StepExecutor = Callable[[WorkflowStep, Mapping[str, str]], Any]
 
 
 class ExecutionStatus(Enum):
@@ -44,6 +110,19 @@ class ExecutionStatus(Enum):
     PAUSED = "paused"         # Paused for user input
 
 
+@dataclass
+class StepTiming:
+    """Where a step's wall time went (seconds)"""
+    queued: float = 0.0               # Ready (dependencies done) until started
+    running: float = 0.0              # Running, for steps that finished in time
+    timed_out: float = 0.0            # Running, for steps stopped by their budget / the deadline
+    budget: Optional[float] = None    # Hard limit: step timeout or time left to the deadline (None = unlimited)
+    target: Optional[float] = None    # Soft target: critical-path share of the time left to the deadline
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 @dataclass
 class StepResult:
     """Result of a single workflow step execution"""
@@ -53,6 +132,7 @@ class StepResult:
     error: Optional[str] = None
     duration: float = 0.0
     metadata: Dict[str, Any] = field(default_factory=dict)
+    timing: StepTiming = field(default_factory=StepTiming)
 
     def __str__(self) -> str:
         status_emoji = {
@@ -105,56 +185,201 @@ class CoordinationEngine:
     Multi-agent coordination and workflow execution engine
 
     Features:
+    - Dependency-driven scheduling: any DAG of steps, maximal overlap
     - Sequential execution: Agents execute in order
-    - Parallel execution: Agents execute concurrently (simulated)
+    - Parallel execution: Agents execute concurrently (bounded thread pool)
     - Hierarchical execution: PM coordinates workers
-    - Progress tracking with callbacks
-    - Conflict detection and resolution
+    - Progress tracking with callbacks and a non-blocking event stream
+    - Checkpoint / resume of failed or cancelled workflows
+    - Near-linear conflict detection (MinHash / LSH over output signatures)
+    - Workflow deadline, per-step budgets, cooperative cancellation
+    - Streaming handoff: dependents that accept streams start early
     - Error handling and recovery
     """
 
-    def __init__(self, progress_callback: Optional[Callable[[str, float], None]] = None):
+    def __init__(
+        self,
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        step_timeout: Optional[float] = None,
+        step_timeouts: Optional[Mapping[str, float]] = None,
+        workflow_timeout: Optional[float] = None,
+        step_executor: Optional[StepExecutor] = None,
+        estimator: Optional[WorkflowEstimator] = None,
+        event_bus: Optional[EventBus] = None,
+        event_sinks: Optional[List[Any]] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        step_cache: Optional[StepCache] = None,
+        context_budget: Optional[ContextBudget] = None,
+        streaming_agents: Optional[List[str]] = None,
+        stream_buffer: int = DEFAULT_STREAM_BUFFER
+    ):
         """
         Initialize coordination engine
 
         Args:
             progress_callback: Optional callback(message, progress) for progress updates
+            max_workers: Maximum steps running at the same time
+            step_timeout: Seconds a step may run before it is failed (None = no limit)
+            step_timeouts: Per-agent step timeouts, overriding step_timeout
+            workflow_timeout: Deadline in seconds for a whole execution
+                (None = no deadline; execute(timeout=...) overrides it)
+            step_executor: Runs one step: (step, context) -> output; may be a
+                coroutine function (default: simulated agent execution)
+            estimator: Step durations for critical-path priorities (default durations if None)
+            event_bus: Bus for workflow events (default: a new EventBus)
+            event_sinks: Sinks with attach(bus), e.g. JsonlEventSink
+            checkpoint_store: Saves completed steps for resume() (None = no checkpoints)
+            step_cache: Reuses outputs of steps with identical inputs (None = no caching)
+            context_budget: Size limit per dependency output a step receives,
+                e.g. ContextBudget() for 2000 tokens with head/tail retention
+                (default: unlimited)
+            streaming_agents: Agents that consume dependency output while it is
+                produced (in addition to decision_criteria.streaming_input)
+            stream_buffer: Chunks a streaming consumer may lag behind its producer
         """
         self.progress_callback = progress_callback
-        self._cancel_requested = False
+        self.max_workers = max(1, max_workers)
+        self.step_timeout = step_timeout
+        self.step_timeouts = dict(step_timeouts or {})
+        self.workflow_timeout = workflow_timeout
+        self.step_executor = step_executor or self._simulate_agent_execution
+        self.estimator = estimator or WorkflowEstimator()
+        self.event_bus = event_bus or EventBus()
+        self.checkpoint_store = checkpoint_store
+        self.step_cache = step_cache
+        self.context_budget = context_budget or ContextBudget.unlimited()
+        self.streaming_agents = frozenset(streaming_agents or [])
+        self.stream_buffer = stream_buffer
+        self._task = ""
+        self._conflict_detector = ConflictDetector()
+        for sink in event_sinks or []:
+            sink.attach(self.event_bus)
+        self._token = CancellationToken()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._abandoned = False
+        self._progress = 0.0
+
+    @property
+    def _cancel_requested(self) -> bool:
+        return self._token.reason == CANCELLED
+
+    def events(self, maxsize: Optional[int] = None) -> EventSubscription:
+        """
+        Subscribe to the events of the next (or running) execution
+
+        Subscribe before starting execute() to receive every event; the
+        subscription ends after workflow_completed. Use `async for` or get().
 
-    def execute(self, workflow: AgentWorkflow) -> ExecutionResult:
+        Args:
+            maxsize: Queue size before the drop/coalesce policy applies
+        """
+        return self.event_bus.subscribe(maxsize, until_completed=True)
+
+    def execute(
+        self,
+        workflow: AgentWorkflow,
+        workflow_id: Optional[str] = None,
+        task: str = "",
+        timeout: Optional[float] = None
+    ) -> ExecutionResult:
         """
         Execute a multi-agent workflow
 
         Args:
             workflow: AgentWorkflow to execute
+            workflow_id: Checkpoint id for resume() (generated if None; only
+                used with a checkpoint_store, replaces an older checkpoint)
+            task: Task description (part of the step cache key)
+            timeout: Workflow deadline in seconds (default: workflow_timeout)
 
         Returns:
             ExecutionResult with complete execution information
         """
-        start_time = time.time()
-        self._cancel_requested = False
+        checkpoint = None
+        if self.checkpoint_store is not None:
+            checkpoint = WorkflowCheckpoint(
+                workflow_id=workflow_id or uuid.uuid4().hex[:12],
+                workflow_hash=workflow_hash(workflow),
+                definition={**workflow_definition(workflow), "task": task}
+            )
+        return self._run(workflow, checkpoint, task, timeout)
+
+    def resume(
+        self,
+        workflow_id: str,
+        workflow: Optional[AgentWorkflow] = None,
+        timeout: Optional[float] = None
+    ) -> ExecutionResult:
+        """
+        Resume a checkpointed workflow: completed steps are not run again
 
+        Args:
+            workflow_id: Id the workflow was executed with
+            workflow: Workflow definition (default: rebuilt from the checkpoint)
+            timeout: Deadline in seconds for the remaining steps (default: workflow_timeout)
+
+        Returns:
+            ExecutionResult over all steps (restored ones have metadata['resumed'])
+
+        Raises:
+            ValueError: Without checkpoint_store or checkpoint, or if the
+                workflow definition changed since the checkpoint
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("resume() requires a checkpoint_store")
+        checkpoint = self.checkpoint_store.load(workflow_id)
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint for workflow {workflow_id}")
+        if workflow is None:
+            workflow = build_workflow(checkpoint.definition)
+        if workflow_hash(workflow) != checkpoint.workflow_hash:
+            raise ValueError(
+                f"Workflow {workflow_id} changed since its checkpoint; execute it again instead"
+            )
+        return self._run(workflow, checkpoint, checkpoint.definition.get("task", ""), timeout)
+
+    def _run(
+        self,
+        workflow: AgentWorkflow,
+        checkpoint: Optional[WorkflowCheckpoint],
+        task: str = "",
+        timeout: Optional[float] = None
+    ) -> ExecutionResult:
+        """Execute workflow, skipping the steps completed in checkpoint"""
+        start_time = time.time()
+        if timeout is None:
+            timeout = self.workflow_timeout
+        self._task = task
+        self._conflict_detector = ConflictDetector()
+        self._token = CancellationToken(timeout, expiry_reason=DEADLINE)
+        self._progress = 0.0
+        self._abandoned = False
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="coordination"
+        )
+
+        self.event_bus.publish(
+            EventType.WORKFLOW_STARTED, mode=workflow.mode.value, steps=len(workflow.steps)
+        )
         self._report_progress(f"Starting {workflow.mode.value} workflow with {len(workflow.steps)} steps", 0.0)
+        result: Optional[ExecutionResult] = None
 
         try:
-            # Execute based on coordination mode
-            if workflow.mode.value == "single":
-                step_results = self._execute_single(workflow)
-            elif workflow.mode.value == "sequential":
-                step_results = self._execute_sequential(workflow)
-            elif workflow.mode.value == "parallel":
-                step_results = self._execute_parallel(workflow)
-            elif workflow.mode.value == "hierarchical":
-                step_results = self._execute_hierarchical(workflow)
-            else:
-                raise ValueError(f"Unknown coordination mode: {workflow.mode}")
+            # Every coordination mode is a dependency graph over the steps
+            step_results, skipped = self._execute_dag(workflow, checkpoint)
+
+            deadline_exceeded = self._token.reason == DEADLINE and (
+                bool(skipped) or any(r.metadata.get("deadline_exceeded") for r in step_results)
+            )
 
             # Check if cancelled
             if self._cancel_requested:
                 status = ExecutionStatus.CANCELLED
                 output = "Workflow execution cancelled by user"
+            elif deadline_exceeded:
+                status = ExecutionStatus.FAILED
+                output = f"Workflow deadline of {timeout:.2f}s exceeded"
             else:
                 # Determine overall status
                 failed = [r for r in step_results if r.status == ExecutionStatus.FAILED]
@@ -167,201 +392,623 @@ class CoordinationEngine:
 
             # Detect conflicts
             conflicts = self._detect_output_conflicts(step_results)
+            for conflict in conflicts:
+                self.event_bus.publish(EventType.CONFLICT_DETECTED, description=conflict)
 
             duration = time.time() - start_time
             self._report_progress(f"Workflow {status.value}", 1.0)
 
-            return ExecutionResult(
+            metadata: Dict[str, Any] = {
+                "skipped_steps": [workflow.steps[i].agent.name for i in skipped],
+                "deadline_exceeded": deadline_exceeded,
+                "timing": {
+                    key: sum(getattr(r.timing, key) for r in step_results)
+                    for key in ("queued", "running", "timed_out")
+                },
+            }
+            if checkpoint is not None:
+                checkpoint.status = status.value
+                self._save_checkpoint(checkpoint)
+                metadata["workflow_id"] = checkpoint.workflow_id
+                metadata["resumed_steps"] = sum(1 for r in step_results if r.metadata.get("resumed"))
+
+            result = ExecutionResult(
                 workflow=workflow,
                 status=status,
                 step_results=step_results,
                 output=output,
                 conflicts=conflicts,
-                total_duration=duration
+                total_duration=duration,
+                metadata=metadata
             )
+            return result
 
         except Exception as e:
             duration = time.time() - start_time
-            return ExecutionResult(
+            result = ExecutionResult(
                 workflow=workflow,
                 status=ExecutionStatus.FAILED,
                 step_results=[],
                 output=f"Workflow execution failed: {str(e)}",
                 total_duration=duration
             )
+            return result
+
+        finally:
+            # Timed-out / cancelled steps may still occupy threads; don't wait for them
+            self._pool.shutdown(wait=not self._abandoned, cancel_futures=True)
+            self._pool = None
+            self.event_bus.publish(
+                EventType.WORKFLOW_COMPLETED,
+                status=result.status.value if result else ExecutionStatus.FAILED.value,
+                duration=result.total_duration if result else time.time() - start_time
+            )
 
     def cancel(self):
-        """Request cancellation of current execution"""
-        self._cancel_requested = True
-
-    def _execute_single(self, workflow: AgentWorkflow) -> List[StepResult]:
-        """Execute single-agent workflow"""
-        step = workflow.steps[0]
-        self._report_progress(f"Executing {step.agent.name}", 0.5)
-
-        result = self._execute_step(step, {})
+        """Request cancellation of current execution (safe from any thread)"""
+        self._token.cancel(CANCELLED)
 
-        self._report_progress(f"Completed {step.agent.name}", 1.0)
-        return [result]
-
-    def _execute_sequential(self, workflow: AgentWorkflow) -> List[StepResult]:
+    def _execute_dag(
+        self, workflow: AgentWorkflow, checkpoint: Optional[WorkflowCheckpoint] = None
+    ) -> Tuple[List[StepResult], List[int]]:
         """
-        Execute sequential workflow (A → B → C)
+        Ready-queue scheduler over the step dependency graph
 
-        Each agent receives outputs from previous agents
-        """
-        results = []
-        context = {}  # Shared context between steps
+        A step is launched as soon as all its dependencies have completed;
+        among ready steps, the one with the longest remaining critical path
+        goes first, and at most max_workers steps run at a time. Dependents
+        of failed, timed-out or cancelled steps are not launched.
 
-        for i, step in enumerate(workflow.steps):
-            if self._cancel_requested:
-                break
+        Every launched step runs under a child of the workflow token with
+        its budget (_step_budget); a step whose token expires is failed
+        as timed out and its token cancelled, so cooperative executors stop.
+        Its critical-path target is only recorded in its timing.
 
-            progress = (i + 1) / len(workflow.steps)
-            self._report_progress(f"Step {i+1}/{len(workflow.steps)}: {step.agent.name}", progress)
+        A step accepting streams is launched as soon as all its
+        dependencies are running and reads them through a PipelinedContext;
+        its result only counts if they all complete.
 
-            # Execute step with accumulated context
-            result = self._execute_step(step, context)
-            results.append(result)
+        The four coordination modes are special cases: single is one step,
+        sequential chains every step to the previous one, parallel and
+        hierarchical fan out from the coordinator and merge on their
+        declared dependencies.
 
-            # Update context for next step
-            if result.status == ExecutionStatus.COMPLETED:
-                context[step.agent.name] = result.output
-            else:
-                # Stop on failure
-                break
-
-        return results
+        Steps completed in checkpoint are restored instead of run; every
+        newly completed step is saved to it.
 
-    def _execute_parallel(self, workflow: AgentWorkflow) -> List[StepResult]:
-        """
-        Execute parallel workflow (A ‖ B ‖ C → Merge)
+        Returns:
+            (results of launched steps in step order, indices of steps never launched)
 
-        Simulates parallel execution (actual parallel execution would require threading)
+        Raises:
+            ValueError: If the dependencies contain a cycle
         """
-        results = []
-
-        # Step 1: Coordinator setup
-        if workflow.steps[0].role == "coordinator":
-            coordinator_step = workflow.steps[0]
-            self._report_progress(f"Coordinator: {coordinator_step.agent.name}", 0.1)
-
-            coordinator_result = self._execute_step(coordinator_step, {})
-            results.append(coordinator_result)
-
-            context = {coordinator_step.agent.name: coordinator_result.output}
-        else:
-            context = {}
-
-        # Step 2: Parallel workers (simulated as sequential for now)
-        worker_steps = [s for s in workflow.steps if s.role == "worker"]
-
-        for i, step in enumerate(worker_steps):
-            if self._cancel_requested:
-                break
-
-            progress = 0.1 + (0.7 * (i + 1) / len(worker_steps))
-            self._report_progress(f"Worker {i+1}/{len(worker_steps)}: {step.agent.name}", progress)
-
-            result = self._execute_step(step, context)
-            results.append(result)
-
-            # Update context
-            context[step.agent.name] = result.output
-
-        # Step 3: Merge step (if exists)
-        merge_steps = [s for s in workflow.steps if s.role == "primary" and s not in worker_steps]
-        if merge_steps:
-            merge_step = merge_steps[0]
-            self._report_progress(f"Merging results: {merge_step.agent.name}", 0.9)
-
-            merge_result = self._execute_step(merge_step, context)
-            results.append(merge_result)
+        steps = workflow.steps
+        predecessors = self._step_dependencies(workflow)
+        cycles = find_cycles(predecessors)
+        if cycles:
+            names = [[steps[i].agent.name for i in cycle] for cycle in cycles]
+            raise ValueError(f"Workflow dependencies contain cycles: {names}")
+
+        successors: List[List[int]] = [[] for _ in steps]
+        for index, preds in enumerate(predecessors):
+            for pred in preds:
+                successors[pred].append(index)
+        priority = self._critical_path_priority(steps, predecessors, successors)
+
+        results: Dict[int, StepResult] = self._restore_checkpoint(steps, checkpoint)
+        store = ContextStore()
+        for index in sorted(results):
+            store.put(index, steps[index].agent.name, results[index].output)
+        remaining = [len(preds) for preds in predecessors]
+        for index in results:
+            for succ in successors[index]:
+                remaining[succ] -= 1
+        ready = [(-priority[i], i) for i in range(len(steps)) if remaining[i] == 0 and i not in results]
+        heapq.heapify(ready)
+
+        root = self._token
+        running: Dict[Future, int] = {}
+        tokens: Dict[int, CancellationToken] = {}
+        targets: Dict[int, Optional[float]] = {}
+        ready_at: Dict[int, float] = {index: time.monotonic() for _, index in ready}
+        started: Dict[int, float] = {}
+        interrupted: List[Future] = []
+
+        # Pipelining: producers with a streaming dependent publish their chunks
+        # to a StepStream; results of steps started early are held until all
+        # their dependencies have results
+        accepts_streams = [self._accepts_streams(step.agent) for step in steps]
+        streams: Dict[int, StepStream] = {}
+        queued = set(results) | {index for _, index in ready}
+        launched = set(results)
+        held: Dict[int, StepResult] = {}
+
+        def accept(index: int, result: StepResult):
+            result.timing = self._step_timing(
+                result, ready_at[index], started.get(index), targets.get(index)
+            )
+            results[index] = result
+            completed = result.status == ExecutionStatus.COMPLETED
+            if index in streams:
+                streams[index].close(None if completed else result.error or result.status.value)
+            self._publish_step_completed(index, result)
+            self._report_progress(
+                f"Step {len(results)}/{len(steps)}: {steps[index].agent.name} ({result.status.value})",
+                len(results) / len(steps)
+            )
+            if not completed:
+                # Dependents started early cannot complete any more
+                for succ in successors[index]:
+                    if succ in tokens and succ not in results:
+                        tokens[succ].cancel(CANCELLED)
+                return
+            store.put(index, steps[index].agent.name, result.output)
+            if checkpoint is not None:
+                checkpoint.completed[str(index)] = StepCheckpoint(
+                    agent_name=steps[index].agent.name,
+                    output=result.output,
+                    duration=result.duration,
+                    metadata=result.metadata
+                )
+                checkpoint.context[steps[index].agent.name] = result.output
+                self._save_checkpoint(checkpoint)
+            for succ in successors[index]:
+                remaining[succ] -= 1
+                if remaining[succ] == 0 and succ not in queued:
+                    queued.add(succ)
+                    ready_at[succ] = time.monotonic()
+                    heapq.heappush(ready, (-priority[succ], succ))
+
+        def settle():
+            # Deterministic: accept in step order once every dependency has a result
+            while True:
+                decidable = [
+                    index for index in sorted(held)
+                    if all(pred in results for pred in predecessors[index])
+                ]
+                if not decidable:
+                    return
+                index = decidable[0]
+                result = held.pop(index)
+                failed = next(
+                    (results[pred] for pred in sorted(predecessors[index])
+                     if results[pred].status != ExecutionStatus.COMPLETED),
+                    None
+                )
+                if failed is not None:
+                    result = self._upstream_result(steps[index], failed, result.duration)
+                accept(index, result)
+
+        while (ready or running) and not root.cancelled:
+            while ready and len(running) < self.max_workers:
+                _, index = heapq.heappop(ready)
+                preds = sorted(predecessors[index])
+                if any(pred in results and results[pred].status != ExecutionStatus.COMPLETED
+                       for pred in preds):
+                    continue  # Queued early, but a dependency failed meanwhile
+                context = StepContext(
+                    store, [store.ref(pred) for pred in preds if pred in results], self.context_budget
+                )
+                if any(pred not in results for pred in preds):
+                    context = PipelinedContext(
+                        context,
+                        {steps[pred].agent.name: streams[pred] for pred in preds if pred not in results},
+                        self.context_budget
+                    )
+                if any(accepts_streams[succ] for succ in successors[index]):
+                    streams[index] = StepStream(steps[index].agent.name, self.stream_buffer)
+                budget, targets[index] = self._step_budget(steps[index], priority[index])
+                tokens[index] = root.child(budget)
+                future = self._pool.submit(
+                    self._run_step, steps[index], context, started, index, tokens[index],
+                    streams.get(index)
+                )
+                running[future] = index
+                launched.add(index)
+
+                # Streaming dependents can start as soon as all their dependencies run
+                for succ in successors[index]:
+                    if accepts_streams[succ] and succ not in queued and \
+                            all(pred in launched for pred in predecessors[succ]):
+                        queued.add(succ)
+                        ready_at[succ] = time.monotonic()
+                        heapq.heappush(ready, (-priority[succ], succ))
+
+            done, _ = wait(running, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                held[index] = future.result()
+
+            for future, index in list(running.items()):
+                reason = tokens[index].reason
+                if reason is None or reason == CANCELLED:
+                    continue
+                # Stop cooperative executors; a late result of any other is discarded
+                tokens[index].cancel(reason)
+                del running[future]
+                interrupted.append(future)
+                elapsed = time.monotonic() - started.get(index, time.monotonic())
+                held[index] = self._interrupted_result(steps[index], tokens[index], elapsed)
+
+            settle()
+
+        # Cancelled or past the workflow deadline: stop the steps still running
+        for future, index in running.items():
+            tokens[index].cancel(root.reason or CANCELLED)
+            if not future.cancel():
+                interrupted.append(future)
+            elapsed = time.monotonic() - started[index] if index in started else 0.0
+            held[index] = self._interrupted_result(steps[index], tokens[index], elapsed)
+        settle()
+
+        # Threads cannot be interrupted: wait briefly for cooperative steps,
+        # abandon the others (their late results are discarded)
+        if interrupted:
+            _, pending = wait(interrupted, timeout=CANCEL_GRACE)
+            self._abandoned = bool(pending)
+
+        skipped = [i for i in range(len(steps)) if i not in results]
+        return [results[i] for i in sorted(results)], skipped
+
+    @staticmethod
+    def _restore_checkpoint(
+        steps: List[WorkflowStep], checkpoint: Optional[WorkflowCheckpoint]
+    ) -> Dict[int, StepResult]:
+        """COMPLETED results of the steps saved in checkpoint"""
+        if checkpoint is None:
+            return {}
+        restored = {}
+        for index in checkpoint.completed_indices():
+            saved = checkpoint.completed[str(index)]
+            restored[index] = StepResult(
+                step=steps[index],
+                status=ExecutionStatus.COMPLETED,
+                output=saved.output,
+                duration=saved.duration,
+                metadata={**saved.metadata, "resumed": True}
+            )
+        # Context in step order (a later step of the same agent wins)
+        checkpoint.context = {steps[i].agent.name: restored[i].output for i in sorted(restored)}
+        return restored
 
-        return results
+    def _save_checkpoint(self, checkpoint: WorkflowCheckpoint):
+        """Persist checkpoint (best effort: a failing disk does not fail the workflow)"""
+        try:
+            self.checkpoint_store.save(checkpoint)
+        except OSError as e:
+            print(f"Warning: Could not save checkpoint {checkpoint.workflow_id}: {e}")
 
-    def _execute_hierarchical(self, workflow: AgentWorkflow) -> List[StepResult]:
+    def _step_dependencies(self, workflow: AgentWorkflow) -> List[List[int]]:
         """
-        Execute hierarchical workflow (PM → {Worker1, Worker2, ...} → PM)
+        Predecessor step indices of every step
 
-        PM agent coordinates workers and validates outputs
+        Declared dependencies resolve like workflow_dag.resolve_dependencies
+        (dependencies on agents outside the workflow are ignored); in
+        sequential mode each step also waits for the previous one.
         """
-        results = []
-
-        # Step 1: PM coordination
-        coordinator_step = workflow.steps[0]
-        self._report_progress(f"PM Coordination: {coordinator_step.agent.name}", 0.1)
-
-        coordinator_result = self._execute_step(coordinator_step, {})
-        results.append(coordinator_result)
-
-        context = {coordinator_step.agent.name: coordinator_result.output}
-
-        # Step 2: Worker execution (parallel group 1)
-        worker_steps = [s for s in workflow.steps if s.role == "worker"]
-
-        for i, step in enumerate(worker_steps):
-            if self._cancel_requested:
-                break
-
-            progress = 0.1 + (0.6 * (i + 1) / len(worker_steps))
-            self._report_progress(f"Worker {i+1}/{len(worker_steps)}: {step.agent.name}", progress)
-
-            result = self._execute_step(step, context)
-            results.append(result)
-
-            context[step.agent.name] = result.output
-
-        # Step 3: PM consolidation
-        consolidation_steps = [s for s in workflow.steps if s.role == "primary"]
-        if consolidation_steps:
-            consolidation_step = consolidation_steps[0]
-            self._report_progress(f"PM Consolidation: {consolidation_step.agent.name}", 0.9)
-
-            consolidation_result = self._execute_step(consolidation_step, context)
-            results.append(consolidation_result)
+        predecessors, _ = resolve_dependencies(
+            [(step.agent.name, step.dependencies) for step in workflow.steps]
+        )
+        if workflow.mode == CoordinationMode.SEQUENTIAL:
+            for index in range(1, len(predecessors)):
+                if index - 1 not in predecessors[index]:
+                    predecessors[index].append(index - 1)
+        return predecessors
+
+    def _critical_path_priority(
+        self,
+        steps: List[WorkflowStep],
+        predecessors: List[List[int]],
+        successors: List[List[int]]
+    ) -> List[float]:
+        """Longest p50 path from each step to the end of the workflow (step included)"""
+        levels, _ = topological_levels(predecessors)
+        priority = [0.0] * len(steps)
+        for level in reversed(levels):
+            for index in level:
+                tail = max((priority[succ] for succ in successors[index]), default=0.0)
+                priority[index] = self.estimator.agent_estimate(steps[index].agent.name).p50 + tail
+        return priority
+
+    def _step_budget(
+        self, step: WorkflowStep, critical_path: float
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Seconds a step may run, and the seconds it should take
 
-        return results
+        The hard limit is the step timeout, or the time left to the
+        workflow deadline if that is shorter. The target is the step's p50
+        share of the time left along its critical path (critical_path = p50
+        of the step plus its longest tail), computed when it is launched:
+        time saved by earlier steps flows to later ones. Estimates are
+        rough, so a step over its target is reported, never stopped.
 
-    def _execute_step(self, step: WorkflowStep, context: Dict[str, str]) -> StepResult:
+        Returns:
+            (hard limit, soft target); None = unlimited / no deadline
+        """
+        budget = self.step_timeouts.get(step.agent.name, self.step_timeout)
+        left = self._token.remaining()
+        if left is None:
+            return budget, None
+        p50 = self.estimator.agent_estimate(step.agent.name).p50
+        target = left * min(1.0, p50 / critical_path) if critical_path > 0 else left
+        return (left if budget is None else min(budget, left)), target
+
+    def _accepts_streams(self, agent: Agent) -> bool:
+        """Agent consumes dependency output while it is produced (opt-in)"""
+        if agent.name in self.streaming_agents:
+            return True
+        criteria = agent.decision_criteria if isinstance(agent.decision_criteria, dict) else {}
+        return criteria.get('streaming_input') is True
+
+    @staticmethod
+    def _upstream_result(step: WorkflowStep, upstream: StepResult, duration: float) -> StepResult:
+        """Result of a step started early whose dependency did not complete"""
+        return StepResult(
+            step=step,
+            status=ExecutionStatus.CANCELLED
+            if upstream.status == ExecutionStatus.CANCELLED else ExecutionStatus.FAILED,
+            output="",
+            error=f"Upstream step {upstream.step.agent.name} {upstream.status.value}",
+            duration=duration,
+            metadata={"upstream_failed": True}
+        )
+
+    @staticmethod
+    def _step_timing(
+        result: StepResult, ready_at: float, started_at: Optional[float], target: Optional[float] = None
+    ) -> StepTiming:
+        """Split the wall time of a finished step into queued / running / timed out"""
+        queued = started_at - ready_at if started_at is not None else 0.0
+        timed_out = bool(result.metadata.get("timed_out"))
+        return StepTiming(
+            queued=max(0.0, queued),
+            running=0.0 if timed_out else result.duration,
+            timed_out=result.duration if timed_out else 0.0,
+            budget=result.metadata.get("budget"),
+            target=target
+        )
+
+    def _run_step(
+        self,
+        step: WorkflowStep,
+        context: Mapping[str, str],
+        started: Dict[int, float],
+        index: int,
+        token: CancellationToken,
+        stream: Optional[StepStream] = None
+    ) -> StepResult:
+        """Thread pool entry point: record the start time, execute, sign the output"""
+        started[index] = time.monotonic()
+        self.event_bus.publish(
+            EventType.STEP_STARTED, index, step.agent.name,
+            role=step.role, dependencies=list(step.dependencies), budget=token.timeout
+        )
+        try:
+            result = self._execute_step(step, context, index, token, stream)
+        finally:
+            if isinstance(context, PipelinedContext):
+                context.close()
+        if stream is not None:
+            # Streaming dependents see the end as soon as the step returns
+            completed = result.status == ExecutionStatus.COMPLETED
+            stream.close(None if completed else result.error or result.status.value)
+        if result.status == ExecutionStatus.COMPLETED:
+            # Conflict signature while other steps still run, not at merge time
+            self._conflict_detector.add(id(step), step.agent.name, result.output)
+        return result
+
+    def _publish_step_completed(self, index: int, result: StepResult):
+        self.event_bus.publish(
+            EventType.STEP_COMPLETED, index, result.step.agent.name,
+            status=result.status.value,
+            duration=result.duration,
+            error=result.error,
+            output_length=len(result.output),
+            timing=result.timing.to_dict()
+        )
+
+    def _collect_output(
+        self,
+        output: Any,
+        index: Optional[int],
+        agent_name: str,
+        token: CancellationToken,
+        stream: Optional[StepStream] = None
+    ) -> str:
+        """Join a chunked step output, publishing each chunk as it arrives"""
+        chunks = []
+        try:
+            for chunk in output:
+                token.raise_if_cancelled()
+                chunks.append(chunk)
+                self.event_bus.publish(EventType.STEP_OUTPUT_CHUNK, index, agent_name, chunk=chunk)
+                if stream is not None:
+                    stream.publish(chunk, token)  # Waits while a streaming dependent lags behind
+        finally:
+            if hasattr(output, 'close'):
+                output.close()  # Stop a generator at its current yield
+        return "".join(chunks)
+
+    async def _collect_async_output(
+        self,
+        output: Any,
+        index: Optional[int],
+        agent_name: str,
+        token: CancellationToken,
+        stream: Optional[StepStream] = None
+    ) -> str:
+        """Async counterpart of _collect_output"""
+        chunks = []
+        try:
+            async for chunk in output:
+                token.raise_if_cancelled()
+                chunks.append(chunk)
+                self.event_bus.publish(EventType.STEP_OUTPUT_CHUNK, index, agent_name, chunk=chunk)
+                if stream is not None:
+                    stream.publish(chunk, token)  # Waits while a streaming dependent lags behind
+        finally:
+            if hasattr(output, 'aclose'):
+                await output.aclose()
+        return "".join(chunks)
+
+    @staticmethod
+    async def _await_cancellable(awaitable: Any, token: CancellationToken) -> Any:
+        """Await within the token's budget; cancelling the token cancels the coroutine"""
+        task = asyncio.ensure_future(awaitable)
+        loop = asyncio.get_running_loop()
+
+        def cancel_task():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # Loop already closed: the step has finished
+
+        unregister = token.on_cancel(cancel_task)
+        try:
+            return await asyncio.wait_for(task, token.remaining())
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            raise OperationCancelled(token.reason or CANCELLED)
+        finally:
+            unregister()
+
+    @staticmethod
+    def _interrupted_result(step: WorkflowStep, token: CancellationToken, duration: float) -> StepResult:
+        """CANCELLED result (user cancel) or FAILED timed-out result (budget / deadline)"""
+        reason = token.reason or CANCELLED
+        if reason == CANCELLED:
+            return StepResult(
+                step=step,
+                status=ExecutionStatus.CANCELLED,
+                output="",
+                error="Cancelled",
+                duration=duration,
+                metadata={"budget": token.timeout}
+            )
+        if reason == DEADLINE:
+            error = "Workflow deadline exceeded"
+        else:
+            error = f"Step timed out after {token.timeout:.2f}s"
+        return StepResult(
+            step=step,
+            status=ExecutionStatus.FAILED,
+            output="",
+            error=error,
+            duration=duration,
+            metadata={
+                "timed_out": True,
+                "deadline_exceeded": reason == DEADLINE,
+                "budget": token.timeout,
+            }
+        )
+
+    def _execute_step(
+        self,
+        step: WorkflowStep,
+        context: Mapping[str, str],
+        index: Optional[int] = None,
+        token: Optional[CancellationToken] = None,
+        stream: Optional[StepStream] = None
+    ) -> StepResult:
         """
         Execute a single workflow step
 
         Args:
             step: WorkflowStep to execute
             context: Context from previous steps
+            index: Step index in the workflow (for events)
+            token: Step cancellation token (budget); current_token() while
+                the step executor runs (default: never cancelled)
+            stream: Stream receiving the output chunks (streaming dependents)
 
         Returns:
             StepResult with execution information
         """
+        token = token or CancellationToken()
         start_time = time.time()
+        metadata: Dict[str, Any] = {"context_size": len(context), "budget": token.timeout}
+        pipelined = isinstance(context, PipelinedContext)
+        if pipelined:
+            metadata["streamed_from"] = context.streaming
+
+        cache_key = None
+        if self.step_cache is not None:
+            if pipelined or not self.step_cache.cacheable(step.agent):
+                # Started before its inputs were known: no content key yet
+                metadata["cache"] = "bypass"
+            else:
+                cache_key = self.step_cache.key(step, context, self._task)
+                cached = self.step_cache.get(cache_key)
+                metadata["cache_key"] = cache_key[:16]
+                if cached is not None:
+                    output, tier = cached
+                    self.event_bus.publish(EventType.STEP_OUTPUT_CHUNK, index, step.agent.name, chunk=output)
+                    if stream is not None:
+                        stream.publish(output, token)
+                    return StepResult(
+                        step=step,
+                        status=ExecutionStatus.COMPLETED,
+                        output=output,
+                        duration=time.time() - start_time,
+                        metadata={**metadata, "cache": "hit", "cache_tier": tier}
+                    )
+                metadata["cache"] = "miss"
 
         try:
-            # Simulate agent execution
-            # In real implementation, this would call the actual agent
-            output = self._simulate_agent_execution(step, context)
+            with token.activate():
+                output = self.step_executor(step, context)
+                streamed = hasattr(output, '__aiter__') or isinstance(output, Iterator)
+                if hasattr(output, '__aiter__'):
+                    output = self._collect_async_output(output, index, step.agent.name, token, stream)
+                elif isinstance(output, Iterator):
+                    # Before the coroutine check: asyncio.iscoroutine() accepts generators
+                    output = self._collect_output(output, index, step.agent.name, token, stream)
+                if asyncio.iscoroutine(output):
+                    # Async-capable step: its own event loop in this worker thread,
+                    # where the budget and cancel() really cancel the coroutine
+                    output = asyncio.run(self._await_cancellable(output, token))
+                token.raise_if_cancelled()  # Finished too late: the scheduler already gave up
+            if not streamed:
+                self.event_bus.publish(EventType.STEP_OUTPUT_CHUNK, index, step.agent.name, chunk=output)
+                if stream is not None:
+                    stream.publish(output, token)
 
             duration = time.time() - start_time
+            if cache_key is not None and not self._cancel_requested:
+                self.step_cache.put(cache_key, output, step.agent.name)
+            self._flag_clipped(metadata, context)
 
             return StepResult(
                 step=step,
                 status=ExecutionStatus.COMPLETED,
                 output=output,
                 duration=duration,
-                metadata={"context_size": len(context)}
+                metadata=metadata
             )
 
+        except OperationCancelled:
+            return self._interrupted_result(step, token, time.time() - start_time)
+
         except Exception as e:
             duration = time.time() - start_time
+            self._flag_clipped(metadata, context)
 
             return StepResult(
                 step=step,
                 status=ExecutionStatus.FAILED,
                 output="",
                 error=str(e),
-                duration=duration
+                duration=duration,
+                metadata=metadata
             )
 
+    @staticmethod
+    def _flag_clipped(metadata: Dict[str, Any], context: Mapping[str, str]) -> None:
+        """Record the dependencies the step read in clipped form (context_budget)"""
+        clipped = getattr(context, 'clipped', None)
+        if clipped:
+            metadata["clipped_context"] = clipped
+
     def _simulate_agent_execution(self, step: WorkflowStep, context: Dict[str, str]) -> str:
         """
         Simulate agent execution (placeholder for actual implementation)
@@ -432,62 +1079,37 @@ Additional Context:
         """
         Detect conflicts in agent outputs
 
+        Signatures are normally computed by the worker that produced each
+        output; missing ones (e.g. restored steps) are computed here. Only
+        LSH candidate pairs are compared (see output_conflicts).
+
         Args:
             results: List of StepResult objects
 
         Returns:
             List of conflict descriptions
         """
-        conflicts = []
-
-        # Check for contradictory outputs (simple heuristic)
         completed = [r for r in results if r.status == ExecutionStatus.COMPLETED]
+        if len(completed) < 2:
+            return []
 
-        if len(completed) > 1:
-            # Check for common conflict patterns
-            outputs = [r.output for r in completed]
-
-            # Example conflict detection (can be enhanced)
-            for i, output1 in enumerate(outputs):
-                for output2 in outputs[i+1:]:
-                    if self._outputs_conflict(output1, output2):
-                        conflicts.append(
-                            f"Potential conflict between {completed[i].step.agent.name} "
-                            f"and {completed[i+1].step.agent.name}"
-                        )
+        detector = self._conflict_detector
+        for result in completed:
+            if id(result.step) not in detector:
+                detector.add(id(result.step), result.step.agent.name, result.output)
+        return [conflict.describe() for conflict in detector.detect([id(r.step) for r in completed])]
 
-        return conflicts
-
-    def _outputs_conflict(self, output1: str, output2: str) -> bool:
+    def _report_progress(self, message: str, progress: float):
         """
-        Check if two outputs conflict (simple heuristic)
+        Report progress to callback if available
 
-        In real implementation, this could use semantic similarity,
-        keyword matching, or LLM-based conflict detection
+        Progress never decreases within one execution (reported from the
+        calling thread only).
         """
-        # Simple heuristic: Check for contradictory keywords
-        contradictions = [
-            ("yes", "no"),
-            ("true", "false"),
-            ("approved", "rejected"),
-            ("pass", "fail"),
-        ]
-
-        output1_lower = output1.lower()
-        output2_lower = output2.lower()
-
-        for word1, word2 in contradictions:
-            if word1 in output1_lower and word2 in output2_lower:
-                return True
-            if word2 in output1_lower and word1 in output2_lower:
-                return True
-
-        return False
-
-    def _report_progress(self, message: str, progress: float):
-        """Report progress to callback if available"""
+        self._progress = min(1.0, max(self._progress, progress))
+        self.event_bus.publish(EventType.PROGRESS, message=message, progress=self._progress)
         if self.progress_callback:
-            self.progress_callback(message, progress)
+            self.progress_callback(message, self._progress)
 
 
 def main():
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Keyword Lexicon - Single-pass multi-pattern matching for keyword tables
+
+This module provides the classification keyword tables of TaskAnalyzer
+(intent, complexity, tech stack), MCPSelector (tool keywords, task
+triggers, complexity features) and AgentRouter (coordination hints),
+compiled into one Aho-Corasick automaton. A single scan over the
+lowercased task returns every hit tagged with its table and category.
+
+Design Principles:
+- Single source of truth for all classification keyword tables
+- Substring semantics identical to `keyword in text.lower()` (overlapping
+  and nested keywords are all reported)
+- Automaton is a full transition table (goto + failure links resolved at
+  build time), so scanning is one dict lookup per character
+- The scan result is memoized per request on TaskQuery.lexicon_hits
+
+Usage:
+    from commands.lib.keyword_lexicon import get_lexicon, TABLE_INTENT
+
+    hits = get_lexicon().scan("重构用户模块并添加单元测试")
+    hits.categories(TABLE_INTENT)          # {'refactoring': {...}, 'testing': {...}, ...}
+    hits.has(TABLE_COMPLEXITY, 'high')     # True ('重构')
+
+    # Shared per request:
+    TaskQuery.of(task).lexicon_hits
+"""
+
+import threading
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+# ==================== 关键词表 ====================
+# Table names (first element of every hit tag)
+TABLE_INTENT = 'intent'
+TABLE_COMPLEXITY = 'complexity'
+TABLE_TECH_STACK = 'tech_stack'
+TABLE_MCP_TOOL = 'mcp_tool'
+TABLE_MCP_TRIGGER = 'mcp_trigger'
+TABLE_MCP_FEATURE = 'mcp_feature'
+TABLE_COORDINATION = 'coordination'
+
+# TaskAnalyzer: intent detection (category = TaskIntent value)
+INTENT_KEYWORDS = {
+    'planning': [
+        '规划', '设计', 'plan', 'design', '架构',
+        '方案', '策略', 'roadmap'
+    ],
+    'implementation': [
+        '实现', '开发', '编写', '添加', '创建',
+        'implement', 'develop', 'create', 'add', 'build'
+    ],
+    'debugging': [
+        '调试', '修复', '解决', 'bug', 'debug',
+        'fix', 'error', '问题', '错误'
+    ],
+    'testing': [
+        '测试', '验证', 'test', 'verify', 'coverage',
+        '覆盖率', '单元测试', '集成测试'
+    ],
+    'reviewing': [
+        '审查', '检查', 'review', 'check', '质量',
+        'quality', '评审', 'inspect'
+    ],
+    'refactoring': [
+        '重构', '优化', '改进', 'refactor', 'optimize',
+        'improve', 'cleanup', '清理'
+    ],
+    'documentation': [
+        '文档', '说明', '注释', 'document', 'doc',
+        'readme', 'api文档', '使用指南'
+    ],
+    'research': [
+        '研究', '调研', '评估', '对比', 'research',
+        'evaluate', 'compare', '分析'
+    ],
+    'context': [
+        '加载', '上下文', '恢复', 'load', 'context',
+        'prime', '初始化'
+    ],
+}
+
+# TaskAnalyzer: complexity indicators
+COMPLEXITY_KEYWORDS = {
+    'high': ['架构', '系统', '重构', '迁移', '集成', 'architecture', 'system', 'migration'],
+    'medium': ['模块', '组件', '功能', 'module', 'component', 'feature'],
+    'low': ['修复', '添加', '更新', 'fix', 'add', 'update'],
+}
+
+# TaskAnalyzer: technical stack (category = display name, case-insensitive)
+TECH_STACK_KEYWORDS = {
+    name: [name.lower()]
+    for name in (
+        'Python', 'JavaScript', 'TypeScript', 'React', 'Vue',
+        'Flask', 'Django', 'FastAPI', 'Express', 'Node',
+        'PostgreSQL', 'MongoDB', 'Redis', 'Docker', 'Kubernetes',
+        'JWT', 'OAuth', 'REST', 'GraphQL', 'gRPC'
+    )
+}
+
+# MCPSelector: capability keywords per MCP tool (category = tool name)
+MCP_TOOL_KEYWORDS = {
+    'Serena': ['修改', '重构', '查找', '定位', '符号', '引用'],
+    'Sequential-thinking': ['复杂', '决策', '规划', '分解', '算法', '逻辑'],
+    'Magic': ['UI', '组件', '前端', '界面', '设计', '样式'],
+    'Context7': ['文档', 'API', '库', '框架', '官方', '参考'],
+    'Tavily': ['搜索', '研究', '最新', '方案', '对比', '开源'],
+}
+
+# MCPSelector: task-conditional tool triggers (legacy select_tools)
+MCP_TRIGGER_KEYWORDS = {
+    'ui': [
+        'ui', '界面', '组件', '按钮', '表单', '页面',
+        'component', 'button', 'form', 'page', 'layout'
+    ],
+    'framework': [
+        'react', 'vue', 'django', 'express', 'flask', 'fastapi',
+        'spring', 'angular', 'next.js', 'nuxt', 'rails'
+    ],
+    'research': [
+        '最新', '最佳实践', '对比', '趋势', '调研',
+        'latest', 'best practice', 'compare', 'trend', 'research'
+    ],
+}
+
+# MCPSelector: complexity features (case-insensitive)
+MCP_FEATURE_KEYWORDS = {
+    'multifile': ['多个文件', '多文件', '跨文件', '多模块', '几个文件'],
+    'architecture': ['架构', '设计', '重构', '模式', '系统'],
+    'integration': ['集成', 'API', '第三方', '外部', '接口'],
+    'algorithm': ['算法', '逻辑', '计算', '复杂', '性能'],
+    'concurrent': ['并发', '异步', '多线程', '并行', 'concurrent', 'async'],
+    'data_migration': ['迁移', '数据库', 'schema', 'migration'],
+    'ui_component': ['UI', '组件', '前端', '界面', '页面', 'component'],
+    'api_design': ['API', 'endpoint', '路由', '接口设计'],
+}
+
+# AgentRouter: coordination mode hints
+COORDINATION_KEYWORDS = {
+    'hierarchical': [
+        '系统', '架构', '完整', '端到端', 'system', 'architecture', 'complete', 'full'
+    ],
+    'parallel': [
+        '同时', '并行', '多个', 'parallel', 'multiple', 'concurrent'
+    ],
+}
+
+LEXICON_TABLES = {
+    TABLE_INTENT: INTENT_KEYWORDS,
+    TABLE_COMPLEXITY: COMPLEXITY_KEYWORDS,
+    TABLE_TECH_STACK: TECH_STACK_KEYWORDS,
+    TABLE_MCP_TOOL: MCP_TOOL_KEYWORDS,
+    TABLE_MCP_TRIGGER: MCP_TRIGGER_KEYWORDS,
+    TABLE_MCP_FEATURE: MCP_FEATURE_KEYWORDS,
+    TABLE_COORDINATION: COORDINATION_KEYWORDS,
+}
+
+# (table, category)
+LexiconTag = Tuple[str, str]
+
+
+class LexiconHits:
+    """
+    Result of one lexicon scan
+
+    Matched keywords are reported lowercase, grouped by table and category.
+    """
+
+    def __init__(self, matches: Dict[str, Dict[str, FrozenSet[str]]]):
+        self._matches = matches
+
+    def categories(self, table: str) -> Mapping[str, FrozenSet[str]]:
+        """Matched categories of a table -> matched (lowercase) keywords"""
+        return self._matches.get(table, {})
+
+    def matched(self, table: str, category: str) -> FrozenSet[str]:
+        """Matched keywords of one category (empty if none)"""
+        return self._matches.get(table, {}).get(category, frozenset())
+
+    def count(self, table: str, category: str) -> int:
+        """Number of distinct keywords of one category found in the text"""
+        return len(self.matched(table, category))
+
+    def has(self, table: str, category: Optional[str] = None) -> bool:
+        """True if the category (or any category of the table) was hit"""
+        if category is None:
+            return bool(self._matches.get(table))
+        return category in self._matches.get(table, {})
+
+    def __repr__(self) -> str:
+        return f"LexiconHits({self._matches!r})"
+
+
+class KeywordLexicon:
+    """
+    Aho-Corasick automaton over tagged keyword tables
+
+    Every keyword is lowercased; scan() lowercases the text, so matching is
+    case-insensitive and equivalent to `keyword.lower() in text.lower()`.
+    """
+
+    def __init__(self, tables: Mapping[str, Mapping[str, Sequence[str]]]):
+        """
+        Compile keyword tables
+
+        Args:
+            tables: {table: {category: [keyword, ...]}}
+        """
+        self.tables = tables
+        # keyword -> tags of every table entry using it
+        keyword_tags: Dict[str, List[LexiconTag]] = {}
+        for table, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    keyword = keyword.lower()
+                    if keyword:
+                        keyword_tags.setdefault(keyword, []).append((table, category))
+
+        self.keywords: List[str] = list(keyword_tags)
+        self.keyword_tags: List[Tuple[LexiconTag, ...]] = [
+            tuple(keyword_tags[keyword]) for keyword in self.keywords
+        ]
+        self._build(self.keywords)
+
+    def _build(self, keywords: Iterable[str]) -> None:
+        """Build goto trie, failure links and the resolved transition table"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+
+        for keyword_id, keyword in enumerate(keywords):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = next_state
+                state = next_state
+            outputs[state].append(keyword_id)
+
+        # BFS: a state's failure target is always shallower, so it is final
+        # by the time the state is processed
+        transitions: List[Dict[str, int]] = [dict() for _ in goto]
+        transitions[0] = dict(goto[0])
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state].extend(outputs[fail[state]])
+            merged = dict(transitions[fail[state]])
+            merged.update(goto[state])
+            transitions[state] = merged
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        self._transitions = transitions
+        self._outputs: List[Tuple[int, ...]] = [tuple(ids) for ids in outputs]
+
+    def find(self, text: str) -> Set[int]:
+        """Ids (indices into self.keywords) of every keyword occurring in text"""
+        transitions = self._transitions
+        outputs = self._outputs
+        found: Set[int] = set()
+        state = 0
+        for char in text.lower():
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def scan(self, text: str) -> LexiconHits:
+        """
+        Scan text once and group every hit by table and category
+
+        Args:
+            text: Task description (any case)
+
+        Returns:
+            LexiconHits
+        """
+        matches: Dict[str, Dict[str, Set[str]]] = {}
+        for keyword_id in self.find(text):
+            keyword = self.keywords[keyword_id]
+            for table, category in self.keyword_tags[keyword_id]:
+                matches.setdefault(table, {}).setdefault(category, set()).add(keyword)
+        return LexiconHits({
+            table: {category: frozenset(found) for category, found in categories.items()}
+            for table, categories in matches.items()
+        })
+
+
+_lexicon: Optional[KeywordLexicon] = None
+_lexicon_lock = threading.Lock()
+
+
+def get_lexicon() -> KeywordLexicon:
+    """Process-wide lexicon compiled from LEXICON_TABLES (built on first use)"""
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                _lexicon = KeywordLexicon(LEXICON_TABLES)
+    return _lexicon
+
+
+def main():
+    """CLI: show every lexicon hit for a task description"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scan a task with the shared keyword lexicon")
+    parser.add_argument('text', help="Task description")
+    args = parser.parse_args()
+
+    lexicon = get_lexicon()
+    hits = lexicon.scan(args.text)
+    print(f"Lexicon: {len(lexicon.keywords)} keywords in {len(lexicon.tables)} tables")
+    for table in lexicon.tables:
+        for category, keywords in hits.categories(table).items():
+            print(f"  {table}.{category}: {', '.join(sorted(keywords))}")
+
+
+if __name__ == '__main__':
+    main()
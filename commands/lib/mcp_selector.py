@@ -34,10 +34,16 @@ Date: 2025-12-13
 Part of: Phase 5 Task 5.2 - Agent-MCP 协同模式实现
 """
 
-import re
-from typing import List, Dict, Optional, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple, Union
 from dataclasses import dataclass
 
+from commands.lib.agent_registry import TaskQuery
+from commands.lib.keyword_lexicon import (
+    MCP_FEATURE_KEYWORDS, MCP_TOOL_KEYWORDS, MCP_TRIGGER_KEYWORDS,
+    TABLE_MCP_FEATURE, TABLE_MCP_TOOL, TABLE_MCP_TRIGGER
+)
+from commands.lib.request_context import KIND_MCP_COMPLEXITY, KIND_MCP_TOOLS, RequestContext
+
 
 @dataclass
 class MCPToolRecommendation:
@@ -111,63 +117,41 @@ class MCPSelector:
         "Serena": {
             "capabilities": ["code_navigation", "symbol_search", "refactoring", "dependency_analysis"],
             "complexity_threshold": 0.3,
-            "keywords": ["修改", "重构", "查找", "定位", "符号", "引用"],
+            "keywords": MCP_TOOL_KEYWORDS["Serena"],
         },
         "Sequential-thinking": {
             "capabilities": ["complex_logic", "decision_making", "planning", "decomposition"],
             "complexity_threshold": 0.5,
-            "keywords": ["复杂", "决策", "规划", "分解", "算法", "逻辑"],
+            "keywords": MCP_TOOL_KEYWORDS["Sequential-thinking"],
         },
         "Magic": {
             "capabilities": ["ui_generation", "component_design", "frontend"],
             "complexity_threshold": 0.0,
-            "keywords": ["UI", "组件", "前端", "界面", "设计", "样式"],
+            "keywords": MCP_TOOL_KEYWORDS["Magic"],
         },
         "Context7": {
             "capabilities": ["documentation", "api_reference", "library_lookup"],
             "complexity_threshold": 0.0,
-            "keywords": ["文档", "API", "库", "框架", "官方", "参考"],
+            "keywords": MCP_TOOL_KEYWORDS["Context7"],
         },
         "Tavily": {
             "capabilities": ["web_search", "research", "latest_info"],
             "complexity_threshold": 0.2,
-            "keywords": ["搜索", "研究", "最新", "方案", "对比", "开源"],
+            "keywords": MCP_TOOL_KEYWORDS["Tavily"],
         },
     }
 
-    # Keyword constants (extracted from __init__ for performance)
-    UI_KEYWORDS = [
-        "ui", "界面", "组件", "按钮", "表单", "页面",
-        "component", "button", "form", "page", "layout"
-    ]
-
-    FRAMEWORK_KEYWORDS = [
-        "react", "vue", "django", "express", "flask", "fastapi",
-        "spring", "angular", "next.js", "nuxt", "rails"
-    ]
-
-    RESEARCH_KEYWORDS = [
-        "最新", "最佳实践", "对比", "趋势", "调研",
-        "latest", "best practice", "compare", "trend", "research"
-    ]
+    # Task-trigger keywords and complexity features are tables of the shared
+    # keyword lexicon (commands/lib/keyword_lexicon.py), matched in one scan
+    UI_KEYWORDS = MCP_TRIGGER_KEYWORDS["ui"]
+    FRAMEWORK_KEYWORDS = MCP_TRIGGER_KEYWORDS["framework"]
+    RESEARCH_KEYWORDS = MCP_TRIGGER_KEYWORDS["research"]
 
     AGENT_SPECIFIC_TOOLS = {
         "architect-agent": ["context7", "tavily"],
         "research-agent": ["context7", "tavily"],
     }
 
-    # Pre-compiled regex patterns for task complexity analysis
-    FEATURE_PATTERNS = {
-        "multifile": re.compile(r"(多个文件|多文件|跨文件|多模块|几个文件)", re.IGNORECASE),
-        "architecture": re.compile(r"(架构|设计|重构|模式|系统)", re.IGNORECASE),
-        "integration": re.compile(r"(集成|API|第三方|外部|接口)", re.IGNORECASE),
-        "algorithm": re.compile(r"(算法|逻辑|计算|复杂|性能)", re.IGNORECASE),
-        "concurrent": re.compile(r"(并发|异步|多线程|并行|concurrent|async)", re.IGNORECASE),
-        "data_migration": re.compile(r"(迁移|数据库|schema|migration)", re.IGNORECASE),
-        "ui_component": re.compile(r"(UI|组件|前端|界面|页面|component)", re.IGNORECASE),
-        "api_design": re.compile(r"(API|endpoint|路由|接口设计)", re.IGNORECASE),
-    }
-
     def __init__(self, gateway=None):
         """
         Initialize MCP selector with gateway
@@ -176,8 +160,8 @@ class MCPSelector:
             gateway: Optional MCP Gateway instance (for availability checking)
 
         Note:
-            All keyword lists and regex patterns are now class-level constants
-            for better performance (no repeated allocation/compilation).
+            All keyword tables are compiled once into the shared keyword
+            lexicon (no repeated allocation/compilation).
         """
         self.gateway = gateway
 
@@ -220,22 +204,22 @@ class MCPSelector:
         if agent.name in self.AGENT_SPECIFIC_TOOLS:
             tools.update(self.AGENT_SPECIFIC_TOOLS[agent.name])
 
-        # Tier 3: Task-conditional MCP
-        task_lower = task.description.lower()
+        # Tier 3: Task-conditional MCP (one lexicon scan for all triggers)
+        hits = TaskQuery.of(task.description).lexicon_hits
 
         # UI tasks → Magic (for code-agent and doc-agent)
-        if self._is_ui_task(task_lower):
+        if hits.has(TABLE_MCP_TRIGGER, "ui"):
             if agent.name in ["code-agent", "doc-agent"]:
                 tools.add("magic")
 
         # Framework/library references → Context7
-        if self._has_framework_reference(task_lower):
+        if hits.has(TABLE_MCP_TRIGGER, "framework"):
             if agent.name in ["debug-agent", "architect-agent"]:
                 # Only add if not already present
                 tools.add("context7")
 
         # Research/trend keywords → Tavily
-        if self._needs_web_search(task_lower):
+        if hits.has(TABLE_MCP_TRIGGER, "research"):
             if agent.name in ["architect-agent", "research-agent"]:
                 tools.add("tavily")
 
@@ -245,42 +229,6 @@ class MCPSelector:
 
         return result
 
-    def _is_ui_task(self, task_description: str) -> bool:
-        """
-        Detect if task involves UI implementation
-
-        Args:
-            task_description: Lowercase task description
-
-        Returns:
-            bool: True if UI-related keywords found
-        """
-        return any(kw in task_description for kw in self.UI_KEYWORDS)
-
-    def _has_framework_reference(self, task_description: str) -> bool:
-        """
-        Detect if task references specific frameworks/libraries
-
-        Args:
-            task_description: Lowercase task description
-
-        Returns:
-            bool: True if framework keywords found
-        """
-        return any(fw in task_description for fw in self.FRAMEWORK_KEYWORDS)
-
-    def _needs_web_search(self, task_description: str) -> bool:
-        """
-        Detect if task requires web search or research
-
-        Args:
-            task_description: Lowercase task description
-
-        Returns:
-            bool: True if research keywords found
-        """
-        return any(kw in task_description for kw in self.RESEARCH_KEYWORDS)
-
     # =========================================================================
     # V2 API - Enhanced MCP Selection with Confidence Scoring
     # =========================================================================
@@ -288,22 +236,42 @@ class MCPSelector:
     def select_tools_v2(
         self,
         agent,
-        task_description: str,
-        auto_filter: bool = True
+        task_description: Union[str, TaskQuery],
+        auto_filter: bool = True,
+        request_context: Optional[RequestContext] = None
     ) -> List[MCPToolRecommendation]:
         """
         Select MCP tools for an agent based on task requirements (V2 API)
 
         Args:
             agent: Agent object with mcp_integrations list
-            task_description: User's task description
+            task_description: User's task description (str or TaskQuery)
             auto_filter: Automatically filter irrelevant tools (default: True)
+            request_context: Shared per-request memo (complexity and the
+                recommendations per agent are computed once per request)
 
         Returns:
             List of MCPToolRecommendation objects, sorted by confidence (high to low)
         """
+        # Normalize once for complexity analysis and every tool's keyword scan
+        ctx = RequestContext.of(task_description, request_context)
+
+        recommendations = ctx.memoize(
+            (KIND_MCP_TOOLS, agent.name, auto_filter),
+            lambda: self._recommend_tools(agent, ctx, auto_filter)
+        )
+        return list(recommendations)
+
+    def _recommend_tools(
+        self, agent, request_context: RequestContext, auto_filter: bool
+    ) -> List[MCPToolRecommendation]:
+        """select_tools_v2() body, evaluated once per (request, agent)"""
+        task_description = request_context.query
+
         # Step 1: Analyze task complexity
-        complexity = self._analyze_complexity_v2(task_description)
+        complexity = request_context.memoize(
+            (KIND_MCP_COMPLEXITY,), lambda: self._analyze_complexity_v2(task_description)
+        )
 
         # Step 2: Get agent's preferred MCP tools
         agent_tools = self._extract_agent_mcp_tools(agent)
@@ -349,22 +317,23 @@ class MCPSelector:
 
         return recommendations
 
-    def _analyze_complexity_v2(self, task_description: str) -> TaskComplexity:
+    def _analyze_complexity_v2(self, task_description: Union[str, TaskQuery]) -> TaskComplexity:
         """
         Analyze task complexity based on description (V2 Enhanced)
 
         Args:
-            task_description: User's task description
+            task_description: User's task description (str or TaskQuery)
 
         Returns:
             TaskComplexity object with score and feature breakdown
         """
+        hits = TaskQuery.of(task_description).lexicon_hits
         features = {}
         score = 0.0
 
-        # Feature detection using pre-compiled regex patterns (performance optimized)
-        for feature, compiled_pattern in self.FEATURE_PATTERNS.items():
-            if compiled_pattern.search(task_description):
+        # Feature detection from the shared lexicon scan
+        for feature in MCP_FEATURE_KEYWORDS:
+            if hits.has(TABLE_MCP_FEATURE, feature):
                 features[feature] = True
                 score += self.COMPLEXITY_WEIGHTS.get(feature, 0.0)
             else:
@@ -409,7 +378,7 @@ class MCPSelector:
     def _calculate_tool_confidence(
         self,
         tool_name: str,
-        task_description: str,
+        task_description: Union[str, TaskQuery],
         complexity: TaskComplexity,
         usage_desc: str
     ) -> Tuple[float, str]:
@@ -418,7 +387,7 @@ class MCPSelector:
 
         Args:
             tool_name: MCP tool name (e.g., "Serena", "Sequential-thinking")
-            task_description: User's task description
+            task_description: User's task description (str or TaskQuery)
             complexity: TaskComplexity object
             usage_desc: Agent's usage description for this tool
 
@@ -435,11 +404,7 @@ class MCPSelector:
         tool_info = self.MCP_CAPABILITIES[tool_name]
 
         # Factor 1: Keyword matching (30% weight)
-        keywords = tool_info.get("keywords", [])
-        keyword_matches = sum(
-            1 for keyword in keywords
-            if keyword.lower() in task_description.lower()
-        )
+        keyword_matches = TaskQuery.of(task_description).lexicon_hits.count(TABLE_MCP_TOOL, tool_name)
         if keyword_matches > 0:
             keyword_confidence = min(keyword_matches * 0.15, 0.3)
             confidence += keyword_confidence
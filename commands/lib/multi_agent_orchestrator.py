@@ -19,9 +19,11 @@ from enum import Enum
 import logging
 from pathlib import Path
 
-from .agent_registry import Agent, AgentRegistry, AgentMatch
+from .agent_registry import Agent, AgentRegistry, AgentMatch, get_agent_registry
 from .agent_decision_engine import AgentDecisionEngine, DecisionResult
 from .agent_command_executor import AgentCommandExecutor, ExecutionResult
+from .agent_execution_history import AgentExecutionHistory
+from .workflow_estimator import WorkflowEstimator
 
 logger = logging.getLogger(__name__)
 
@@ -108,14 +110,23 @@ class MultiAgentOrchestrator:
     5. 编排和执行
     """
 
-    def __init__(self, registry: Optional[AgentRegistry] = None):
+    # 合格 Agent 的最低置信度 (>= 65%)
+    QUALIFIED_SCORE_THRESHOLD = 0.65
+
+    def __init__(
+        self,
+        registry: Optional[AgentRegistry] = None,
+        history: Optional[AgentExecutionHistory] = None
+    ):
         """
         初始化协调器
 
         Args:
-            registry: Agent 注册表（可选，默认创建新实例）
+            registry: Agent 注册表（可选，默认使用进程内共享实例）
+            history: 执行历史（可选，用于估算执行时间；未提供时使用默认时长）
         """
-        self.registry = registry or AgentRegistry()
+        self.registry = registry or get_agent_registry()
+        self.estimator = WorkflowEstimator(history)
         self.decision_engine = AgentDecisionEngine()
         self.executor = AgentCommandExecutor()
         self.orchestration_history: List[OrchestrationResult] = []
@@ -135,13 +146,15 @@ class MultiAgentOrchestrator:
                 'complexity_score': float (0.0-1.0)
             }
         """
-        # 1. 查找所有可能的 Agents
-        all_matches = self.registry.find_agents(task_description)
+        # 1. 查找所有可能的 Agents（流式，按分数降序，低于阈值的不计算）
+        all_matches = self.registry.find_agents(
+            task_description, min_score=self.QUALIFIED_SCORE_THRESHOLD
+        )
 
         # 2. 过滤高置信度的 Agents (>= 65%)
         qualified_agents = [
             match for match in all_matches
-            if match.score >= 0.65
+            if match.score >= self.QUALIFIED_SCORE_THRESHOLD
         ]
 
         # 3. 分析关键词多样性
@@ -324,7 +337,7 @@ class MultiAgentOrchestrator:
                 tasks=[task],
                 execution_mode=ExecutionMode.SEQUENTIAL,
                 conflict_resolution=conflict_strategy,
-                estimated_duration="5-15 minutes"
+                estimated_duration=self._estimate_duration([task], ExecutionMode.SEQUENTIAL)
             )
 
         # 2. 解决冲突，选择 Agents
@@ -397,7 +410,7 @@ class MultiAgentOrchestrator:
             tasks=tasks,
             execution_mode=execution_mode,
             conflict_resolution=conflict_strategy,
-            estimated_duration=self._estimate_duration(len(tasks), execution_mode)
+            estimated_duration=self._estimate_duration(tasks, execution_mode)
         )
 
     def _topological_sort(
@@ -451,14 +464,22 @@ class MultiAgentOrchestrator:
                 return tool[1:]  # 去掉前缀 /
         return default_command
 
-    def _estimate_duration(self, task_count: int, mode: ExecutionMode) -> str:
-        """估算执行时间"""
-        if mode == ExecutionMode.PARALLEL:
-            # 并行执行，时间主要取决于最慢的任务
-            return f"{task_count * 5}-{task_count * 10} minutes"
+    def _estimate_duration(self, tasks: List[AgentTask], mode: ExecutionMode) -> str:
+        """
+        估算执行时间（关键路径 + 执行历史中的 p50/p90 时长）
+
+        顺序模式按 execution_order 串联；并行和层级模式只按声明的依赖
+        连接，总时长取决于最慢的分支。
+        """
+        if mode == ExecutionMode.SEQUENTIAL:
+            ordered = sorted(tasks, key=lambda t: t.execution_order)
+            steps = [
+                (task.agent_id, task.dependencies + ([ordered[i - 1].agent_id] if i else []))
+                for i, task in enumerate(ordered)
+            ]
         else:
-            # 顺序或层级，时间累加
-            return f"{task_count * 10}-{task_count * 20} minutes"
+            steps = [(task.agent_id, task.dependencies) for task in tasks]
+        return self.estimator.estimate(steps).format()
 
     def format_plan(self, plan: OrchestrationPlan, verbose: bool = False) -> str:
         """
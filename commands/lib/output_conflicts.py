@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Output Conflicts - Near-linear conflict detection between step outputs
+
+This module provides ConflictDetector, which reports step outputs that
+discuss the same subject but carry opposite decisions (approved vs
+rejected, pass vs fail). Each output gets one signature when it is
+produced; candidate pairs come from LSH buckets over those signatures.
+
+Design Principles:
+- Signature per output, computed once: decision keywords (whole words,
+  e.g. approved / rejected), hashed word 3-shingles (CJK characters count
+  as words), MinHash over the shingles
+- LSH banding (bands × rows = num_perm) over outputs that carry a decision;
+  within a bucket only opposite-keyword groups are paired, so the work is
+  linear in outputs plus candidate pairs
+- Detailed check on candidates only: opposite decisions and shingle
+  Jaccard ≥ min_similarity (same subject)
+- Thread-safe add(): signatures can be computed by the worker that
+  produced the output, while other steps still run
+- Deterministic results (ordered by insertion order of the outputs)
+
+Usage:
+    from commands.lib.output_conflicts import ConflictDetector
+
+    detector = ConflictDetector()
+    detector.add("review", "review-agent", "Design approved: JWT auth with refresh tokens")
+    detector.add("security", "security-review", "Design rejected: JWT auth with refresh tokens")
+    for conflict in detector.detect():
+        print(conflict.describe())
+"""
+
+import random
+import re
+import threading
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Hashable, List, Optional, Sequence, Set, Tuple
+
+# Contradictory decision keywords (matched as whole words, case-insensitive)
+CONTRADICTIONS: Tuple[Tuple[str, str], ...] = (
+    ("yes", "no"),
+    ("true", "false"),
+    ("approved", "rejected"),
+    ("pass", "fail"),
+)
+
+# Word shingle size
+SHINGLE_SIZE = 3
+
+# MinHash / LSH parameters: 16 bands × 2 rows, P(candidate) ≈ 1 - (1 - J²)^16,
+# i.e. ~50% at Jaccard 0.2 and ~94% at Jaccard 0.4
+DEFAULT_NUM_PERM = 32
+DEFAULT_BANDS = 16
+
+# Shingle Jaccard from which two outputs are about the same subject
+DEFAULT_MIN_SIMILARITY = 0.2
+
+# Mersenne prime for the universal hash family of MinHash
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9_]+|[\u3400-\u9fff]')
+_DECISION_WORDS = frozenset(word for pair in CONTRADICTIONS for word in pair)
+
+
+def decision_keywords(text: str) -> FrozenSet[str]:
+    """Decision keywords present in text (whole words)"""
+    return frozenset(
+        token for token in re.findall(r'[a-z]+', text.lower()) if token in _DECISION_WORDS
+    )
+
+
+def shingle_set(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[int]:
+    """Stable 32-bit hashes of the word shingles of text"""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if not tokens:
+        return frozenset()
+    if len(tokens) <= size:
+        return frozenset((zlib.crc32(" ".join(tokens).encode('utf-8')),))
+    return frozenset(
+        zlib.crc32(" ".join(tokens[i:i + size]).encode('utf-8'))
+        for i in range(len(tokens) - size + 1)
+    )
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """
+    MinHash signatures with a fixed universal hash family (reproducible)
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles: FrozenSet[int]) -> Tuple[int, ...]:
+        """Minimum of each hash function over the shingles"""
+        if not shingles:
+            return ()
+        return tuple(
+            min((a * x + b) % _MERSENNE_PRIME for x in shingles)
+            for a, b in self._params
+        )
+
+
+@dataclass(frozen=True)
+class OutputSignature:
+    """Precomputed comparison data of one output"""
+    key: Hashable
+    label: str
+    decisions: FrozenSet[str]
+    shingles: FrozenSet[int]
+    minhash: Tuple[int, ...]
+
+
+@dataclass
+class OutputConflict:
+    """Two outputs on the same subject with opposite decisions"""
+    first: str
+    second: str
+    keywords: Tuple[str, str]    # (keyword in first, keyword in second)
+    similarity: float
+
+    def describe(self) -> str:
+        return (f"Potential conflict between {self.first} and {self.second} "
+                f"({self.keywords[0]} vs {self.keywords[1]})")
+
+
+@dataclass
+class ConflictDetectorStats:
+    """Work counters of the last detect()"""
+    signatures: int = 0
+    candidates: int = 0          # Pairs from LSH buckets
+    comparisons: int = 0         # Detailed comparisons (= candidates)
+    conflicts: int = 0
+
+
+class ConflictDetector:
+    """
+    Signature index of step outputs with LSH candidate search
+    """
+
+    def __init__(
+        self,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY
+    ):
+        """
+        Initialize conflict detector
+
+        Args:
+            num_perm: MinHash functions (must be divisible by bands)
+            bands: LSH bands (more bands = lower similarity threshold)
+            min_similarity: Shingle Jaccard required for a conflict
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_similarity = min_similarity
+        self.stats = ConflictDetectorStats()
+        self._signatures: Dict[Hashable, OutputSignature] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, key: Hashable, label: str, text: str) -> OutputSignature:
+        """Compute the signature of one output (no state change)"""
+        decisions = decision_keywords(text)
+        if not decisions:
+            # Outputs without a decision can never conflict; skip the hashing
+            return OutputSignature(key, label, decisions, frozenset(), ())
+        shingles = shingle_set(text)
+        return OutputSignature(key, label, decisions, shingles, self.hasher.signature(shingles))
+
+    def add(self, key: Hashable, label: str, text: str) -> OutputSignature:
+        """Compute and index the signature of an output (thread-safe)"""
+        signature = self.signature(key, label, text)
+        with self._lock:
+            self._signatures[key] = signature
+        return signature
+
+    def candidate_pairs(self, keys: Optional[Sequence[Hashable]] = None) -> List[Tuple[int, int]]:
+        """
+        Pairs (positions in keys) sharing an LSH bucket with opposite decisions
+
+        Args:
+            keys: Outputs to consider, in result order (default: insertion order)
+        """
+        signatures = self._ordered(keys)
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+        for position, signature in enumerate(signatures):
+            if not signature.minhash:
+                continue
+            for band in range(self.bands):
+                start = band * self.rows
+                buckets[(band, signature.minhash[start:start + self.rows])].append(position)
+
+        pairs: Set[Tuple[int, int]] = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            by_keyword: Dict[str, List[int]] = defaultdict(list)
+            for position in members:
+                for keyword in signatures[position].decisions:
+                    by_keyword[keyword].append(position)
+            for word1, word2 in CONTRADICTIONS:
+                for i in by_keyword.get(word1, ()):
+                    for j in by_keyword.get(word2, ()):
+                        if i != j:
+                            pairs.add((min(i, j), max(i, j)))
+        return sorted(pairs)
+
+    def detect(self, keys: Optional[Sequence[Hashable]] = None) -> List[OutputConflict]:
+        """
+        Conflicting output pairs
+
+        Args:
+            keys: Outputs to consider, in result order (default: insertion order)
+
+        Returns:
+            Conflicts ordered by the positions of their outputs
+        """
+        signatures = self._ordered(keys)
+        candidates = self.candidate_pairs(keys)
+        conflicts = []
+        for i, j in candidates:
+            first, second = signatures[i], signatures[j]
+            keywords = self._opposing(first.decisions, second.decisions)
+            if keywords is None:
+                continue
+            similarity = jaccard(first.shingles, second.shingles)
+            if similarity >= self.min_similarity:
+                conflicts.append(OutputConflict(first.label, second.label, keywords, similarity))
+
+        self.stats = ConflictDetectorStats(
+            signatures=len(signatures),
+            candidates=len(candidates),
+            comparisons=len(candidates),
+            conflicts=len(conflicts)
+        )
+        return conflicts
+
+    def _ordered(self, keys: Optional[Sequence[Hashable]]) -> List[OutputSignature]:
+        with self._lock:
+            if keys is None:
+                return list(self._signatures.values())
+            return [self._signatures[key] for key in keys]
+
+    @staticmethod
+    def _opposing(first: FrozenSet[str], second: FrozenSet[str]) -> Optional[Tuple[str, str]]:
+        for word1, word2 in CONTRADICTIONS:
+            if word1 in first and word2 in second:
+                return word1, word2
+            if word2 in first and word1 in second:
+                return word2, word1
+        return None
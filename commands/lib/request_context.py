@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Request Context - Per-request memoization of routing computations
+
+This module provides RequestContext, which holds the routing results of a
+single user request: agent matches per registry, intent and complexity,
+MCP complexity and tool recommendations. Components that receive the
+context compute each value on first use and return the stored value
+afterwards, so within one request every value is computed at most once
+and all callers see the same result.
+
+Design Principles:
+- One context per request; never shared between different tasks
+- Memoized values: agent matches (per registry), intent and complexity
+  (TaskAnalyzer), MCP complexity and tool recommendations (MCPSelector)
+- Smaller top_k requests are served from a larger memoized selection
+  (select_agent ordering is a deterministic prefix)
+- Counters (computed / reused per kind) make the savings observable
+- Optional everywhere: components build a private context when none is given;
+  a context passed for a different task is rejected (ValueError)
+- Cross-request caches (AgentRouter.route) hand their stored selection to
+  the context, so later callers in the request reuse it instead of
+  selecting again
+
+Usage:
+    from commands.lib.request_context import RequestContext
+
+    ctx = RequestContext("设计完整的用户认证系统")
+    analysis = TaskAnalyzer().analyze(ctx.query, request_context=ctx)
+    workflow = AgentRouter().route(ctx.query, request_context=ctx)
+    print(ctx.stats)   # computed={'matches': 1, ...}, reused={'matches': 2, ...}
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from commands.lib.agent_registry import AgentMatch, AgentRegistry, TaskQuery
+
+# Matches memoized per registry; covers the top_k=3 used by every caller
+DEFAULT_MATCH_DEPTH = 3
+
+# Memo kinds (first element of every memo key, and counter names)
+KIND_MATCHES = 'matches'
+KIND_INTENT = 'intent'
+KIND_COMPLEXITY = 'complexity'
+KIND_MCP_COMPLEXITY = 'mcp_complexity'
+KIND_MCP_TOOLS = 'mcp_tools'
+
+
+@dataclass
+class RequestContextStats:
+    """How often each kind of value was computed vs served from the memo"""
+    computed: Counter = field(default_factory=Counter)
+    reused: Counter = field(default_factory=Counter)
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        return {'computed': dict(self.computed), 'reused': dict(self.reused)}
+
+
+class RequestContext:
+    """
+    Memoized routing state for one task description
+
+    Thread-safe: concurrent callers of the same key compute it once.
+    """
+
+    def __init__(self, task: Union[str, TaskQuery]):
+        """
+        Initialize request context
+
+        Args:
+            task: Task description (str or TaskQuery), normalized once
+        """
+        self.query = TaskQuery.of(task)
+        self.stats = RequestContextStats()
+        self._memo: Dict[Tuple[Hashable, ...], Any] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def of(
+        cls, task: Union[str, TaskQuery], request_context: Optional['RequestContext'] = None
+    ) -> 'RequestContext':
+        """
+        Return request_context if given, otherwise a fresh context for task
+
+        Raises:
+            ValueError: request_context was created for a different task
+        """
+        if request_context is None:
+            return cls(task)
+        query = TaskQuery.of(task)
+        if query.key != request_context.query.key:
+            raise ValueError(
+                f"RequestContext for {request_context.query.text!r} "
+                f"used for a different task {query.text!r}"
+            )
+        return request_context
+
+    def memoize(self, key: Tuple[Hashable, ...], compute: Callable[[], Any]) -> Any:
+        """
+        Return the memoized value for key, computing it on first use
+
+        Args:
+            key: Memo key; key[0] is the kind used for the counters
+            compute: Zero-argument callable producing the value
+        """
+        with self._lock:
+            if key in self._memo:
+                self.stats.reused[key[0]] += 1
+                return self._memo[key]
+            value = compute()
+            self._memo[key] = value
+            self.stats.computed[key[0]] += 1
+            return value
+
+    def select_agent(self, registry: AgentRegistry, top_k: int = 1) -> List[AgentMatch]:
+        """
+        registry.select_agent(query, top_k), selected at most once per registry
+
+        Returns:
+            New list (callers may modify it)
+        """
+        key = (KIND_MATCHES, id(registry))
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None and cached[0] >= top_k:
+                self.stats.reused[KIND_MATCHES] += 1
+                return list(cached[1][:top_k])
+
+            depth = max(top_k, DEFAULT_MATCH_DEPTH)
+            # Keep the registry alive with the entry so id() stays unique
+            matches = registry.select_agent(self.query, top_k=depth)
+            self._memo[key] = (depth, matches, registry)
+            self.stats.computed[KIND_MATCHES] += 1
+            return list(matches[:top_k])
+
+    def selection(self, registry: AgentRegistry) -> Optional[Tuple[int, Tuple[AgentMatch, ...]]]:
+        """(depth, matches) memoized for registry, or None if nothing was selected yet"""
+        with self._lock:
+            cached = self._memo.get((KIND_MATCHES, id(registry)))
+            return (cached[0], tuple(cached[1])) if cached is not None else None
+
+    def adopt_selection(
+        self, registry: AgentRegistry, selection: Tuple[int, Tuple[AgentMatch, ...]]
+    ) -> None:
+        """
+        Memoize matches selected for this query outside the context (counted as reused)
+
+        Args:
+            registry: Registry the matches were selected from
+            selection: (depth, matches) as returned by selection()
+        """
+        key = (KIND_MATCHES, id(registry))
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is None or cached[0] < selection[0]:
+                self._memo[key] = (selection[0], list(selection[1]), registry)
+            self.stats.reused[KIND_MATCHES] += 1
+
+    def __repr__(self) -> str:
+        return f"RequestContext({self.query.text!r}, {self.stats.as_dict()})"
+
+
+def main():
+    """CLI: analyze and route one task with a shared context, then show the counters"""
+    import argparse
+    from commands.lib.agent_router import AgentRouter
+    from commands.lib.task_analyzer import TaskAnalyzer
+
+    parser = argparse.ArgumentParser(description="Show per-request memoization for one task")
+    parser.add_argument('text', help="Task description")
+    parser.add_argument('--mode', default=None,
+                        help="Coordination mode override (e.g. hierarchical)")
+    args = parser.parse_args()
+
+    ctx = RequestContext(args.text)
+    registry = AgentRegistry()
+    analysis = TaskAnalyzer(registry).analyze(ctx.query, request_context=ctx)
+    workflow = AgentRouter(registry).route(ctx.query, mode=args.mode, request_context=ctx)
+
+    primary = analysis.primary_agent.agent.name if analysis.primary_agent else None
+    print(f"Primary agent: {primary}  Workflow: {workflow.mode.value} ({len(workflow.steps)} steps)")
+    for kind, count in sorted(ctx.stats.computed.items()):
+        print(f"  {kind}: computed {count}, reused {ctx.stats.reused[kind]}")
+
+
+if __name__ == '__main__':
+    main()
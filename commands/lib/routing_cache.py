@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Routing Cache - Bounded LRU + TTL cache for routing results
+
+Caches routing results for repeated task text. AgentRegistry.select_agent
+and AgentRouter.route serve exact hits only: similar-looking tasks (e.g.
+"重构用户登录模块" vs "测试用户登录模块") can need different agents.
+
+Design Principles:
+- Exact hits: LRU keyed on the normalized task (lowercase, collapsed
+  whitespace) plus call context (top_k / mode), bounded size and TTL
+- Near-duplicate hits (opt-in, near_duplicates=True): MinHash (bottom-k)
+  sketch over character bigrams of the cleaned text; entries are indexed
+  by their k smallest shingle hashes and candidates are confirmed by
+  Jaccard similarity of the shingle sets. Only for values that do not
+  depend on the exact wording
+- Invalidation by generation: the owner passes its current registry
+  snapshot; a different snapshot (reload) clears the cache
+- Thread-safe, with hit/miss counters
+
+Usage:
+    from commands.lib.routing_cache import RoutingCache
+
+    cache = RoutingCache(max_size=256, ttl=300)
+    value = cache.get(key, clean_text, context=3, generation=snapshot)
+    if value is None:
+        value = route(...)
+        cache.put(key, clean_text, value, context=3, generation=snapshot)
+    print(cache.stats)
+"""
+
+import heapq
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Optional, Set, Tuple
+
+# MinHash parameters
+SHINGLE_SIZE = 2                # Character bigrams (one CJK word ≈ 2 chars)
+MINHASH_K = 6                   # Bottom-k hashes used for candidate lookup
+
+# Near-duplicate defaults
+DEFAULT_MIN_JACCARD = 0.6       # One typo in a ~10 char task stays above this
+DEFAULT_MIN_NEAR_LENGTH = 8     # Short texts change too much per edit to compare
+
+# (context, exact_key)
+CacheKey = Tuple[Hashable, str]
+
+
+def shingle_hashes(text: str) -> FrozenSet[int]:
+    """Stable 32-bit hashes of the character bigrams of a cleaned text"""
+    if len(text) <= SHINGLE_SIZE:
+        return frozenset((zlib.crc32(text.encode('utf-8')),))
+    return frozenset(
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode('utf-8'))
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    )
+
+
+def minhash_sketch(shingles: FrozenSet[int], k: int = MINHASH_K) -> Tuple[int, ...]:
+    """Bottom-k MinHash sketch: the k smallest shingle hashes"""
+    return tuple(heapq.nsmallest(k, shingles))
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class RoutingCacheStats:
+    """Routing cache counters"""
+    hits: int = 0                # Exact-key hits
+    near_hits: int = 0           # Near-duplicate (MinHash) hits
+    misses: int = 0
+    evictions: int = 0           # Dropped by the size bound
+    expirations: int = 0         # Dropped by TTL
+    invalidations: int = 0       # Cleared because the registry reloaded
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.near_hits + self.misses
+        return (self.hits + self.near_hits) / total if total else 0.0
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expires_at: float
+    shingles: Optional[FrozenSet[int]]
+    sketch: Tuple[int, ...] = ()
+
+
+class RoutingCache:
+    """
+    Bounded LRU + TTL cache with MinHash near-duplicate lookup
+
+    Values are returned as stored; callers that hand results out should
+    copy mutable containers.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: float = 300.0,
+        near_duplicates: bool = False,
+        min_jaccard: float = DEFAULT_MIN_JACCARD,
+        min_near_length: int = DEFAULT_MIN_NEAR_LENGTH,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize routing cache
+
+        Args:
+            max_size: Maximum number of entries (LRU eviction beyond it)
+            ttl: Seconds an entry stays valid
+            near_duplicates: Also serve MinHash near-duplicate hits (off: exact hits only)
+            min_jaccard: Minimum shingle-set similarity for a near-duplicate hit
+            min_near_length: Minimum cleaned length for near-duplicate lookup
+            clock: Time source (injectable for tests)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self.min_jaccard = min_jaccard
+        self.min_near_length = min_near_length
+        self.clock = clock
+        self.stats = RoutingCacheStats()
+
+        self._entries: 'OrderedDict[CacheKey, _CacheEntry]' = OrderedDict()
+        # (context, sketch hash) -> keys of entries whose sketch contains it
+        self._postings: Dict[Tuple[Hashable, int], Set[CacheKey]] = {}
+        self._generation: Any = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        key: str,
+        clean_text: str,
+        context: Hashable = None,
+        generation: Any = None
+    ) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Normalized task text (exact-hit key)
+            clean_text: Cleaned task text (near-duplicate input)
+            context: Extra key parts, e.g. top_k or mode
+            generation: Owner's current registry snapshot (compared by identity)
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            self._check_generation(generation)
+            now = self.clock()
+
+            entry = self._entries.get((context, key))
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end((context, key))
+                    self.stats.hits += 1
+                    return entry.value
+                self._remove((context, key))
+                self.stats.expirations += 1
+
+            shingles = self._shingles(clean_text)
+            if shingles is not None:
+                near_key = self._find_near(context, shingles, now)
+                if near_key is not None:
+                    self._entries.move_to_end(near_key)
+                    self.stats.near_hits += 1
+                    return self._entries[near_key].value
+
+            self.stats.misses += 1
+            return None
+
+    def put(
+        self,
+        key: str,
+        clean_text: str,
+        value: Any,
+        context: Hashable = None,
+        generation: Any = None
+    ) -> None:
+        """
+        Store a value (evicting the least recently used entry when full)
+
+        Args:
+            key: Normalized task text (exact-hit key)
+            clean_text: Cleaned task text (near-duplicate input)
+            value: Routing result to cache (must not be None)
+            context: Extra key parts, e.g. top_k or mode
+            generation: Owner's current registry snapshot
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._check_generation(generation)
+            cache_key = (context, key)
+            if cache_key in self._entries:
+                self._remove(cache_key)
+
+            shingles = self._shingles(clean_text)
+            entry = _CacheEntry(value=value, expires_at=self.clock() + self.ttl, shingles=shingles)
+            if shingles is not None:
+                entry.sketch = minhash_sketch(shingles)
+                for value_hash in entry.sketch:
+                    self._postings.setdefault((context, value_hash), set()).add(cache_key)
+            self._entries[cache_key] = entry
+
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def _check_generation(self, generation: Any) -> None:
+        """Clear the cache when the owner's registry snapshot changed"""
+        if generation is self._generation:
+            return
+        if self._entries:
+            self._entries.clear()
+            self._postings.clear()
+            self.stats.invalidations += 1
+        self._generation = generation
+
+    def _shingles(self, clean_text: str) -> Optional[FrozenSet[int]]:
+        if not self.near_duplicates or len(clean_text) < self.min_near_length:
+            return None
+        return shingle_hashes(clean_text)
+
+    def _find_near(
+        self, context: Hashable, shingles: FrozenSet[int], now: float
+    ) -> Optional[CacheKey]:
+        """Most similar live entry above min_jaccard (same context), if any"""
+        candidates: Set[CacheKey] = set()
+        for value_hash in minhash_sketch(shingles):
+            candidates.update(self._postings.get((context, value_hash), ()))
+
+        best_key, best_similarity = None, self.min_jaccard
+        for cache_key in candidates:
+            entry = self._entries[cache_key]
+            if entry.expires_at <= now:
+                self._remove(cache_key)
+                self.stats.expirations += 1
+                continue
+            similarity = jaccard(shingles, entry.shingles)
+            if similarity >= best_similarity:
+                best_key, best_similarity = cache_key, similarity
+        return best_key
+
+    def _remove(self, cache_key: CacheKey) -> None:
+        entry = self._entries.pop(cache_key)
+        for value_hash in entry.sketch:
+            posting = (cache_key[0], value_hash)
+            bucket = self._postings.get(posting)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._postings[posting]
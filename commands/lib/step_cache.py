@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Step Cache - Content-addressed memoization of workflow step outputs
+
+This module provides StepCache, which stores completed step outputs keyed
+by a hash of everything that determines them (agent, role, upstream
+outputs, task), so a rerun workflow answers identical steps from the cache.
+
+Design Principles:
+- Key = sha256 over (namespace, agent name, role, declared dependencies,
+  dependency outputs, task); any upstream change is a different key, so
+  entries never need invalidation
+- Two tiers: in-memory LRU (bounded) in front of an optional on-disk
+  directory (one JSON file per key, atomic writes); disk hits are promoted
+- Opt-in: CoordinationEngine only caches with a step_cache; agents doing
+  non-deterministic work opt out with `decision_criteria: {cacheable: false}`
+  in their definition or via exclude_agents
+- Only completed steps are stored; disk errors degrade to a miss
+- Thread-safe, with hit/miss counters
+
+Usage:
+    from commands.lib.coordination_engine import CoordinationEngine
+    from commands.lib.step_cache import StepCache
+
+    engine = CoordinationEngine(step_cache=StepCache(directory=".step_cache"))
+    result = engine.execute(workflow, task="实现用户认证系统")
+    result.step_results[0].metadata["cache"]    # "hit" | "miss" | "bypass"
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+# Bump when the key layout changes
+STEP_CACHE_VERSION = 2
+
+# In-memory entries
+DEFAULT_MAX_ENTRIES = 256
+
+# Cache tiers reported in StepResult.metadata["cache_tier"]
+TIER_MEMORY = "memory"
+TIER_DISK = "disk"
+
+
+@dataclass
+class StepCacheStats:
+    """Step cache counters"""
+    hits: int = 0            # Memory hits
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0       # Dropped from memory by the size bound
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class StepCache:
+    """
+    Two-tier (memory LRU + disk) content-addressed cache of step outputs
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        directory: Optional[str] = None,
+        namespace: str = "",
+        exclude_agents: Iterable[str] = ()
+    ):
+        """
+        Initialize step cache
+
+        Args:
+            max_entries: In-memory entries (LRU beyond that)
+            directory: On-disk tier directory (None = memory only)
+            namespace: Folded into every key, e.g. a model or prompt version
+            exclude_agents: Agent names never cached
+        """
+        self.max_entries = max(0, max_entries)
+        self.directory = Path(directory) if directory else None
+        self.namespace = namespace
+        self.exclude_agents = frozenset(exclude_agents)
+        self.stats = StepCacheStats()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cacheable(self, agent) -> bool:
+        """False for excluded agents and agents with decision_criteria.cacheable false"""
+        if agent.name in self.exclude_agents:
+            return False
+        criteria = agent.decision_criteria if isinstance(agent.decision_criteria, dict) else {}
+        return criteria.get('cacheable', True) is not False
+
+    def key(self, step, context: Mapping[str, str], task: str = "") -> str:
+        """
+        Content hash of a step's inputs
+
+        Args:
+            step: WorkflowStep
+            context: Dependency outputs by agent name (as passed to the step;
+                a StepContext is keyed by its fingerprint)
+            task: Task description of the workflow
+        """
+        payload = json.dumps(
+            [
+                STEP_CACHE_VERSION,
+                self.namespace,
+                step.agent.name,
+                step.role,
+                list(step.dependencies),
+                self._context_fingerprint(context),
+                task,
+            ],
+            ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _context_fingerprint(context: Mapping[str, str]) -> Any:
+        """StepContext fingerprint (no materialization), else the items themselves"""
+        fingerprint = getattr(context, 'fingerprint', None)
+        if callable(fingerprint):
+            return fingerprint()
+        return sorted(context.items())
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """
+        Look up a step output
+
+        Returns:
+            (output, tier) or None on a miss
+        """
+        with self._lock:
+            output = self._entries.get(key)
+            if output is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return output, TIER_MEMORY
+
+        output = self._read_disk(key)
+        with self._lock:
+            if output is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, output)
+        return output, TIER_DISK
+
+    def put(self, key: str, output: str, agent_name: str = "") -> None:
+        """Store a completed step output in both tiers"""
+        with self._lock:
+            self._remember(key, output)
+            self.stats.stores += 1
+        self._write_disk(key, output, agent_name)
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop the in-memory tier (and the disk tier if disk=True)"""
+        with self._lock:
+            self._entries.clear()
+        if disk and self.directory is not None and self.directory.is_dir():
+            for path in self.directory.glob("*/*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, output: str) -> None:
+        """Insert into the LRU (lock held)"""
+        if self.max_entries == 0:
+            return
+        self._entries[key] = output
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != STEP_CACHE_VERSION or data.get('key') != key:
+            return None
+        output = data.get('output')
+        return output if isinstance(output, str) else None
+
+    def _write_disk(self, key: str, output: str, agent_name: str) -> None:
+        """Atomic best-effort write (temp file + os.replace)"""
+        if self.directory is None:
+            return
+        path = self._path(key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=path.name, suffix='.tmp', dir=str(path.parent))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': STEP_CACHE_VERSION,
+                    'key': key,
+                    'agent': agent_name,
+                    'created_at': time.time(),
+                    'output': output,
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Read-only or full disk: the memory tier still works
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
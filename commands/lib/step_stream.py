@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Step Stream - Pipelined handoff of step output chunks to dependent steps
+
+This module provides StepStream, which hands the output chunks of a
+running step (generator / async iterator output) to dependent steps that
+declare streaming input, and PipelinedContext, the context such a
+dependent reads them through while its upstream steps are still producing.
+
+Design Principles:
+- Opt-in on both sides: producers stream by returning an (async) iterator
+  of chunks (other outputs arrive as one chunk at the end); consumers
+  declare `decision_criteria: {streaming_input: true}` or are listed in
+  CoordinationEngine(streaming_agents=...)
+- One stream per producer, one reader (cursor) per consumer; chunks are
+  stored once and kept until the stream is dropped (the full output is the
+  step result), so memory grows with the output size
+- Reader lag is limited, not memory: the producer waits while a reader lags
+  more than maxsize chunks behind, for at most max_stall seconds per chunk
+  so readers draining several streams in any order cannot deadlock; after
+  that it continues and the reader falls further behind (counted as an
+  overrun)
+- A stream closed with an error raises UpstreamFailed in its readers;
+  the engine never keeps a consumer's result unless all its upstream
+  steps completed
+- PipelinedContext: the consumer's Mapping context; context[name] waits
+  for the full (budget-clipped) output, context.stream(name) yields raw
+  chunks as they arrive
+
+Usage:
+    from commands.lib.coordination_engine import CoordinationEngine
+
+    def step_executor(step, context):
+        if step.agent.name == "code-agent":
+            return (f"file {i}\\n" for i in range(100))    # Producer
+        review = []
+        for chunk in context.stream("code-agent"):         # Consumer
+            review.append(f"reviewed {chunk}")
+        return "".join(review)
+
+    engine = CoordinationEngine(step_executor=step_executor, streaming_agents=["review-agent"])
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Optional
+
+from commands.lib.cancellation import current_token
+from commands.lib.context_store import ContextBudget, StepContext
+
+# Chunks a reader may lag behind before the producer waits
+DEFAULT_STREAM_BUFFER = 16
+
+# Seconds a producer waits for lagging readers per chunk before it moves on
+DEFAULT_MAX_STALL = 5.0
+
+# Seconds between cancellation checks while a producer or reader waits
+_STALL_POLL = 0.05
+
+
+class UpstreamFailed(Exception):
+    """The upstream step of a stream ended without completing"""
+
+
+@dataclass
+class StepStreamStats:
+    """Producer-side counters of one stream"""
+    chunks: int = 0
+    chars: int = 0
+    stalls: int = 0             # Chunks after which the producer waited for a reader
+    stall_seconds: float = 0.0
+    overruns: int = 0           # Waits given up after max_stall
+
+
+class StepStream:
+    """
+    Output chunks of one running step, read by its streaming dependents
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = DEFAULT_STREAM_BUFFER,
+        max_stall: float = DEFAULT_MAX_STALL
+    ):
+        """
+        Initialize step stream
+
+        Args:
+            name: Producing agent name
+            maxsize: Chunks a reader may lag behind before the producer waits
+            max_stall: Seconds the producer waits for lagging readers per chunk
+        """
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.max_stall = max_stall
+        self.stats = StepStreamStats()
+        self.error: Optional[str] = None
+        self._chunks: List[str] = []
+        self._closed = False
+        self._readers: List['StreamReader'] = []
+        self._cond = threading.Condition()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def text(self) -> str:
+        """Output produced so far"""
+        with self._cond:
+            return "".join(self._chunks)
+
+    def publish(self, chunk: str, token=None) -> None:
+        """
+        Append a chunk; wait while a reader lags more than maxsize chunks
+
+        Args:
+            chunk: Output chunk
+            token: Producer's CancellationToken (stops waiting when cancelled)
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._chunks.append(chunk)
+            self.stats.chunks += 1
+            self.stats.chars += len(chunk)
+            self._cond.notify_all()
+
+            if not self._lagging():
+                return
+            self.stats.stalls += 1
+            start = time.monotonic()
+            while self._lagging() and not (token is not None and token.cancelled):
+                left = self.max_stall - (time.monotonic() - start)
+                if left <= 0:
+                    self.stats.overruns += 1
+                    break
+                self._cond.wait(min(left, _STALL_POLL))
+            self.stats.stall_seconds += time.monotonic() - start
+
+    def close(self, error: Optional[str] = None) -> None:
+        """End the stream (error: the producer did not complete); first call wins"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self.error = error
+            self._cond.notify_all()
+
+    def reader(self) -> 'StreamReader':
+        """New reader from the first chunk; the producer paces itself to it until it is closed"""
+        reader = StreamReader(self)
+        with self._cond:
+            self._readers.append(reader)
+        return reader
+
+    def _lagging(self) -> bool:
+        """A reader is more than maxsize chunks behind (lock held)"""
+        return any(len(self._chunks) - reader.position > self.maxsize for reader in self._readers)
+
+    def _detach(self, reader: 'StreamReader') -> None:
+        with self._cond:
+            if reader in self._readers:
+                self._readers.remove(reader)
+            self._cond.notify_all()
+
+
+class StreamReader(Iterator[str]):
+    """
+    Cursor of one consumer over a StepStream (iterate for chunks as they arrive)
+
+    Waiting for a chunk raises OperationCancelled once the consuming
+    step's token is cancelled.
+    """
+
+    def __init__(self, stream: StepStream):
+        self.stream = stream
+        self.position = 0
+
+    def __next__(self) -> str:
+        stream = self.stream
+        token = current_token()  # The consuming step's token
+        with stream._cond:
+            while self.position >= len(stream._chunks) and not stream._closed:
+                token.raise_if_cancelled()
+                stream._cond.wait(_STALL_POLL)
+            if self.position < len(stream._chunks):
+                chunk = stream._chunks[self.position]
+                self.position += 1
+                stream._cond.notify_all()  # Wake a producer waiting on this reader
+                return chunk
+            if stream.error is not None:
+                raise UpstreamFailed(f"{stream.name}: {stream.error}")
+            raise StopIteration
+
+    def drain(self) -> str:
+        """Wait for the end of the stream and return the complete output"""
+        for _ in self:
+            pass
+        return self.stream.text
+
+    def close(self) -> None:
+        """Stop reading; the producer no longer waits for this reader"""
+        self.stream._detach(self)
+
+
+class PipelinedContext(Mapping[str, str]):
+    """
+    Context of a step started while some dependencies are still running
+
+    Completed dependencies come from a StepContext; running ones from
+    stream readers created when the step was launched.
+    """
+
+    def __init__(self, base: StepContext, streams: Dict[str, StepStream], budget: ContextBudget):
+        """
+        Initialize pipelined context
+
+        Args:
+            base: Context of the completed dependencies
+            streams: Streams of the running dependencies by agent name
+            budget: Per-dependency size limit for context[name]
+        """
+        self.base = base
+        self.budget = budget
+        self._readers: Dict[str, StreamReader] = {
+            name: stream.reader() for name, stream in streams.items() if name not in base
+        }
+        self._values: Dict[str, str] = {}
+        self._clipped: List[str] = []
+
+    def __getitem__(self, agent_name: str) -> str:
+        reader = self._readers.get(agent_name)
+        if reader is None:
+            return self.base[agent_name]
+        value = self._values.get(agent_name)
+        if value is None:
+            full = reader.drain()
+            value = self.budget.apply(full)
+            self._values[agent_name] = value
+            if value != full:
+                self._clipped.append(agent_name)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.base
+        yield from self._readers
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self._readers)
+
+    def __repr__(self) -> str:
+        return f"PipelinedContext(completed={list(self.base)}, streaming={list(self._readers)})"
+
+    @property
+    def streaming(self) -> List[str]:
+        """Dependencies that were still running when the step started"""
+        return list(self._readers)
+
+    @property
+    def clipped(self) -> List[str]:
+        """Dependencies read so far whose output the budget clipped"""
+        return self.base.clipped + self._clipped
+
+    def stream(self, agent_name: str) -> Iterator[str]:
+        """Raw output chunks of a dependency as they arrive (the full output if it completed)"""
+        reader = self._readers.get(agent_name)
+        if reader is None:
+            return iter((self.base.store.get(self.base.refs[agent_name]),))
+        return reader
+
+    def close(self) -> None:
+        """Detach all readers (the step finished)"""
+        for reader in self._readers.values():
+            reader.close()
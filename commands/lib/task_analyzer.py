@@ -23,14 +23,43 @@ Usage:
     print(f"Primary intent: {analysis.intent}")
     print(f"Recommended agent: {analysis.primary_agent}")
     print(f"Confidence: {analysis.confidence}%")
+
+    # Bulk audit of a JSONL task log (compact rows, bounded memory):
+    for row in analyzer.analyze_stream("tasks.jsonl", processes=4):
+        print(row.intent, row.primary_agent, row.confidence)
+
+    python3 -m commands.lib.task_analyzer --stream tasks.jsonl --processes 4
 """
 
+import contextlib
+import json
 import re
-from typing import List, Optional, Dict
-from dataclasses import dataclass
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, IO, Iterable, Iterator, List, Optional, Dict, Tuple, Union
+from dataclasses import asdict, dataclass
 from enum import Enum
 
-from commands.lib.agent_registry import AgentRegistry, AgentMatch
+from commands.lib.agent_registry import (
+    PATTERN_CHINESE, AgentRegistry, AgentMatch, TaskQuery, get_agent_registry
+)
+from commands.lib.keyword_lexicon import (
+    COMPLEXITY_KEYWORDS, INTENT_KEYWORDS, TABLE_COMPLEXITY, TABLE_INTENT,
+    TABLE_TECH_STACK, TECH_STACK_KEYWORDS
+)
+from commands.lib.request_context import KIND_COMPLEXITY, KIND_INTENT, RequestContext
+
+# 关键词候选：2 个以上的连续字母或中文字符
+PATTERN_KEYWORD_TOKEN = re.compile(r'\b[a-zA-Z\u4e00-\u9fff]{2,}\b')
+
+# analyze_stream: rows per chunk, and chunks in flight per worker process
+STREAM_CHUNK_SIZE = 256
+STREAM_CHUNKS_PER_WORKER = 2
+
+# (line_number, raw_line)
+StreamRow = Tuple[int, str]
 
 
 class TaskIntent(Enum):
@@ -98,6 +127,21 @@ Explanation: {self.explanation}
 """
 
 
+@dataclass
+class TaskSummary:
+    """Compact per-row result of TaskAnalyzer.analyze_stream"""
+    line: int                       # 1-based line number in the input
+    task_id: Optional[Any]          # Row "id" field, if present
+    intent: Optional[str]           # TaskIntent value
+    complexity: Optional[str]       # TaskComplexity value
+    primary_agent: Optional[str]    # Top agent name (None if no match)
+    confidence: float               # Overall confidence (0-100), as in TaskAnalysis
+    error: Optional[str] = None     # Set when the row could not be parsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 class TaskAnalyzer:
     """
     Advanced task analyzer with intent recognition
@@ -115,84 +159,54 @@ class TaskAnalyzer:
         Initialize task analyzer
 
         Args:
-            registry: AgentRegistry instance (creates new if None)
+            registry: AgentRegistry instance (shared pooled registry if None)
         """
-        self.registry = registry or AgentRegistry()
+        self.registry = registry or get_agent_registry()
 
-        # Intent detection patterns
+        # Intent / complexity tables live in the shared keyword lexicon;
+        # these views are kept for callers that inspect them
         self.intent_patterns = {
-            TaskIntent.PLANNING: [
-                r'规划', r'设计', r'plan', r'design', r'架构',
-                r'方案', r'策略', r'roadmap'
-            ],
-            TaskIntent.IMPLEMENTATION: [
-                r'实现', r'开发', r'编写', r'添加', r'创建',
-                r'implement', r'develop', r'create', r'add', r'build'
-            ],
-            TaskIntent.DEBUGGING: [
-                r'调试', r'修复', r'解决', r'bug', r'debug',
-                r'fix', r'error', r'问题', r'错误'
-            ],
-            TaskIntent.TESTING: [
-                r'测试', r'验证', r'test', r'verify', r'coverage',
-                r'覆盖率', r'单元测试', r'集成测试'
-            ],
-            TaskIntent.REVIEWING: [
-                r'审查', r'检查', r'review', r'check', r'质量',
-                r'quality', r'评审', r'inspect'
-            ],
-            TaskIntent.REFACTORING: [
-                r'重构', r'优化', r'改进', r'refactor', r'optimize',
-                r'improve', r'cleanup', r'清理'
-            ],
-            TaskIntent.DOCUMENTATION: [
-                r'文档', r'说明', r'注释', r'document', r'doc',
-                r'readme', r'api文档', r'使用指南'
-            ],
-            TaskIntent.RESEARCH: [
-                r'研究', r'调研', r'评估', r'对比', r'research',
-                r'evaluate', r'compare', r'分析'
-            ],
-            TaskIntent.CONTEXT_LOADING: [
-                r'加载', r'上下文', r'恢复', r'load', r'context',
-                r'prime', r'初始化'
-            ]
+            TaskIntent(category): keywords for category, keywords in INTENT_KEYWORDS.items()
         }
+        self.complexity_indicators = COMPLEXITY_KEYWORDS
 
-        # Complexity indicators
-        self.complexity_indicators = {
-            'high': ['架构', '系统', '重构', '迁移', '集成', 'architecture', 'system', 'migration'],
-            'medium': ['模块', '组件', '功能', 'module', 'component', 'feature'],
-            'low': ['修复', '添加', '更新', 'fix', 'add', 'update']
-        }
-
-    def analyze(self, task_description: str) -> TaskAnalysis:
+    def analyze(
+        self,
+        task_description: Union[str, TaskQuery],
+        request_context: Optional[RequestContext] = None
+    ) -> TaskAnalysis:
         """
         Analyze task description and recommend agents
 
         Args:
-            task_description: User's task description
+            task_description: User's task description (str or TaskQuery)
+            request_context: Shared per-request memo (matches, intent and
+                complexity are computed at most once per request)
 
         Returns:
             TaskAnalysis with complete analysis result
         """
+        # Normalize once and share with every analysis step
+        ctx = RequestContext.of(task_description, request_context)
+        query = ctx.query
+
         # Step 1: Detect intent
-        intent, intent_conf = self._detect_intent(task_description)
+        intent, intent_conf = ctx.memoize((KIND_INTENT,), lambda: self._detect_intent(query))
 
         # Step 2: Get agent recommendations
-        matches = self.registry.select_agent(task_description, top_k=3)
+        matches = ctx.select_agent(self.registry, top_k=3)
         primary = matches[0] if matches else None
         fallback = matches[1:] if len(matches) > 1 else []
 
         # Step 3: Assess complexity
-        complexity = self._assess_complexity(task_description)
+        complexity = ctx.memoize((KIND_COMPLEXITY,), lambda: self._assess_complexity(query))
 
         # Step 4: Estimate effort
         effort = self._estimate_effort(complexity, intent)
 
         # Step 5: Extract keywords and technical stack
-        keywords = self._extract_keywords(task_description)
-        tech_stack = self._extract_technical_stack(task_description)
+        keywords = self._extract_keywords(query)
+        tech_stack = self._extract_technical_stack(query)
 
         # Step 6: Calculate overall confidence
         agent_conf = primary.score if primary else 0.0
@@ -209,7 +223,7 @@ class TaskAnalyzer:
         )
 
         return TaskAnalysis(
-            task_description=task_description,
+            task_description=query.text,
             intent=intent,
             intent_confidence=intent_conf,
             primary_agent=primary,
@@ -223,22 +237,112 @@ class TaskAnalyzer:
             suggestions=suggestions
         )
 
-    def _detect_intent(self, description: str) -> tuple[TaskIntent, float]:
+    def summarize(
+        self,
+        task_description: Union[str, TaskQuery],
+        line: int = 0,
+        task_id: Optional[Any] = None
+    ) -> TaskSummary:
+        """
+        Compact analysis: intent, complexity, primary agent and confidence
+
+        Same values as analyze(), without keywords, explanation or suggestions.
+        """
+        query = TaskQuery.of(task_description)
+        intent, intent_conf = self._detect_intent(query)
+        matches = self.registry.select_agent(query, top_k=1)
+        primary = matches[0] if matches else None
+        agent_conf = primary.score if primary else 0.0
+
+        return TaskSummary(
+            line=line,
+            task_id=task_id,
+            intent=intent.value,
+            complexity=self._assess_complexity(query).value,
+            primary_agent=primary.agent.name if primary else None,
+            confidence=(intent_conf * 0.4 + agent_conf * 0.6) * 100
+        )
+
+    def analyze_stream(
+        self,
+        source: Union[str, Path, Iterable[str]],
+        task_field: str = 'task',
+        processes: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[TaskSummary]:
+        """
+        Summarize every task of a JSONL log, one TaskSummary per row
+
+        Each line is a JSON object with the task text under task_field (a bare
+        JSON string also works). Rows are read lazily in chunks; with
+        processes > 1 the chunks fan out to a process pool with a bounded
+        number in flight, so memory stays flat for arbitrarily long logs.
+        Results are yielded in input order. Blank lines are skipped;
+        unparsable rows yield a summary with error set.
+
+        Args:
+            source: JSONL file path, or any iterable of lines (e.g. sys.stdin)
+            task_field: JSON field holding the task description
+            processes: Worker processes (None or 1 = in-process)
+            chunk_size: Rows per chunk
+
+        Yields:
+            TaskSummary per non-blank input line
+        """
+        chunks = _read_chunks(source, chunk_size)
+
+        if not processes or processes <= 1:
+            for chunk in chunks:
+                yield from self._summarize_rows(chunk, task_field)
+            return
+
+        max_pending = processes * STREAM_CHUNKS_PER_WORKER
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_stream_worker,
+            initargs=(str(self.registry.agents_dir),)
+        ) as pool:
+            pending = deque()
+            try:
+                for chunk in chunks:
+                    pending.append(pool.submit(_stream_worker, chunk, task_field))
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                # Consumer stopped early: drop chunks that have not started
+                for future in pending:
+                    future.cancel()
+
+    def _summarize_rows(self, rows: List[StreamRow], task_field: str) -> List[TaskSummary]:
+        """Summarize one chunk of raw JSONL rows"""
+        summaries = []
+        for line, raw in rows:
+            try:
+                task_id, task = _parse_row(raw, task_field)
+            except ValueError as e:
+                summaries.append(TaskSummary(
+                    line=line, task_id=None, intent=None, complexity=None,
+                    primary_agent=None, confidence=0.0, error=str(e)
+                ))
+                continue
+            summaries.append(self.summarize(task, line=line, task_id=task_id))
+        return summaries
+
+    def _detect_intent(self, description: Union[str, TaskQuery]) -> tuple[TaskIntent, float]:
         """
         Detect primary intent from description
 
         Returns:
             (intent, confidence)
         """
-        desc_lower = description.lower()
+        hits = TaskQuery.of(description).lexicon_hits
         scores = {}
 
+        # Table order is kept so ties resolve to the earlier intent
         for intent, patterns in self.intent_patterns.items():
-            score = 0.0
-            for pattern in patterns:
-                if re.search(pattern, desc_lower):
-                    score += 1.0
-
+            score = float(hits.count(TABLE_INTENT, intent.value))
             if score > 0:
                 scores[intent] = score / len(patterns)  # Normalize
 
@@ -249,19 +353,17 @@ class TaskAnalyzer:
         best_intent = max(scores.items(), key=lambda x: x[1])
         return best_intent[0], best_intent[1]
 
-    def _assess_complexity(self, description: str) -> TaskComplexity:
+    def _assess_complexity(self, description: Union[str, TaskQuery]) -> TaskComplexity:
         """Assess task complexity based on indicators"""
-        desc_lower = description.lower()
+        hits = TaskQuery.of(description).lexicon_hits
 
         # Check for high complexity indicators
-        for indicator in self.complexity_indicators['high']:
-            if indicator in desc_lower:
-                return TaskComplexity.COMPLEX
+        if hits.has(TABLE_COMPLEXITY, 'high'):
+            return TaskComplexity.COMPLEX
 
         # Check for medium complexity indicators
-        for indicator in self.complexity_indicators['medium']:
-            if indicator in desc_lower:
-                return TaskComplexity.MODERATE
+        if hits.has(TABLE_COMPLEXITY, 'medium'):
+            return TaskComplexity.MODERATE
 
         # Default to simple
         return TaskComplexity.SIMPLE
@@ -286,30 +388,27 @@ class TaskAnalyzer:
 
         return base_estimates[complexity]
 
-    def _extract_keywords(self, description: str) -> List[str]:
+    def _extract_keywords(self, description: Union[str, TaskQuery]) -> List[str]:
         """Extract important keywords from description"""
-        # Simple keyword extraction (can be enhanced with NLP)
-        words = re.findall(r'\b[a-zA-Z\u4e00-\u9fff]{2,}\b', description)
+        words = []
+        for word in PATTERN_KEYWORD_TOKEN.findall(TaskQuery.of(description).text):
+            if PATTERN_CHINESE.search(word):
+                # 中文片段：按 agent 词典分词（未登录部分保持整段）
+                words.extend(
+                    token for token in self.registry.segmenter.segment(word, bigram_fallback=False)
+                    if len(token) >= 2
+                )
+            else:
+                words.append(word)
         # Remove common stop words
         stop_words = {'的', '和', '与', '或', '是', 'the', 'a', 'an', 'and', 'or', 'is'}
         return [w for w in words if w.lower() not in stop_words][:10]
 
-    def _extract_technical_stack(self, description: str) -> List[str]:
+    def _extract_technical_stack(self, description: Union[str, TaskQuery]) -> List[str]:
         """Extract technical stack mentions from description"""
-        # Common tech stack patterns
-        tech_patterns = [
-            r'Python', r'JavaScript', r'TypeScript', r'React', r'Vue',
-            r'Flask', r'Django', r'FastAPI', r'Express', r'Node',
-            r'PostgreSQL', r'MongoDB', r'Redis', r'Docker', r'Kubernetes',
-            r'JWT', r'OAuth', r'REST', r'GraphQL', r'gRPC'
-        ]
-
-        found_tech = []
-        for pattern in tech_patterns:
-            if re.search(pattern, description, re.IGNORECASE):
-                found_tech.append(pattern)
-
-        return found_tech
+        hits = TaskQuery.of(description).lexicon_hits
+        # Common tech stack names, in table order
+        return [name for name in TECH_STACK_KEYWORDS if hits.has(TABLE_TECH_STACK, name)]
 
     def _generate_explanation(
         self,
@@ -385,16 +484,113 @@ class TaskAnalyzer:
         return suggestions
 
 
+def _parse_row(raw: str, task_field: str) -> Tuple[Optional[Any], str]:
+    """
+    Extract (task_id, task) from one JSONL line
+
+    Raises:
+        ValueError: Invalid JSON or no task text
+    """
+    try:
+        row = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e.msg}") from None
+
+    if isinstance(row, str):
+        return None, row
+    if not isinstance(row, dict):
+        raise ValueError(f"expected object, got {type(row).__name__}")
+
+    task = row.get(task_field)
+    if not isinstance(task, str):
+        raise ValueError(f"missing '{task_field}' field")
+    return row.get('id'), task
+
+
+def _read_chunks(
+    source: Union[str, Path, Iterable[str]], chunk_size: int
+) -> Iterator[List[StreamRow]]:
+    """Read non-blank lines lazily as chunks of (line_number, line)"""
+    if isinstance(source, (str, Path)):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from _read_chunks(f, chunk_size)
+        return
+
+    chunk: List[StreamRow] = []
+    for line_no, raw in enumerate(source, 1):
+        if not raw.strip():
+            continue
+        chunk.append((line_no, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ==================== Process pool workers ====================
+
+_worker_analyzer: Optional[TaskAnalyzer] = None
+
+
+def _init_stream_worker(agents_dir: str) -> None:
+    """Load one analyzer per worker process (cheap with the agent catalog)"""
+    global _worker_analyzer
+    # Keep stdout for result rows: registry load messages go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        _worker_analyzer = TaskAnalyzer(AgentRegistry(agents_dir))
+
+
+def _stream_worker(rows: List[StreamRow], task_field: str) -> List[TaskSummary]:
+    return _worker_analyzer._summarize_rows(rows, task_field)
+
+
+def _stream_main(argv: List[str]) -> None:
+    """CLI: summarize a JSONL task log as JSONL on stdout"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(
+        prog="task_analyzer.py --stream",
+        description="Summarize a JSONL task log (intent, complexity, agent, confidence)"
+    )
+    parser.add_argument('tasks_file', help="JSONL file, one task per line ('-' for stdin)")
+    parser.add_argument('--field', default='task', help="JSON field with the task text")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.tasks_file == '-' else args.tasks_file
+    with contextlib.redirect_stdout(sys.stderr):
+        analyzer = TaskAnalyzer()
+    start = time.perf_counter()
+    rows = errors = 0
+
+    for summary in analyzer.analyze_stream(
+        source, task_field=args.field, processes=args.processes, chunk_size=args.chunk_size
+    ):
+        rows += 1
+        errors += summary.error is not None
+        print(json.dumps(summary.to_dict(), ensure_ascii=False))
+
+    elapsed = time.perf_counter() - start
+    print(f"\nAnalyzed {rows} rows ({errors} errors) in {elapsed:.3f}s", file=sys.stderr)
+
+
 def main():
     """CLI interface for testing TaskAnalyzer"""
-    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == '--stream':
+        _stream_main(sys.argv[2:])
+        return
 
     if len(sys.argv) < 2:
         print("Usage: task_analyzer.py <task_description>")
+        print("       task_analyzer.py --stream <tasks.jsonl> [--processes N]")
         print("\nExample:")
         print("  python task_analyzer.py '实现用户登录功能'")
         print("  python task_analyzer.py '修复支付API的bug'")
         print("  python task_analyzer.py '设计数据库架构'")
+        print("  python task_analyzer.py --stream tasks.jsonl --processes 4")
         sys.exit(1)
 
     task = ' '.join(sys.argv[1:])
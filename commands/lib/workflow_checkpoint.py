@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Workflow Checkpoint - Persist completed steps so workflows can resume
+
+This module provides CheckpointStore, the state files CoordinationEngine
+writes after each completed step (step outputs, accumulated context, the
+workflow definition and its content hash), and build_workflow(), which
+rebuilds a stored definition so CoordinationEngine.resume() can skip the
+completed steps.
+
+Design Principles:
+- One JSON state file per workflow id, rewritten atomically (temp file +
+  os.replace) so a crash never leaves a torn checkpoint
+- Only COMPLETED steps are restored; failed, timed-out and cancelled steps
+  run again
+- The content hash covers mode and steps (agent, role, dependencies,
+  parallel group); a changed definition refuses to resume
+- The stored definition rebuilds the workflow from the agent registry, so
+  resume only needs the workflow id
+
+Usage:
+    from commands.lib.coordination_engine import CoordinationEngine
+    from commands.lib.workflow_checkpoint import CheckpointStore
+
+    engine = CoordinationEngine(checkpoint_store=CheckpointStore())
+    result = engine.execute(workflow, workflow_id="auth-system")
+    if result.status != ExecutionStatus.COMPLETED:
+        result = engine.resume("auth-system")
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from commands.lib.agent_router import AgentWorkflow, CoordinationMode, WorkflowStep
+
+# Default directory of checkpoint state files
+DEFAULT_CHECKPOINT_DIR = Path.home() / ".claude" / "workflow_checkpoints"
+
+# Bump when the state file layout changes
+CHECKPOINT_VERSION = 1
+
+# Workflow ids become file names
+WORKFLOW_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+@dataclass
+class StepCheckpoint:
+    """Persisted result of one completed step"""
+    agent_name: str
+    output: str
+    duration: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class WorkflowCheckpoint:
+    """State file contents"""
+    workflow_id: str
+    workflow_hash: str
+    definition: Dict[str, Any]
+    # Step index (as str, JSON keys) -> completed step
+    completed: Dict[str, StepCheckpoint] = field(default_factory=dict)
+    # Outputs of completed steps by agent name, in step order
+    context: Dict[str, str] = field(default_factory=dict)
+    status: str = "running"
+    updated_at: float = 0.0
+
+    def completed_indices(self) -> List[int]:
+        return sorted(int(index) for index in self.completed)
+
+
+def workflow_definition(workflow: AgentWorkflow) -> Dict[str, Any]:
+    """JSON-serializable definition of a workflow (agents by name)"""
+    return {
+        "mode": workflow.mode.value,
+        "primary_agent": workflow.primary_agent.name,
+        "estimated_time": workflow.estimated_time,
+        "confidence": workflow.confidence,
+        "explanation": workflow.explanation,
+        "steps": [
+            {
+                "agent": step.agent.name,
+                "role": step.role,
+                "dependencies": list(step.dependencies),
+                "parallel_group": step.parallel_group,
+            }
+            for step in workflow.steps
+        ],
+    }
+
+
+def workflow_hash(workflow: AgentWorkflow) -> str:
+    """Content hash of the parts of a workflow that determine its step outputs"""
+    definition = workflow_definition(workflow)
+    payload = json.dumps(
+        {"mode": definition["mode"], "steps": definition["steps"]},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_workflow(definition: Dict[str, Any], registry=None) -> AgentWorkflow:
+    """
+    Rebuild a workflow from its stored definition
+
+    Args:
+        definition: Output of workflow_definition
+        registry: AgentRegistry to resolve agents (default: the shared registry)
+
+    Raises:
+        ValueError: If an agent no longer exists
+    """
+    if registry is None:
+        from commands.lib.agent_registry import get_agent_registry
+        registry = get_agent_registry()
+
+    def agent(name: str):
+        found = registry.get_agent(name)
+        if found is None:
+            raise ValueError(f"Agent no longer exists: {name}")
+        return found
+
+    return AgentWorkflow(
+        mode=CoordinationMode(definition["mode"]),
+        primary_agent=agent(definition["primary_agent"]),
+        steps=[
+            WorkflowStep(
+                agent=agent(step["agent"]),
+                role=step["role"],
+                dependencies=list(step["dependencies"]),
+                parallel_group=step.get("parallel_group"),
+            )
+            for step in definition["steps"]
+        ],
+        estimated_time=definition.get("estimated_time", ""),
+        confidence=definition.get("confidence", 0.0),
+        explanation=definition.get("explanation", ""),
+    )
+
+
+class CheckpointStore:
+    """
+    Directory of workflow checkpoint files (<workflow_id>.json)
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize checkpoint store
+
+        Args:
+            directory: State file directory (default: ~/.claude/workflow_checkpoints)
+        """
+        self.directory = Path(directory) if directory else DEFAULT_CHECKPOINT_DIR
+
+    def path(self, workflow_id: str) -> Path:
+        """State file of a workflow id"""
+        if not WORKFLOW_ID_PATTERN.match(workflow_id):
+            raise ValueError(f"Invalid workflow id: {workflow_id!r}")
+        return self.directory / f"{workflow_id}.json"
+
+    def save(self, checkpoint: WorkflowCheckpoint) -> None:
+        """Atomically write a checkpoint (temp file + os.replace)"""
+        path = self.path(checkpoint.workflow_id)
+        checkpoint.updated_at = time.time()
+        data = {"version": CHECKPOINT_VERSION, **asdict(checkpoint)}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=path.name, suffix='.tmp', dir=str(self.directory))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def load(self, workflow_id: str) -> Optional[WorkflowCheckpoint]:
+        """
+        Read a checkpoint
+
+        Returns:
+            The checkpoint, or None if there is none
+
+        Raises:
+            ValueError: If the state file is unreadable or from another version
+        """
+        try:
+            with open(self.path(workflow_id), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Unreadable checkpoint {workflow_id}: {e}")
+
+        if data.pop("version", None) != CHECKPOINT_VERSION:
+            raise ValueError(f"Checkpoint {workflow_id} has an unsupported version")
+        data["completed"] = {
+            index: StepCheckpoint(**step) for index, step in data.get("completed", {}).items()
+        }
+        return WorkflowCheckpoint(**data)
+
+    def delete(self, workflow_id: str) -> bool:
+        """Delete a checkpoint; returns False if there was none"""
+        try:
+            self.path(workflow_id).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list(self) -> List[str]:
+        """Workflow ids with a checkpoint"""
+        if not self.directory.is_dir():
+            return []
+        return sorted(path.stem for path in self.directory.glob("*.json"))
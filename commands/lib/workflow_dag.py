@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Workflow DAG - Linear-time validation of workflow step dependencies
+
+Workflow steps name the agents they depend on. This module resolves those
+names into a step graph and validates it in O(steps + dependencies):
+Tarjan's algorithm finds every cycle, Kahn's algorithm finds the steps
+that can never start and produces the topological levels that schedulers
+and estimators reuse.
+
+Design Principles:
+- Dependencies name agents; each resolves to the latest earlier step of
+  that agent, else to its first step (forward reference). A repeated agent
+  (e.g. coordinator + merge step) is therefore a separate node
+- Reports every cycle (strongly connected component or self-loop), every
+  missing dependency, every step blocked by them, and duplicate agents
+- Duplicate agents are warnings only: parallel and hierarchical workflows
+  legitimately repeat their coordinator
+- Iterative algorithms only (no recursion limit on large composite workflows)
+
+Usage:
+    from commands.lib.workflow_dag import validate_workflow
+
+    validation = validate_workflow([
+        ("pm-agent", []),
+        ("code-agent", ["pm-agent"]),
+        ("test-agent", ["pm-agent"]),
+        ("pm-agent", ["code-agent", "test-agent"]),
+    ])
+    validation.is_valid          # True
+    validation.level_names()     # [['pm-agent'], ['code-agent', 'test-agent'], ['pm-agent']]
+    validation.conflicts()       # ["Duplicate agents detected: {'pm-agent'}"]
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+# (agent_name, dependency agent names)
+StepSpec = Tuple[str, Sequence[str]]
+
+
+@dataclass
+class WorkflowValidation:
+    """Result of validate_workflow (step references are indices into steps)"""
+    steps: List[StepSpec]
+    predecessors: List[List[int]]
+    # Topological levels of every startable step (level = longest chain of predecessors)
+    levels: List[List[int]] = field(default_factory=list)
+    # Cycles as step indices, in step order (self-loops are one-step cycles)
+    cycles: List[List[int]] = field(default_factory=list)
+    # (step index, missing dependency name)
+    missing_dependencies: List[Tuple[int, str]] = field(default_factory=list)
+    # Other steps that can never start (downstream of a cycle or missing dependency)
+    unreachable: List[int] = field(default_factory=list)
+    # Agent name -> number of steps using it (only names used more than once)
+    duplicates: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def is_valid(self) -> bool:
+        """True if every step can run (duplicates do not count)"""
+        return not (self.cycles or self.missing_dependencies or self.unreachable)
+
+    def name(self, index: int) -> str:
+        """Agent name of a step"""
+        return self.steps[index][0]
+
+    def level_names(self) -> List[List[str]]:
+        """Topological levels as agent names"""
+        return [[self.name(i) for i in level] for level in self.levels]
+
+    def conflicts(self) -> List[str]:
+        """Human readable problems (the AgentRouter.detect_conflicts format)"""
+        conflicts = []
+        if self.duplicates:
+            conflicts.append(f"Duplicate agents detected: {set(self.duplicates)}")
+
+        for cycle in self.cycles:
+            if len(cycle) == 1:
+                conflicts.append(f"Circular dependency: {self.name(cycle[0])} depends on itself")
+            else:
+                names = [self.name(i) for i in cycle]
+                conflicts.append(f"Circular dependency among steps: {names}")
+
+        for index, dependency in self.missing_dependencies:
+            conflicts.append(f"Missing dependency: {self.name(index)} depends on unknown {dependency}")
+
+        if self.unreachable:
+            names = [self.name(i) for i in self.unreachable]
+            conflicts.append(f"Unreachable steps (blocked by cycles or missing dependencies): {names}")
+        return conflicts
+
+
+def resolve_dependencies(steps: Sequence[StepSpec]) -> Tuple[List[List[int]], List[Tuple[int, str]]]:
+    """
+    Map dependency agent names to step indices
+
+    Returns:
+        (predecessors per step, [(step index, unknown dependency name), ...]);
+        a step depending on its own agent with no earlier step of that agent
+        is its own predecessor (self-loop)
+    """
+    first: Dict[str, int] = {}
+    for index, (name, _) in enumerate(steps):
+        first.setdefault(name, index)
+
+    latest: Dict[str, int] = {}
+    predecessors: List[List[int]] = []
+    missing: List[Tuple[int, str]] = []
+    for index, (name, dependencies) in enumerate(steps):
+        preds: Dict[int, None] = {}  # ordered set
+        for dep in dependencies:
+            # Earlier step of that agent, else a forward reference
+            pred = latest.get(dep, first.get(dep))
+            if pred is None:
+                missing.append((index, dep))
+            else:
+                preds[pred] = None
+        predecessors.append(list(preds))
+        latest[name] = index
+    return predecessors, missing
+
+
+def find_cycles(predecessors: Sequence[Sequence[int]]) -> List[List[int]]:
+    """
+    Every cycle of the step graph (Tarjan's SCC, iterative)
+
+    Returns:
+        Strongly connected components with more than one step, plus
+        self-loops; each sorted by step index, ordered by first step
+    """
+    count = len(predecessors)
+    index_of = [-1] * count
+    lowlink = [0] * count
+    on_stack = [False] * count
+    stack: List[int] = []
+    cycles: List[List[int]] = []
+    counter = 0
+
+    for root in range(count):
+        if index_of[root] != -1:
+            continue
+        # (node, position in its predecessor list)
+        work = [(root, 0)]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+
+        while work:
+            node, position = work[-1]
+            edges = predecessors[node]
+            if position < len(edges):
+                work[-1] = (node, position + 1)
+                nxt = edges[position]
+                if index_of[nxt] == -1:
+                    index_of[nxt] = lowlink[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack[nxt] = True
+                    work.append((nxt, 0))
+                elif on_stack[nxt]:
+                    lowlink[node] = min(lowlink[node], index_of[nxt])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in predecessors[node]:
+                    cycles.append(sorted(component))
+
+    cycles.sort(key=lambda c: c[0])
+    return cycles
+
+
+def topological_levels(
+    predecessors: Sequence[Sequence[int]], blocked: Sequence[int] = ()
+) -> Tuple[List[List[int]], List[int]]:
+    """
+    Kahn's algorithm by waves
+
+    Args:
+        predecessors: Predecessor indices per step
+        blocked: Steps that can never start (e.g. with a missing dependency)
+
+    Returns:
+        (levels, steps never released), both in step order
+    """
+    count = len(predecessors)
+    in_degree = [len(preds) for preds in predecessors]
+    for node in blocked:
+        in_degree[node] += 1
+    successors: List[List[int]] = [[] for _ in range(count)]
+    for node, preds in enumerate(predecessors):
+        for pred in preds:
+            successors[pred].append(node)
+
+    levels: List[List[int]] = []
+    wave = [node for node in range(count) if in_degree[node] == 0]
+    while wave:
+        levels.append(wave)
+        released = []
+        for node in wave:
+            for succ in successors[node]:
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    released.append(succ)
+        wave = sorted(released)
+
+    remaining = [node for node in range(count) if in_degree[node] > 0]
+    return levels, remaining
+
+
+def validate_workflow(steps: Sequence[StepSpec]) -> WorkflowValidation:
+    """
+    Validate workflow dependencies in O(steps + dependencies)
+
+    Args:
+        steps: (agent_name, dependencies) per step, in workflow order
+
+    Returns:
+        WorkflowValidation with levels, cycles, missing dependencies,
+        unreachable steps and duplicate agents
+    """
+    steps = [(name, list(dependencies)) for name, dependencies in steps]
+    predecessors, missing = resolve_dependencies(steps)
+    cycles = find_cycles(predecessors)
+
+    blocked = sorted({index for index, _ in missing})
+    levels, remaining = topological_levels(predecessors, blocked)
+    reported = {node for cycle in cycles for node in cycle}.union(blocked)
+
+    counts = Counter(name for name, _ in steps)
+    return WorkflowValidation(
+        steps=steps,
+        predecessors=predecessors,
+        levels=levels,
+        cycles=cycles,
+        missing_dependencies=missing,
+        unreachable=[node for node in remaining if node not in reported],
+        duplicates={name: n for name, n in counts.items() if n > 1}
+    )
+
+
+def main():
+    """CLI: validate a workflow given as agent[:dep,dep] arguments"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate workflow step dependencies")
+    parser.add_argument('steps', nargs='+',
+                        help="Steps in order, e.g. pm-agent code-agent:pm-agent test-agent:pm-agent")
+    args = parser.parse_args()
+
+    steps: List[StepSpec] = []
+    for spec in args.steps:
+        name, _, deps = spec.partition(':')
+        steps.append((name, [d for d in deps.split(',') if d]))
+
+    validation = validate_workflow(steps)
+    print(f"Valid: {validation.is_valid}")
+    for level, names in enumerate(validation.level_names()):
+        print(f"  Level {level}: {', '.join(names)}")
+    for conflict in validation.conflicts():
+        print(f"  ⚠️  {conflict}")
+
+
+if __name__ == '__main__':
+    main()
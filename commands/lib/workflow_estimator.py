@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Workflow Estimator - History-driven critical-path time estimation
+
+This module provides WorkflowEstimator, which estimates how long a workflow
+takes from its critical path: the workflow DAG is built from the step
+dependencies, each step costs its agent's p50/p90 duration recorded in
+AgentExecutionHistory, and default durations are used as the fallback for
+agents without enough history.
+
+Design Principles:
+- Parallel branches cost their slowest branch, not their sum
+- Per-agent p50/p90 from history once an agent has min_samples records;
+  default durations otherwise (15 / 30 minutes per step)
+- Dependencies resolve to steps like workflow_dag.resolve_dependencies, so
+  a repeated agent (e.g. a merge step) is its own node
+- Dependencies on agents outside the workflow are ignored; cycles raise ValueError
+- Per-agent statistics are cached until the history changes
+
+Usage:
+    from commands.lib.workflow_estimator import WorkflowEstimator
+
+    estimator = WorkflowEstimator(history)
+    estimate = estimator.estimate([
+        ("architect-agent", []),
+        ("code-agent", ["architect-agent"]),
+        ("test-agent", ["architect-agent"]),
+        ("review-agent", ["code-agent", "test-agent"]),
+    ])
+    print(estimate.format())       # "45-90 minutes"
+    print(estimate.critical_path)  # ['architect-agent', 'code-agent', 'review-agent']
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from commands.lib.agent_execution_history import AgentExecutionHistory
+from commands.lib.workflow_dag import StepSpec, resolve_dependencies
+
+# Step duration (seconds) when an agent has too little history
+DEFAULT_P50_SECONDS = 15 * 60
+DEFAULT_P90_SECONDS = 30 * 60
+
+# Minimum recorded executions before history replaces the defaults
+DEFAULT_MIN_SAMPLES = 3
+
+
+@dataclass
+class StepEstimate:
+    """Duration estimate of one step (seconds)"""
+    agent_name: str
+    p50: float
+    p90: float
+    source: str  # "history" | "default"
+    samples: int = 0
+
+
+@dataclass
+class WorkflowEstimate:
+    """Critical-path duration of a workflow (seconds)"""
+    p50_seconds: float
+    p90_seconds: float
+    critical_path: List[str] = field(default_factory=list)  # p50 path, in execution order
+    steps: List[StepEstimate] = field(default_factory=list)
+
+    def format(self) -> str:
+        """Human readable range, e.g. "45-90 minutes\""""
+        low = math.ceil(self.p50_seconds / 60)
+        high = max(low, math.ceil(self.p90_seconds / 60))
+        return f"{low}-{high} minutes"
+
+    def __str__(self) -> str:
+        return self.format()
+
+
+class WorkflowEstimator:
+    """
+    Critical-path estimator over per-agent duration distributions
+    """
+
+    def __init__(
+        self,
+        history: Optional[AgentExecutionHistory] = None,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        default_p50: float = DEFAULT_P50_SECONDS,
+        default_p90: float = DEFAULT_P90_SECONDS
+    ):
+        """
+        Initialize workflow estimator
+
+        Args:
+            history: Execution history with recorded durations (None = defaults only)
+            min_samples: Records an agent needs before its history is used
+            default_p50: Default median step duration in seconds
+            default_p90: Default p90 step duration in seconds
+        """
+        self.history = history
+        self.min_samples = min_samples
+        self.default_p50 = default_p50
+        self.default_p90 = default_p90
+        self._stats: Dict[str, StepEstimate] = {}
+        self._stats_key: Optional[Tuple[int, int]] = None
+
+    def agent_estimate(self, agent_name: str) -> StepEstimate:
+        """Duration estimate of one step run by agent_name"""
+        history = self.history
+        if history is None:
+            return StepEstimate(agent_name, self.default_p50, self.default_p90, "default")
+
+        # Records are append-only in practice; a new list or length means new data
+        key = (id(history.records), len(history.records))
+        if key != self._stats_key:
+            self._stats = {}
+            self._stats_key = key
+
+        estimate = self._stats.get(agent_name)
+        if estimate is None:
+            stats = history.get_duration_percentiles(agent_name, (50, 90))
+            samples = int(stats["count"])
+            if samples >= self.min_samples:
+                estimate = StepEstimate(agent_name, stats["p50"], stats["p90"], "history", samples)
+            else:
+                estimate = StepEstimate(
+                    agent_name, self.default_p50, self.default_p90, "default", samples
+                )
+            self._stats[agent_name] = estimate
+        return estimate
+
+    def estimate(self, steps: Sequence[StepSpec]) -> WorkflowEstimate:
+        """
+        Estimate a workflow by its critical path
+
+        Args:
+            steps: (agent_name, dependencies) per step, in workflow order
+
+        Returns:
+            WorkflowEstimate (p50 and p90 critical paths are computed separately)
+
+        Raises:
+            ValueError: If the dependencies contain a cycle
+        """
+        step_estimates = [self.agent_estimate(name) for name, _ in steps]
+        predecessors, _ = resolve_dependencies(steps)
+
+        successors: List[List[int]] = [[] for _ in steps]
+        in_degree = [len(preds) for preds in predecessors]
+        for node, preds in enumerate(predecessors):
+            for pred in preds:
+                successors[pred].append(node)
+
+        # Kahn's algorithm; finish times relax along the topological order
+        finish50 = [0.0] * len(steps)
+        finish90 = [0.0] * len(steps)
+        best_pred: List[Optional[int]] = [None] * len(steps)
+        queue = deque(node for node, degree in enumerate(in_degree) if degree == 0)
+        visited = 0
+        while queue:
+            node = queue.popleft()
+            visited += 1
+            finish50[node] += step_estimates[node].p50
+            finish90[node] += step_estimates[node].p90
+            for succ in successors[node]:
+                # Until popped, finish holds the latest predecessor finish (start time)
+                if best_pred[succ] is None or finish50[node] > finish50[succ]:
+                    finish50[succ] = finish50[node]
+                    best_pred[succ] = node
+                finish90[succ] = max(finish90[succ], finish90[node])
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
+
+        if visited < len(steps):
+            cyclic = sorted({steps[node][0] for node, degree in enumerate(in_degree) if degree > 0})
+            raise ValueError(f"Workflow dependencies contain a cycle: {cyclic}")
+
+        if not steps:
+            return WorkflowEstimate(0.0, 0.0)
+
+        # Walk back from the step that finishes last
+        node: Optional[int] = max(range(len(steps)), key=lambda i: finish50[i])
+        path: List[str] = []
+        while node is not None:
+            path.append(steps[node][0])
+            node = best_pred[node]
+        path.reverse()
+
+        return WorkflowEstimate(
+            p50_seconds=max(finish50),
+            p90_seconds=max(finish90),
+            critical_path=path,
+            steps=step_estimates
+        )
+
+
+def main():
+    """CLI: estimate a chain or fan-out of agents from an execution history file"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Critical-path workflow time estimation")
+    parser.add_argument('agents', nargs='+', help="Agent names (first one is the entry step)")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Run the other agents in parallel after the first one")
+    parser.add_argument('--history', default=None, help="Execution history JSON file")
+    args = parser.parse_args()
+
+    head, rest = args.agents[0], args.agents[1:]
+    steps: List[StepSpec] = [(head, [])]
+    for name in rest:
+        steps.append((name, [head] if args.parallel else [steps[-1][0]]))
+
+    estimator = WorkflowEstimator(AgentExecutionHistory(args.history))
+    estimate = estimator.estimate(steps)
+    for step in estimate.steps:
+        print(f"  {step.agent_name}: p50 {step.p50 / 60:.1f} min, p90 {step.p90 / 60:.1f} min "
+              f"({step.source}, {step.samples} samples)")
+    print(f"Estimated: {estimate.format()}")
+    print(f"Critical path: {' → '.join(estimate.critical_path)}")
+
+
+if __name__ == '__main__':
+    main()
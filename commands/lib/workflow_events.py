@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Workflow Events - Non-blocking event stream for workflow execution
+
+This module provides EventBus, which publishes the typed events of a
+CoordinationEngine run (workflow and step lifecycle, output chunks,
+progress, conflicts) to any number of subscriptions, each with its own
+bounded queue, plus JsonlEventSink for writing them to a file.
+
+Design Principles:
+- publish() is O(1) per subscription and never blocks: a full queue
+  coalesces or drops instead of applying backpressure to the workflow
+- Lossy events (progress, step_output_chunk) absorb the overflow: pending
+  progress is replaced by the newest value, output chunks of the same step
+  are concatenated; only when nothing can be merged is the oldest lossy
+  event dropped
+- Lifecycle events (workflow/step started and completed, conflicts) are
+  never dropped; there are O(steps) of them per workflow
+- Consumers read with `async for` or a blocking get(); JsonlEventSink
+  writes events to a file from its own thread
+- Dropped and coalesced events are counted per subscription
+
+Usage:
+    from commands.lib.coordination_engine import CoordinationEngine
+    from commands.lib.workflow_events import JsonlEventSink
+
+    engine = CoordinationEngine(event_sinks=[JsonlEventSink("events.jsonl")])
+
+    async def run(workflow):
+        events = engine.events()          # subscribe before execution starts
+        execution = asyncio.create_task(asyncio.to_thread(engine.execute, workflow))
+        async for event in events:        # ends after workflow_completed
+            print(event.type.value, event.agent_name, event.data)
+        return await execution
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Queued events per subscription before the drop/coalesce policy applies
+DEFAULT_QUEUE_SIZE = 256
+
+
+class EventType(Enum):
+    """Workflow event types"""
+    WORKFLOW_STARTED = "workflow_started"
+    STEP_STARTED = "step_started"
+    STEP_OUTPUT_CHUNK = "step_output_chunk"
+    STEP_COMPLETED = "step_completed"
+    CONFLICT_DETECTED = "conflict_detected"
+    PROGRESS = "progress"
+    WORKFLOW_COMPLETED = "workflow_completed"
+
+
+# Events a slow consumer may lose (coalesced or dropped when its queue is full)
+LOSSY_EVENTS = frozenset({EventType.PROGRESS, EventType.STEP_OUTPUT_CHUNK})
+
+
+@dataclass
+class WorkflowEvent:
+    """One workflow event"""
+    type: EventType
+    sequence: int
+    timestamp: float
+    step_index: Optional[int] = None
+    agent_name: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable representation"""
+        return {
+            "type": self.type.value,
+            "sequence": self.sequence,
+            "timestamp": self.timestamp,
+            "step_index": self.step_index,
+            "agent_name": self.agent_name,
+            "data": self.data,
+        }
+
+
+@dataclass
+class SubscriptionStats:
+    """Overflow counters of one subscription"""
+    delivered: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+
+
+class EventSubscription:
+    """
+    Bounded event queue of one consumer
+
+    Filled by EventBus.publish from any thread; read with `async for`
+    (any event loop) or get() (blocking, any thread).
+    """
+
+    def __init__(self, bus: "EventBus", maxsize: int = DEFAULT_QUEUE_SIZE, until_completed: bool = False):
+        """
+        Initialize subscription
+
+        Args:
+            bus: Bus this subscription belongs to
+            maxsize: Queued events before lossy events are coalesced or dropped
+            until_completed: Close after the next workflow_completed event
+        """
+        self.bus = bus
+        self.maxsize = max(1, maxsize)
+        self.until_completed = until_completed
+        self.stats = SubscriptionStats()
+        self._queue: Deque[WorkflowEvent] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        # (loop, future) of a pending `async for` step
+        self._waiter: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        """Queued events"""
+        return len(self._queue)
+
+    def put(self, event: WorkflowEvent):
+        """Enqueue without blocking, applying the drop/coalesce policy"""
+        with self._condition:
+            if self._closed:
+                return
+            if len(self._queue) < self.maxsize or not self._make_room(event):
+                self._queue.append(event)
+            if self.until_completed and event.type == EventType.WORKFLOW_COMPLETED:
+                self._closed = True
+            self._wake()
+
+        if self._closed:
+            self.bus.unsubscribe(self)
+
+    def _make_room(self, event: WorkflowEvent) -> bool:
+        """
+        Handle an event arriving at a full queue
+
+        Returns:
+            True if the event was absorbed (coalesced or dropped), False if
+            it must still be appended
+        """
+        queue = self._queue
+        if event.type == EventType.PROGRESS:
+            for position in range(len(queue) - 1, -1, -1):
+                if queue[position].type == EventType.PROGRESS:
+                    # Superseded: the newest progress moves to the tail
+                    del queue[position]
+                    self.stats.coalesced += 1
+                    return False
+        elif event.type == EventType.STEP_OUTPUT_CHUNK:
+            for position in range(len(queue) - 1, -1, -1):
+                pending = queue[position]
+                if pending.type == EventType.STEP_OUTPUT_CHUNK and pending.step_index == event.step_index:
+                    # Keeps its place (and sequence) in the stream, with the text appended
+                    queue[position] = replace(pending, data={
+                        "chunk": pending.data.get("chunk", "") + event.data.get("chunk", ""),
+                        "chunks": pending.data.get("chunks", 1) + event.data.get("chunks", 1),
+                    })
+                    self.stats.coalesced += 1
+                    return True
+
+        if self._compact():
+            return False
+
+        # Evict the oldest lossy event; a lossy newcomer is dropped if there is none
+        for position, pending in enumerate(queue):
+            if pending.type in LOSSY_EVENTS:
+                del queue[position]
+                self.stats.dropped += 1
+                return False
+        if event.type in LOSSY_EVENTS:
+            self.stats.dropped += 1
+            return True
+        return False  # Lifecycle events are never dropped
+
+    def _compact(self) -> bool:
+        """Merge one pending output chunk into an earlier chunk of the same step (lossless)"""
+        queue = self._queue
+        first: Dict[Optional[int], int] = {}
+        for position, pending in enumerate(queue):
+            if pending.type != EventType.STEP_OUTPUT_CHUNK:
+                continue
+            if pending.step_index not in first:
+                first[pending.step_index] = position
+                continue
+            head = queue[first[pending.step_index]]
+            queue[first[pending.step_index]] = replace(head, data={
+                "chunk": head.data.get("chunk", "") + pending.data.get("chunk", ""),
+                "chunks": head.data.get("chunks", 1) + pending.data.get("chunks", 1),
+            })
+            del queue[position]
+            self.stats.coalesced += 1
+            return True
+        return False
+
+    def _wake(self):
+        """Wake blocked get() calls and a pending async iteration (lock held)"""
+        self._condition.notify_all()
+        if self._waiter is not None:
+            loop, future = self._waiter
+            self._waiter = None
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # Consumer's loop already closed
+
+    def get(self, timeout: Optional[float] = None) -> Optional[WorkflowEvent]:
+        """
+        Next event (blocking)
+
+        Returns:
+            The next event, or None once closed and drained or on timeout
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._queue or self._closed, timeout):
+                return None
+            return self._pop()
+
+    def _pop(self) -> Optional[WorkflowEvent]:
+        if not self._queue:
+            return None
+        self.stats.delivered += 1
+        return self._queue.popleft()
+
+    def __aiter__(self) -> "EventSubscription":
+        return self
+
+    async def __anext__(self) -> WorkflowEvent:
+        while True:
+            with self._condition:
+                event = self._pop()
+                if event is not None:
+                    return event
+                if self._closed:
+                    raise StopAsyncIteration
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._waiter = (loop, future)
+            await future
+
+    def close(self):
+        """Stop receiving events; queued events can still be read"""
+        with self._condition:
+            self._closed = True
+            self._wake()
+        self.bus.unsubscribe(self)
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class EventBus:
+    """
+    Fan-out of workflow events to subscriptions (thread-safe, non-blocking)
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE):
+        """
+        Initialize event bus
+
+        Args:
+            maxsize: Default queue size of new subscriptions
+        """
+        self.maxsize = maxsize
+        self._subscriptions: List[EventSubscription] = []
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def subscribe(self, maxsize: Optional[int] = None, until_completed: bool = False) -> EventSubscription:
+        """
+        Add a subscription (receives events published from now on)
+
+        Args:
+            maxsize: Queue size (default: the bus default)
+            until_completed: Close after the next workflow_completed event
+        """
+        subscription = EventSubscription(self, maxsize or self.maxsize, until_completed)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        """Remove a subscription (no-op if already removed)"""
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def publish(
+        self,
+        event_type: EventType,
+        step_index: Optional[int] = None,
+        agent_name: Optional[str] = None,
+        **data: Any
+    ) -> Optional[WorkflowEvent]:
+        """
+        Publish an event to every subscription without blocking
+
+        Returns:
+            The event, or None if nobody is subscribed
+        """
+        subscriptions = self._subscriptions  # Copy-on-write: safe to iterate
+        if not subscriptions:
+            return None
+        event = WorkflowEvent(
+            type=event_type,
+            sequence=next(self._sequence),
+            timestamp=time.time(),
+            step_index=step_index,
+            agent_name=agent_name,
+            data=data
+        )
+        for subscription in subscriptions:
+            subscription.put(event)
+        return event
+
+
+class JsonlEventSink:
+    """
+    Append events to a JSON Lines file from a background thread
+    """
+
+    def __init__(self, path: str, maxsize: int = DEFAULT_QUEUE_SIZE):
+        """
+        Initialize sink
+
+        Args:
+            path: Output file (appended to)
+            maxsize: Queue size of the sink's subscription
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.subscription: Optional[EventSubscription] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def attach(self, bus: EventBus):
+        """Subscribe to bus and start writing"""
+        if self._thread is not None:
+            raise RuntimeError("JsonlEventSink is already attached")
+        self.subscription = bus.subscribe(self.maxsize)
+        self._thread = threading.Thread(target=self._write_loop, name="jsonl-event-sink", daemon=True)
+        self._thread.start()
+
+    def _write_loop(self):
+        subscription = self.subscription
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while True:
+                event = subscription.get()
+                if event is None:
+                    break
+                f.write(json.dumps(event.to_dict(), ensure_ascii=False, default=str) + "\n")
+                # Flush once the backlog is written
+                if not len(subscription):
+                    f.flush()
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop after writing queued events"""
+        if self.subscription is not None:
+            self.subscription.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
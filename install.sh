@@ -788,6 +788,33 @@ install_commands_agents() {
     return 0
 }
 
+build_agent_catalog() {
+    echo ""
+    info "Building compiled agent catalog..."
+
+    local catalog_file="$COMMANDS_DIR/commands/agents/.agent_catalog.pickle"
+
+    if [[ $DRY_RUN -eq 1 ]]; then
+        info "[DRY RUN] Would build: commands/agents/.agent_catalog.pickle"
+        return 0
+    fi
+
+    if ! command -v python3 > /dev/null 2>&1; then
+        warning "python3 not found - agent catalog will be built on first use"
+        return 0
+    fi
+
+    # Non-critical: the registry rebuilds the catalog lazily if this fails
+    if (cd "$COMMANDS_DIR" && python3 -m commands.lib.agent_catalog > /dev/null 2>&1); then
+        add_to_manifest "$catalog_file"  # Track generated cache for uninstall
+        success "Agent catalog built"
+    else
+        warning "Failed to prebuild agent catalog - it will be built on first use"
+    fi
+
+    return 0
+}
+
 install_src_mcp() {
     echo ""
     info "Installing MCP source files..."
@@ -980,6 +1007,7 @@ main() {
     install_references || exit 1  # Critical - references are referenced by commands
     install_commands_lib || exit 1  # Critical - libraries used by coordination engine
     install_commands_agents || exit 1  # Critical - agent definitions for multi-agent workflows
+    build_agent_catalog || true  # Non-critical - speeds up agent registry cold start
     install_src_mcp || exit 1  # Critical - MCP Gateway required by all commands
     install_documentation || exit 0  # Non-critical
 
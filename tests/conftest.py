@@ -0,0 +1,38 @@
+"""
+共享测试夹具：CoordinationEngine 测试使用的 registry 与工作流构造
+
+make_workflow 可直接导入：from conftest import make_workflow
+"""
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry
+from commands.lib.agent_router import AgentWorkflow, CoordinationMode, WorkflowStep
+
+
+@pytest.fixture(scope="module")
+def registry():
+    """路由缓存关闭的 registry（测试文件可用同名夹具覆盖）"""
+    return AgentRegistry(cache_size=0)
+
+
+def make_workflow(registry, names, mode=CoordinationMode.SEQUENTIAL, dependencies=None):
+    """
+    由 agent 名称构造工作流，每个 agent 一个 worker 步骤
+
+    Args:
+        registry: AgentRegistry
+        names: 步骤的 agent 名称（按顺序；也可直接传入 dependencies 字典）
+        mode: 协调模式
+        dependencies: agent 名称 → 依赖的 agent 名称列表（未列出的步骤无依赖）
+    """
+    dependencies = dependencies or {}
+    steps = [
+        WorkflowStep(agent=registry.get_agent(name), role="worker",
+                     dependencies=list(dependencies.get(name, ())))
+        for name in names
+    ]
+    return AgentWorkflow(
+        mode=mode, primary_agent=steps[0].agent, steps=steps,
+        estimated_time="", confidence=0.9, explanation=""
+    )
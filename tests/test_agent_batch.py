@@ -0,0 +1,105 @@
+"""
+单元测试：select_agents_batch 批量路由
+
+验证 NumPy 特征矩阵路径、无 NumPy 回退路径和进程池路径
+与逐条 select_agent 的结果完全一致。
+"""
+
+import itertools
+
+import pytest
+
+from commands.lib import agent_batch
+from commands.lib.agent_registry import AgentRegistry
+
+
+TASKS = [
+    "实现用户登录功能",
+    "修复支付API的bug",
+    "设计数据库架构",
+    "代码审查",
+    "性能优化",
+    "fix the failing test coverage",
+    "refactor the payment module",
+    "write README documentation",
+    "调试 debug 这个错误",
+    "加载上下文并恢复会话",
+    "研究开源方案对比，评估技术选型",
+    "add a new feature and review it",
+    "为 API 编写技术文档和使用说明",
+    "测试",
+    "bug",
+    "a",
+    "!!!",
+    "",
+    "   ",
+]
+
+# Pairwise concatenations exercise mixed Chinese/English and substring cases
+BATCH = TASKS + [a + b for a, b in itertools.product(TASKS[:13], repeat=2)]
+
+
+@pytest.fixture
+def registry():
+    # Routing cache disabled: every scalar call routes afresh
+    return AgentRegistry(cache_size=0)
+
+
+def scalar(registry, tasks, top_k):
+    return [registry.select_agent(task, top_k=top_k) for task in tasks]
+
+
+class TestSelectAgentsBatch:
+    """测试批量路由与标量路径一致"""
+
+    @pytest.mark.parametrize("top_k", [1, 3, 10])
+    def test_matrix_matches_scalar(self, registry, top_k):
+        """测试：矩阵路径结果（分数、顺序、原因）与逐条路由一致"""
+        pytest.importorskip("numpy")
+        assert registry.select_agents_batch(BATCH, top_k=top_k) == scalar(registry, BATCH, top_k)
+
+    def test_fallback_without_numpy(self, registry, monkeypatch):
+        """测试：未安装 NumPy 时回退到标量路径"""
+        monkeypatch.setattr(agent_batch, "np", None)
+        assert registry.select_agents_batch(TASKS, top_k=3) == scalar(registry, TASKS, 3)
+
+    def test_empty_batch(self, registry):
+        """测试：空批次返回空列表"""
+        assert registry.select_agents_batch([], top_k=3) == []
+
+    def test_inactive_agents_are_skipped(self, registry):
+        """测试：非 active 的 agent 不出现在批量结果中"""
+        pytest.importorskip("numpy")
+        registry.agents["debug-agent"].status = "inactive"
+        results = registry.select_agents_batch(["调试这个错误"], top_k=10)
+        assert "debug-agent" not in [m.agent.name for m in results[0]]
+        assert results == scalar(registry, ["调试这个错误"], 10)
+
+    def test_feature_matrix_cached_per_snapshot(self, registry):
+        """测试：特征矩阵按快照缓存，reload 后重建"""
+        pytest.importorskip("numpy")
+        registry.select_agents_batch(TASKS[:2])
+        matrix = registry._feature_matrix
+        registry.select_agents_batch(TASKS[:2])
+        assert registry._feature_matrix is matrix
+
+        registry.reload()
+        registry.select_agents_batch(TASKS[:2])
+        assert registry._feature_matrix is not matrix
+        assert registry._feature_matrix.snapshot is registry.snapshot
+
+    def test_process_pool_matches_scalar(self, registry, monkeypatch):
+        """测试：processes > 1 时小批量也使用进程池，结果与逐条路由一致且保持输入顺序"""
+        pools = []
+
+        class RecordingPool(agent_batch.ProcessPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                pools.append(kwargs["max_workers"])
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(agent_batch, "ProcessPoolExecutor", RecordingPool)
+        results = registry.select_agents_batch(BATCH, top_k=3, processes=2)
+        assert pools == [2]
+        assert results == scalar(registry, BATCH, 3)
+        # Results are bound to this process's Agent objects
+        assert results[0][0].agent is registry.agents[results[0][0].agent.name]
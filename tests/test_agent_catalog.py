@@ -0,0 +1,146 @@
+"""
+单元测试：AgentCatalog 持久化编译缓存
+
+验证按文件 (mtime, size, sha256) 失效、只重新解析变更文件，
+以及缓存损坏/版本不匹配时回退到完整解析。
+"""
+
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import pytest
+
+from commands.lib.agent_catalog import AgentCatalog, CATALOG_FILENAME
+from commands.lib.agent_registry import AgentRegistry, AgentMatchIndex
+
+
+SOURCE_AGENTS_DIR = Path(__file__).parent.parent / "commands" / "agents"
+
+
+@pytest.fixture
+def agents_dir(tmp_path):
+    """Copy a few agent definitions into an isolated directory"""
+    for name in ("code_agent.md", "test_agent.md", "debug_agent.md"):
+        shutil.copy(SOURCE_AGENTS_DIR / name, tmp_path / name)
+    return tmp_path
+
+
+def make_catalog(agents_dir):
+    registry = AgentRegistry.__new__(AgentRegistry)
+    return AgentCatalog(agents_dir, parse_file=registry._parse_agent_text,
+                        build_index=AgentMatchIndex)
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestAgentCatalog:
+    """测试编译缓存的增量失效"""
+
+    def test_first_load_parses_and_writes_cache(self, agents_dir):
+        """测试：首次加载解析所有文件并写入缓存"""
+        catalog = make_catalog(agents_dir)
+        agents, index = catalog.load()
+
+        assert set(agents) == {"code-agent", "test-agent", "debug-agent"}
+        assert isinstance(index, AgentMatchIndex)
+        assert catalog.stats.reparsed == 3
+        assert catalog.stats.cache_written
+        assert (agents_dir / CATALOG_FILENAME).exists()
+
+    def test_second_load_reuses_all_entries(self, agents_dir):
+        """测试：文件未变化时不读取文件、不重建索引、不重写缓存"""
+        make_catalog(agents_dir).load()
+        catalog = make_catalog(agents_dir)
+        agents, _ = catalog.load()
+
+        assert catalog.stats.cache_loaded
+        assert catalog.stats.reused == 3
+        assert catalog.stats.reparsed == 0
+        assert not catalog.stats.index_rebuilt
+        assert not catalog.stats.cache_written
+        assert len(agents) == 3
+
+    def test_touched_file_is_rehashed_not_reparsed(self, agents_dir):
+        """测试：仅 mtime 变化时通过哈希判定未修改"""
+        make_catalog(agents_dir).load()
+        bump_mtime(agents_dir / "code_agent.md")
+
+        catalog = make_catalog(agents_dir)
+        catalog.load()
+
+        assert catalog.stats.rehashed == 1
+        assert catalog.stats.reparsed == 0
+        assert not catalog.stats.index_rebuilt
+        assert catalog.stats.cache_written
+
+    def test_modified_file_is_reparsed(self, agents_dir):
+        """测试：内容变化的文件被重新解析并重建索引"""
+        make_catalog(agents_dir).load()
+        path = agents_dir / "test_agent.md"
+        path.write_text(path.read_text(encoding="utf-8").replace(
+            "description:", "description: 已修改", 1), encoding="utf-8")
+        bump_mtime(path)
+
+        catalog = make_catalog(agents_dir)
+        agents, _ = catalog.load()
+
+        assert catalog.stats.reparsed == 1
+        assert catalog.stats.reused == 2
+        assert catalog.stats.index_rebuilt
+        assert agents["test-agent"].description.startswith("已修改")
+
+    def test_removed_file_is_dropped(self, agents_dir):
+        """测试：删除的文件从目录和索引中移除"""
+        make_catalog(agents_dir).load()
+        (agents_dir / "debug_agent.md").unlink()
+
+        catalog = make_catalog(agents_dir)
+        agents, index = catalog.load()
+
+        assert catalog.stats.removed == 1
+        assert "debug-agent" not in agents
+        assert "debug-agent" not in index.lookup("调试这个错误")
+
+    def test_version_mismatch_triggers_full_parse(self, agents_dir):
+        """测试：缓存版本不匹配时忽略缓存"""
+        make_catalog(agents_dir).load()
+        cache_path = agents_dir / CATALOG_FILENAME
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+        data["version"] = -1
+        with open(cache_path, "wb") as f:
+            pickle.dump(data, f)
+
+        catalog = make_catalog(agents_dir)
+        catalog.load()
+
+        assert not catalog.stats.cache_loaded
+        assert catalog.stats.reparsed == 3
+
+    def test_corrupt_cache_is_ignored(self, agents_dir):
+        """测试：缓存文件损坏时回退到完整解析"""
+        (agents_dir / CATALOG_FILENAME).write_bytes(b"not a pickle")
+
+        catalog = make_catalog(agents_dir)
+        agents, _ = catalog.load()
+
+        assert len(agents) == 3
+        assert catalog.stats.reparsed == 3
+        assert catalog.stats.cache_written
+
+    def test_registry_without_catalog_matches_cached(self, agents_dir):
+        """测试：use_catalog=False 与缓存路径选择结果一致"""
+        AgentRegistry(agents_dir)
+        cached = AgentRegistry(agents_dir)
+        plain = AgentRegistry(agents_dir, use_catalog=False)
+
+        assert cached.catalog_stats.reused == 3
+        assert plain.catalog_stats is None
+        for task in ("修复测试失败的bug", "implement new feature"):
+            assert [(m.agent.name, m.score) for m in cached.select_agent(task, top_k=5)] == \
+                   [(m.agent.name, m.score) for m in plain.select_agent(task, top_k=5)]
@@ -0,0 +1,239 @@
+"""
+单元测试：AgentRegistry 倒排索引匹配
+
+验证 AgentMatchIndex 驱动的 select_agent 与逐关键词扫描
+(_calculate_match_score) 的评分、匹配关键词/场景和原因完全一致。
+"""
+
+import random
+
+import pytest
+
+from commands.lib import agent_registry as agent_registry_module
+from commands.lib.agent_registry import (
+    Agent,
+    AgentRegistry,
+    AgentMatchIndex,
+    PHRASE_KEYWORD,
+    RegistrySnapshot,
+)
+
+
+TASKS = [
+    "实现用户登录功能",
+    "修复支付API的bug",
+    "设计数据库架构",
+    "代码审查",
+    "性能优化",
+    "fix the failing test coverage",
+    "refactor the payment module",
+    "write README documentation",
+    "调试 debug 这个错误",
+    "加载上下文并恢复会话",
+    "!!!",
+    "",
+    "   ",
+    "研究开源方案对比，评估技术选型",
+    "add a new feature and review it",
+    "为 API 编写技术文档和使用说明",
+]
+
+
+def brute_force_select(registry, task, top_k):
+    """Reference implementation: score every agent phrase by phrase"""
+    priority_order = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+    matches = []
+    for agent in registry.agents.values():
+        if agent.status != 'active':
+            continue
+        score, kw, sc, reason = registry._calculate_match_score(agent, task)
+        if score > 0:
+            matches.append((agent.name, score, kw, sc, reason, agent.priority))
+    matches.sort(key=lambda m: (m[1], priority_order.get(m[5], 0)), reverse=True)
+    return [m[:5] for m in matches[:top_k]]
+
+
+class TestAgentMatchIndex:
+    """测试倒排索引的构建和查询"""
+
+    @pytest.fixture
+    def registry(self):
+        return AgentRegistry()
+
+    def test_index_built_on_load(self, registry):
+        """测试：加载 agents 时构建索引"""
+        assert isinstance(registry._index, AgentMatchIndex)
+        assert registry._index.char_postings
+        assert "bug" in registry._index.word_postings
+
+    @pytest.mark.parametrize("top_k", [1, 3, 10])
+    @pytest.mark.parametrize("task", TASKS)
+    def test_select_agent_matches_brute_force(self, registry, task, top_k):
+        """测试：索引路径与逐个扫描结果完全一致"""
+        expected = brute_force_select(registry, task, top_k=top_k)
+        actual = [
+            (m.agent.name, m.score, m.matched_keywords, m.matched_scenarios, m.reason)
+            for m in registry.select_agent(task, top_k=top_k)
+        ]
+        assert actual == expected
+
+    def test_lookup_only_returns_candidate_agents(self, registry):
+        """测试：英文任务只命中包含该单词的 agent"""
+        hits = registry._index.lookup("coverage")
+        assert set(hits) == {"test-agent"}
+        keywords = registry.agents["test-agent"].activation_keywords
+        assert [keywords[i] for i in hits["test-agent"][PHRASE_KEYWORD]] == ["coverage"]
+
+    def test_inactive_agents_are_skipped(self, registry):
+        """测试：非 active 的 agent 不参与选择"""
+        registry.agents["debug-agent"].status = "inactive"
+        names = [m.agent.name for m in registry.select_agent("调试这个错误", top_k=10)]
+        assert "debug-agent" not in names
+
+
+def make_agent(name, keywords, scenarios=(), priority="medium"):
+    return Agent(
+        name=name, role=name, description=name, expertise=[],
+        activation_keywords=list(keywords), activation_scenarios=list(scenarios),
+        available_tools=[], mcp_integrations=[], collaboration_modes=[],
+        workflows=[], decision_criteria={}, status="active",
+        priority=priority, file_path="",
+    )
+
+
+def install_agents(registry, agents):
+    """Replace the registry snapshot with synthetic agents"""
+    by_name = {agent.name: agent for agent in agents}
+    registry._snapshot = RegistrySnapshot.build(by_name, AgentMatchIndex(by_name))
+
+
+class TestTopKPruning:
+    """测试基于分数上界的 top-k 剪枝"""
+
+    @pytest.fixture
+    def registry(self):
+        return AgentRegistry()
+
+    @pytest.fixture
+    def many_agents(self):
+        rng = random.Random(7)
+        vocab = [f"w{i}" for i in range(40)] + list("登录支付数据库架构测试文档")
+        priorities = ["critical", "high", "medium", "low"]
+        return [
+            make_agent(
+                f"agent-{i}",
+                rng.sample(vocab, rng.randint(0, 4)),
+                [" ".join(rng.sample(vocab, 2)) for _ in range(rng.randint(0, 2))],
+                rng.choice(priorities),
+            )
+            for i in range(300)
+        ]
+
+    def test_bound_order_is_descending(self, registry):
+        """测试：快照按分数上界降序排列 agent"""
+        bounds = [b[0] for b in registry.snapshot.bound_order]
+        assert bounds == sorted(bounds, reverse=True)
+        assert len(bounds) == len(registry.agents)
+
+    @pytest.mark.parametrize("top_k", [0, 1, 3, 10, 500])
+    def test_matches_brute_force_with_many_agents(self, registry, many_agents, top_k):
+        """测试：数百个 agent 时 top-k 结果与全量排序一致（含并列）"""
+        install_agents(registry, many_agents)
+        rng = random.Random(11)
+        vocab = [f"w{i}" for i in range(40)] + ["测试", "登录支付", "文档"]
+        for _ in range(30):
+            task = " ".join(rng.sample(vocab, rng.randint(1, 5)))
+            expected = brute_force_select(registry, task, top_k=top_k)
+            actual = [
+                (m.agent.name, m.score, m.matched_keywords, m.matched_scenarios, m.reason)
+                for m in registry.select_agent(task, top_k=top_k)
+            ]
+            assert actual == expected
+
+    def test_low_bound_agents_are_pruned(self, registry, monkeypatch):
+        """测试：上界低于第 k 名分数的 agent 不再计算分数"""
+        strong = make_agent("strong", ["alpha", "beta"], ["alpha beta"], "critical")
+        weak = [make_agent(f"weak-{i}", ["alpha"]) for i in range(200)]
+        install_agents(registry, weak + [strong])
+
+        calls = []
+        original = agent_registry_module.score_from_counts
+
+        def counting(*args):
+            calls.append(args)
+            return original(*args)
+
+        monkeypatch.setattr(agent_registry_module, "score_from_counts", counting)
+        matches = registry.select_agent("alpha beta", top_k=1)
+
+        assert [m.agent.name for m in matches] == ["strong"]
+        # One score for "strong" plus one when materializing its match;
+        # the 200 weak agents (bound 0.3 < 1.1) are never scored
+        assert len(calls) == 2
+
+
+class TestFindAgents:
+    """测试 find_agents 流式阈值查询"""
+
+    @pytest.fixture
+    def registry(self):
+        return AgentRegistry()
+
+    @pytest.mark.parametrize("min_score", [0.0, 0.35, 0.65, 1.0])
+    @pytest.mark.parametrize("task", TASKS)
+    def test_matches_select_agent_above_threshold(self, registry, task, min_score):
+        """测试：结果等于全量排序后按阈值过滤"""
+        expected = [
+            m for m in brute_force_select(registry, task, top_k=len(registry.agents))
+            if m[1] >= min_score
+        ]
+        actual = [
+            (m.agent.name, m.score, m.matched_keywords, m.matched_scenarios, m.reason)
+            for m in registry.find_agents(task, min_score=min_score)
+        ]
+        assert actual == expected
+
+    def test_is_lazy_generator(self, registry):
+        """测试：返回生成器，按需计算"""
+        stream = registry.find_agents("实现用户登录功能")
+        assert iter(stream) is stream
+        first = next(stream)
+        assert first.agent.name == registry.select_agent("实现用户登录功能")[0].agent.name
+
+    def test_limit_stops_early(self, registry):
+        """测试：limit 限制返回数量"""
+        assert len(list(registry.find_agents("实现用户登录功能", limit=2))) == 2
+        assert list(registry.find_agents("实现用户登录功能", limit=0)) == []
+
+    def test_many_agents_with_ties(self, registry):
+        """测试：数百个 agent（含并列分数）时顺序与全量排序一致"""
+        rng = random.Random(3)
+        vocab = [f"w{i}" for i in range(30)]
+        agents = [
+            make_agent(f"agent-{i}", rng.sample(vocab, rng.randint(0, 3)),
+                       priority=rng.choice(["critical", "high", "medium", "low"]))
+            for i in range(300)
+        ]
+        install_agents(registry, agents)
+        for _ in range(20):
+            task = " ".join(rng.sample(vocab, 3))
+            expected = [m[:2] for m in brute_force_select(registry, task, top_k=300) if m[1] >= 0.3]
+            actual = [(m.agent.name, m.score) for m in registry.find_agents(task, min_score=0.3)]
+            assert actual == expected
+
+    def test_threshold_skips_low_bound_agents(self, registry, monkeypatch):
+        """测试：上界低于 min_score 的 agent 不计算分数"""
+        strong = make_agent("strong", ["alpha", "beta"], ["alpha beta"], "critical")
+        weak = [make_agent(f"weak-{i}", ["alpha"]) for i in range(200)]
+        install_agents(registry, weak + [strong])
+
+        calls = []
+        original = agent_registry_module.score_from_counts
+        monkeypatch.setattr(
+            agent_registry_module, "score_from_counts",
+            lambda *args: calls.append(args) or original(*args)
+        )
+        names = [m.agent.name for m in registry.find_agents("alpha beta", min_score=0.65)]
+
+        assert names == ["strong"]
+        assert len(calls) == 2  # scored once, then materialized
@@ -0,0 +1,85 @@
+"""
+单元测试：AgentRegistryPool 进程内共享注册表
+
+验证同一 agents 目录只解析一次、显式移出池，以及 refresh
+对所有持有者原地生效。
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry, AgentRegistryPool, get_agent_registry
+from commands.lib.agent_router import AgentRouter
+from commands.lib.task_analyzer import TaskAnalyzer
+from commands.lib.multi_agent_orchestrator import MultiAgentOrchestrator
+
+
+SOURCE_AGENTS_DIR = Path(__file__).parent.parent / "commands" / "agents"
+
+
+@pytest.fixture
+def agents_dir(tmp_path):
+    for name in ("code_agent.md", "test_agent.md"):
+        shutil.copy(SOURCE_AGENTS_DIR / name, tmp_path / name)
+    return tmp_path
+
+
+class TestAgentRegistryPool:
+    """测试注册表池的共享与移出"""
+
+    def test_same_dir_shares_instance(self, agents_dir):
+        """测试：相同目录（含不同写法）返回同一实例"""
+        pool = AgentRegistryPool()
+        first = pool.get(agents_dir)
+        second = pool.get(str(agents_dir / ".." / agents_dir.name))
+
+        assert first is second
+        assert agents_dir in pool
+
+    def test_evict(self, agents_dir):
+        """测试：移出池后再次获取会重新加载，持有者不受影响"""
+        pool = AgentRegistryPool()
+        first = pool.get(agents_dir)
+
+        assert pool.evict(agents_dir) is first
+        assert agents_dir not in pool
+        assert pool.evict(agents_dir) is None
+        assert "code-agent" in first.agents
+
+        assert pool.get(agents_dir) is not first
+
+    def test_refresh_updates_all_holders(self, agents_dir):
+        """测试：refresh 原地重新加载，持有者看到新增 agent"""
+        pool = AgentRegistryPool()
+        registry = pool.get(agents_dir)
+        assert "debug-agent" not in registry.agents
+
+        shutil.copy(SOURCE_AGENTS_DIR / "debug_agent.md", agents_dir / "debug_agent.md")
+        assert pool.refresh(agents_dir) is registry
+
+        assert "debug-agent" in registry.agents
+        names = [m.agent.name for m in registry.select_agent("调试这个错误", top_k=5)]
+        assert "debug-agent" in names
+
+    def test_refresh_unknown_dir_returns_none(self, agents_dir):
+        """测试：未入池的目录 refresh 返回 None"""
+        assert AgentRegistryPool().refresh(agents_dir) is None
+
+
+class TestSharedRegistryDefault:
+    """测试各组件默认共享同一注册表"""
+
+    def test_components_share_default_registry(self):
+        """测试：未传入 registry 的组件共享全局实例"""
+        shared = get_agent_registry()
+
+        assert TaskAnalyzer().registry is shared
+        assert AgentRouter().registry is shared
+        assert MultiAgentOrchestrator().registry is shared
+
+    def test_explicit_registry_is_respected(self, agents_dir):
+        """测试：显式传入的 registry 不会被替换"""
+        registry = AgentRegistry(agents_dir)
+        assert AgentRouter(registry).registry is registry
@@ -0,0 +1,149 @@
+"""
+单元测试：AgentRegistry 热加载与写时复制快照
+
+验证 reload 只重新解析变更文件、发布新的不可变快照，
+以及目录监听（polling / inotify）触发自动重新加载。
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry
+from commands.lib.agent_watcher import (
+    AgentDirectoryWatcher,
+    BACKEND_INOTIFY,
+    BACKEND_POLLING,
+    create_backend,
+)
+
+
+SOURCE_AGENTS_DIR = Path(__file__).parent.parent / "commands" / "agents"
+
+
+@pytest.fixture
+def agents_dir(tmp_path):
+    for name in ("code_agent.md", "test_agent.md"):
+        shutil.copy(SOURCE_AGENTS_DIR / name, tmp_path / name)
+    return tmp_path
+
+
+def edit_description(path, text):
+    content = path.read_text(encoding="utf-8")
+    path.write_text(content.replace("description:", f"description: {text}", 1), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def inotify_available(path):
+    try:
+        create_backend(path, BACKEND_INOTIFY).close()
+        return True
+    except OSError:
+        return False
+
+
+class TestSnapshotReload:
+    """测试 reload 的增量解析和快照发布"""
+
+    def test_reload_reparses_only_changed_file(self, agents_dir):
+        """测试：只有修改过的文件被重新解析"""
+        registry = AgentRegistry(agents_dir)
+        edit_description(agents_dir / "test_agent.md", "已修改")
+
+        registry.reload()
+
+        assert registry.catalog_stats.reparsed == 1
+        assert registry.catalog_stats.reused == 1
+        assert registry.agents["test-agent"].description.startswith("已修改")
+
+    def test_reload_publishes_new_snapshot(self, agents_dir):
+        """测试：旧快照保持不变，新快照版本递增"""
+        registry = AgentRegistry(agents_dir)
+        old = registry.snapshot
+        shutil.copy(SOURCE_AGENTS_DIR / "debug_agent.md", agents_dir / "debug_agent.md")
+
+        registry.reload()
+
+        assert registry.snapshot is not old
+        assert registry.snapshot.version == old.version + 1
+        assert "debug-agent" not in old.agents
+        assert "debug-agent" in registry.agents
+
+    def test_snapshot_agents_are_read_only(self, agents_dir):
+        """测试：快照中的 agents 映射不可修改"""
+        registry = AgentRegistry(agents_dir)
+        with pytest.raises(TypeError):
+            registry.agents["x"] = None
+
+    def test_reload_without_catalog(self, agents_dir):
+        """测试：use_catalog=False 时 reload 完整重新解析"""
+        registry = AgentRegistry(agents_dir, use_catalog=False)
+        (agents_dir / "code_agent.md").unlink()
+
+        registry.reload()
+
+        assert set(registry.agents) == {"test-agent"}
+
+
+class TestAgentWatcher:
+    """测试目录监听触发热加载"""
+
+    def test_polling_backend_detects_change(self, agents_dir):
+        """测试：polling 后端检测到文件变化"""
+        backend = create_backend(agents_dir, BACKEND_POLLING)
+        assert not backend.wait(0)
+        edit_description(agents_dir / "code_agent.md", "x")
+        assert backend.wait(0)
+
+    def test_polling_ignores_other_files(self, agents_dir):
+        """测试：非 *_agent.md 文件不触发变化"""
+        backend = create_backend(agents_dir, BACKEND_POLLING)
+        (agents_dir / "notes.txt").write_text("hi")
+        assert not backend.wait(0)
+
+    @pytest.mark.parametrize("backend", [BACKEND_POLLING, BACKEND_INOTIFY])
+    def test_registry_hot_reloads(self, agents_dir, backend):
+        """测试：watch 模式下编辑文件后自动发布新快照"""
+        if backend == BACKEND_INOTIFY and not inotify_available(agents_dir):
+            pytest.skip("inotify not available")
+
+        registry = AgentRegistry(agents_dir)
+        registry.watch(poll_interval=0.05, backend=backend)
+        try:
+            edit_description(agents_dir / "code_agent.md", "热加载")
+            assert wait_for(
+                lambda: registry.agents["code-agent"].description.startswith("热加载")
+            )
+        finally:
+            registry.stop_watching()
+
+    def test_watcher_survives_callback_errors(self, agents_dir):
+        """测试：回调异常不会终止监听线程"""
+        calls = []
+
+        def on_change():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        watcher = AgentDirectoryWatcher(
+            agents_dir, on_change, poll_interval=0.05, backend=BACKEND_POLLING
+        ).start()
+        try:
+            edit_description(agents_dir / "code_agent.md", "a")
+            assert wait_for(lambda: len(calls) == 1)
+            assert watcher.running
+        finally:
+            watcher.stop()
@@ -0,0 +1,175 @@
+"""
+单元测试：截止时间传播与协作式取消
+
+验证 CancellationToken 的截止时间继承、取消级联与原因、
+CoordinationEngine 的单步预算（按 agent 覆盖）、工作流截止时间、
+按关键路径分配的目标时间（只报告、不中断）、协作式中断，
+以及排队 / 运行 / 超时计时拆分。
+"""
+
+import threading
+import time
+
+import pytest
+
+from commands.lib.agent_router import CoordinationMode
+from commands.lib.cancellation import (
+    CANCELLED,
+    DEADLINE,
+    TIMEOUT,
+    CancellationToken,
+    OperationCancelled,
+    current_token,
+)
+from commands.lib.coordination_engine import CoordinationEngine, ExecutionStatus
+from conftest import make_workflow
+
+
+AGENTS = ["pm-agent", "architect-agent", "code-agent", "test-agent"]
+
+
+class CooperativeExecutor:
+    """step_executor that blocks selected agents until their token is cancelled"""
+
+    def __init__(self, block=()):
+        self.block = set(block)
+        self.budgets = {}
+        self.stopped = {}
+
+    def __call__(self, step, context):
+        token = current_token()
+        self.budgets[step.agent.name] = token.remaining()
+        if step.agent.name in self.block:
+            token.wait(5.0)
+            self.stopped[step.agent.name] = token.reason
+            token.raise_if_cancelled()
+        return f"{step.agent.name} done"
+
+
+class TestToken:
+    """测试 CancellationToken"""
+
+    def test_child_deadline_and_reason(self):
+        """测试：子令牌不晚于父令牌过期，并区分超时与截止时间"""
+        root = CancellationToken(0.2, expiry_reason=DEADLINE)
+        short = root.child(0.05)
+        long = root.child(10)
+        assert long.deadline == root.deadline
+        assert not short.wait(0.01)
+
+        assert short.wait() and short.reason == TIMEOUT
+        assert long.wait() and long.reason == DEADLINE
+
+    def test_cancel_cascades(self):
+        """测试：取消父令牌会唤醒子令牌并执行回调"""
+        root = CancellationToken()
+        child = root.child()
+        calls = []
+        child.on_cancel(lambda: calls.append(child.reason))
+        threading.Timer(0.05, root.cancel).start()
+
+        assert child.wait(5.0)
+        assert calls == [CANCELLED]
+        with pytest.raises(OperationCancelled):
+            child.raise_if_cancelled()
+
+    def test_current_token_outside_step(self):
+        """测试：步骤之外的 current_token 永不取消"""
+        token = current_token()
+        assert token.remaining() is None and not token.cancelled
+
+
+class TestStepBudgets:
+    """测试单步预算"""
+
+    def test_cooperative_timeout(self, registry):
+        """测试：超出 agent 预算的步骤被协作式中断，不占用线程"""
+        executor = CooperativeExecutor(block={"code-agent"})
+        engine = CoordinationEngine(
+            step_executor=executor, step_timeout=5.0, step_timeouts={"code-agent": 0.1}
+        )
+        result = engine.execute(make_workflow(registry, AGENTS, CoordinationMode.PARALLEL))
+
+        failed = result.get_failed_steps()
+        assert [r.step.agent.name for r in failed] == ["code-agent"]
+        assert failed[0].error == "Step timed out after 0.10s"
+        assert executor.stopped == {"code-agent": TIMEOUT}
+        assert failed[0].timing.timed_out == pytest.approx(0.1, abs=0.05)
+        assert failed[0].timing.running == 0.0
+        assert failed[0].timing.budget == 0.1
+        assert result.total_duration < 1.0
+
+    def test_queued_time(self, registry):
+        """测试：等待空闲 worker 的时间计为排队时间"""
+        def step_executor(step, context):
+            time.sleep(0.1)
+            return "done"
+
+        engine = CoordinationEngine(step_executor=step_executor, max_workers=1)
+        result = engine.execute(make_workflow(registry, AGENTS[:2], CoordinationMode.PARALLEL))
+
+        first, second = (r.timing for r in result.step_results)
+        assert first.queued < 0.05 <= second.queued
+        assert second.running >= 0.1 and second.timed_out == 0.0
+        assert result.metadata["timing"]["running"] >= 0.2
+
+
+class TestWorkflowDeadline:
+    """测试工作流截止时间"""
+
+    def test_target_redistributed(self, registry):
+        """测试：提前完成的步骤把剩余时间留给后续步骤的目标时间"""
+        executor = CooperativeExecutor()
+        result = CoordinationEngine(step_executor=executor).execute(make_workflow(registry, AGENTS), timeout=1.0)
+
+        assert result.status == ExecutionStatus.COMPLETED
+        targets = [r.timing.target for r in result.step_results]
+        assert targets[0] == pytest.approx(0.25, abs=0.05)   # Equal estimates: 1/4 of 1.0s
+        assert targets == sorted(targets)
+        assert targets[-1] > 0.9
+        # Hard limit: the whole time left to the deadline
+        assert executor.budgets["pm-agent"] == pytest.approx(1.0, abs=0.05)
+
+    def test_slow_step_may_exceed_target(self, registry):
+        """测试：超出目标时间但未超出截止时间的步骤不会被中断"""
+        def step_executor(step, context):
+            time.sleep(0.6 if step.agent.name == "code-agent" else 0.05)
+            return "done"
+
+        engine = CoordinationEngine(step_executor=step_executor, workflow_timeout=1.5)
+        result = engine.execute(make_workflow(registry, ["code-agent", "test-agent", "review-agent"]))
+
+        assert result.status == ExecutionStatus.COMPLETED
+        code = result.step_results[0].timing
+        assert code.running > code.target   # Equal estimates: target 0.5s of 1.5s
+        assert code.budget == pytest.approx(1.5, abs=0.05)
+
+    def test_deadline_stops_workflow(self, registry):
+        """测试：截止时间到达时中断运行中的步骤并跳过其余步骤"""
+        executor = CooperativeExecutor(block=AGENTS[1:])
+        # Fan-out from pm-agent; two workers block until the deadline
+        workflow = make_workflow(
+            registry, AGENTS, CoordinationMode.HIERARCHICAL, {name: ["pm-agent"] for name in AGENTS[1:]}
+        )
+        engine = CoordinationEngine(step_executor=executor, workflow_timeout=0.3, max_workers=2)
+        result = engine.execute(workflow)
+
+        assert result.status == ExecutionStatus.FAILED
+        assert result.output == "Workflow deadline of 0.30s exceeded"
+        assert result.metadata["deadline_exceeded"]
+        assert result.metadata["skipped_steps"] == ["test-agent"]
+        assert executor.stopped == {"architect-agent": DEADLINE, "code-agent": DEADLINE}
+        assert [r.error for r in result.get_failed_steps()] == ["Workflow deadline exceeded"] * 2
+        assert result.total_duration < 1.0
+
+    def test_cancel_interrupts_running_step(self, registry):
+        """测试：cancel() 唤醒正在等待的步骤"""
+        executor = CooperativeExecutor(block={"architect-agent"})
+        engine = CoordinationEngine(step_executor=executor)
+        threading.Timer(0.1, engine.cancel).start()
+        result = engine.execute(make_workflow(registry, AGENTS))
+
+        assert result.status == ExecutionStatus.CANCELLED
+        assert executor.stopped == {"architect-agent": CANCELLED}
+        assert result.step_results[-1].status == ExecutionStatus.CANCELLED
+        assert not result.metadata["deadline_exceeded"]
@@ -0,0 +1,95 @@
+"""
+单元测试：CJKSegmenter 词典分词
+
+验证 Trie 正向最大匹配、未登录片段的二元组回退、
+短语匹配单元与任务特征集合，以及在 AgentRegistry / TaskAnalyzer 中的复用。
+"""
+
+from dataclasses import replace
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry
+from commands.lib.cjk_segmenter import CJKSegmenter
+from commands.lib.task_analyzer import TaskAnalyzer
+
+
+@pytest.fixture
+def segmenter():
+    return CJKSegmenter.from_phrases(["用户登录", "用户", "调试", "程序出现错误", "API设计"])
+
+
+class TestCJKSegmenter:
+    """测试分词器基本行为"""
+
+    def test_dictionary_from_phrase_runs(self, segmenter):
+        """测试：词典只收录短语中 2 字以上的中文片段"""
+        assert "用户登录" in segmenter
+        assert "设计" in segmenter
+        assert "api设计" not in segmenter
+        assert len(segmenter) == 5
+
+    def test_forward_maximum_matching(self, segmenter):
+        """测试：优先匹配最长的词典词"""
+        assert segmenter.segment("实现用户登录功能") == ["实现", "用户登录", "功能"]
+
+    def test_bigram_fallback_for_unknown_spans(self, segmenter):
+        """测试：未登录片段拆成重叠二元组，可关闭"""
+        assert segmenter.segment("修复用户的缺陷") == ["修复", "用户", "的缺", "缺陷"]
+        assert segmenter.segment("修复用户的缺陷", bigram_fallback=False) == ["修复", "用户", "的缺陷"]
+
+    def test_ascii_tokens_kept_whole(self, segmenter):
+        """测试：英文和数字按整段保留，标点空白被丢弃"""
+        assert segmenter.segment("调试 Python3 代码!") == ["调试", "Python3", "代码"]
+
+    def test_phrase_segments_exclude_phrase_itself(self, segmenter):
+        """测试：短语自身在词典中时仍拆分为更短的词"""
+        assert segmenter.phrase_segments("用户登录") == {"用户", "登录"}
+        assert segmenter.phrase_segments("调试过程") == {"调试", "过程"}
+        assert segmenter.phrase_segments("API设计") == {"api", "设计"}
+        assert segmenter.phrase_segments("错") == {"错"}
+
+    def test_features_cover_words_bigrams_and_chars(self, segmenter):
+        """测试：任务特征包含词典词、二元组和单字"""
+        features = segmenter.features("需要调试程序出现错误")
+        assert {"调试", "程序出现错误", "出现", "错"} <= features
+        assert segmenter.phrase_segments("调试过程") & features == {"调试"}
+
+    def test_find_words_substring_semantics(self):
+        """测试：find_words 与逐个子串检查结果一致"""
+        keywords = ["修改", "重构", "ui", "api", "最佳实践"]
+        lexicon = CJKSegmenter(keywords)
+        for text in ("重构ui组件的api", "最佳实践", "修改", "无关文本", ""):
+            assert lexicon.find_words(text) == {k for k in keywords if k in text}
+
+
+class TestSegmenterReuse:
+    """测试分词器在路由组件中的复用"""
+
+    @pytest.fixture
+    def registry(self):
+        return AgentRegistry(cache_size=0)
+
+    def test_registry_exposes_agent_dictionary(self, registry):
+        """测试：registry.segmenter 的词典来自 agent 关键词和场景"""
+        agent = registry.get_agent("debug-agent")
+        assert "调试" in agent.activation_keywords
+        assert "bug修复" in agent.activation_keywords
+        assert "调试" in registry.segmenter
+        assert "修复" in registry.segmenter
+        assert agent.activation_scenarios[0] in registry.segmenter
+
+    def test_fuzzy_match_uses_segments_not_characters(self, registry):
+        """测试：字符散落在任务中不再构成匹配"""
+        agent = registry.get_agent("debug-agent")
+        agent_copy = replace(agent, activation_keywords=["调试过程"], activation_scenarios=[])
+        _, kw, _, _ = registry._calculate_match_score(agent_copy, "过一下程序，调整测试")
+        assert kw == []
+        _, kw, _, _ = registry._calculate_match_score(agent_copy, "需要调试")
+        assert kw == ["调试过程"]
+
+    def test_task_analyzer_keywords_are_segmented(self, registry):
+        """测试：TaskAnalyzer 关键词按词典切分中文"""
+        keywords = TaskAnalyzer(registry)._extract_keywords("调试登录错误")
+        assert "调试登录错误" not in keywords
+        assert "调试" in keywords
@@ -0,0 +1,123 @@
+"""
+单元测试：ContextStore 有界、基于引用的上下文传递
+
+验证输出只存储一次、依赖方持有引用并按需物化、
+按 token / 字节预算保留首尾、裁剪结果在依赖方之间共享，
+以及 CoordinationEngine 只向步骤传递其声明的依赖。
+"""
+
+from commands.lib.agent_router import CoordinationMode
+from commands.lib.context_store import (
+    CHARS_PER_TOKEN,
+    ContextBudget,
+    ContextStore,
+    StepContext,
+    omission_marker,
+)
+from commands.lib.coordination_engine import CoordinationEngine, ExecutionStatus
+from conftest import make_workflow
+
+
+CHAIN = ["pm-agent", "architect-agent", "code-agent", "test-agent", "review-agent", "doc-agent"]
+
+
+def make_chain(registry):
+    dependencies = {name: [previous] for previous, name in zip(CHAIN, CHAIN[1:])}
+    return make_workflow(registry, CHAIN, CoordinationMode.HIERARCHICAL, dependencies)
+
+
+class TestBudget:
+    """测试单个依赖的预算裁剪"""
+
+    def test_head_and_tail_kept(self):
+        """测试：超出 token 预算时保留开头和结尾"""
+        text = "HEAD" + "x" * 1000 + "TAIL"
+        clipped = ContextBudget(max_tokens=10).apply(text)  # 40 chars: 20 head + 20 tail
+        assert clipped == "HEAD" + "x" * 16 + omission_marker(968, "chars") + "x" * 16 + "TAIL"
+
+    def test_byte_budget_respects_utf8(self):
+        """测试：字节预算不会截断多字节字符"""
+        text = "设计文档" * 100
+        clipped = ContextBudget(max_tokens=None, max_bytes=31, head_ratio=1.0).apply(text)
+        head = clipped.split("\n…[")[0]
+        assert head == "设计文档" * 2 + "设计"
+        assert len(head.encode("utf-8")) <= 31
+
+    def test_small_outputs_unchanged(self):
+        """测试：预算内的输出原样传递"""
+        assert ContextBudget().apply("short") == "short"
+        assert ContextBudget.unlimited().apply("y" * 100_000) == "y" * 100_000
+
+
+class TestStepContext:
+    """测试引用与按需物化"""
+
+    def test_lazy_materialization_and_shared_views(self):
+        """测试：只物化被读取的依赖，同一预算的裁剪结果共享"""
+        store = ContextStore()
+        big = store.put(0, "architect-agent", "a" * 50_000)
+        small = store.put(1, "code-agent", "code")
+        budget = ContextBudget(max_tokens=100)
+
+        first = StepContext(store, [big, small], budget)
+        assert list(first) == ["architect-agent", "code-agent"]
+        assert first.materialized == []
+        assert first["code-agent"] == "code"
+        assert first.materialized == ["code-agent"]
+
+        second = StepContext(store, [big], budget)
+        assert second["architect-agent"] is first["architect-agent"]
+        assert len(first["architect-agent"]) < 500
+
+    def test_fingerprint_without_materializing(self):
+        """测试：指纹只依赖输出摘要和预算"""
+        store = ContextStore()
+        ref = store.put(0, "architect-agent", "design")
+        context = StepContext(store, [ref], ContextBudget())
+        fingerprint = context.fingerprint()
+        assert context.materialized == []
+
+        assert StepContext(store, [ref], ContextBudget(max_tokens=5)).fingerprint() != fingerprint
+        changed = ContextStore()
+        assert StepContext(
+            changed, [changed.put(0, "architect-agent", "design v2")], ContextBudget()
+        ).fingerprint() != fingerprint
+
+
+class TestEngineContext:
+    """测试 CoordinationEngine 的上下文传递"""
+
+    def test_declared_dependencies_with_budget(self, registry):
+        """测试：长链路中每一步只收到声明依赖的裁剪输出，裁剪记录在 metadata 中"""
+        seen = {}
+
+        def step_executor(step, context):
+            seen[step.agent.name] = {name: len(value) for name, value in context.items()}
+            return step.agent.name * 10_000
+
+        engine = CoordinationEngine(step_executor=step_executor, context_budget=ContextBudget(max_tokens=50))
+        result = engine.execute(make_chain(registry))
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert seen["pm-agent"] == {}
+        for previous, name in zip(CHAIN, CHAIN[1:]):
+            assert list(seen[name]) == [previous]
+            assert seen[name][previous] < 50 * CHARS_PER_TOKEN + 40
+        assert "clipped_context" not in result.step_results[0].metadata
+        assert result.step_results[1].metadata["clipped_context"] == ["pm-agent"]
+        # Full outputs remain in the results
+        assert len(result.step_results[-1].output) == len("doc-agent") * 10_000
+
+    def test_unlimited_by_default(self, registry):
+        """测试：未设置 context_budget 时依赖输出完整传递"""
+        seen = {}
+
+        def step_executor(step, context):
+            seen[step.agent.name] = {name: len(value) for name, value in context.items()}
+            return step.agent.name * 10_000
+
+        result = CoordinationEngine(step_executor=step_executor).execute(make_chain(registry))
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert seen["doc-agent"] == {"review-agent": len("review-agent") * 10_000}
+        assert not any("clipped_context" in r.metadata for r in result.step_results)
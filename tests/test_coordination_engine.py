@@ -0,0 +1,264 @@
+"""
+单元测试：CoordinationEngine 并发执行
+
+验证同一并行组的 worker 真正并发执行（线程池有上限）、
+结果与上下文按步骤顺序确定性合并、单步超时、取消、
+异步 step executor、进度单调递增，以及依赖驱动的就绪队列调度
+（组合工作流最大重叠、关键路径优先、失败步骤下游跳过）。
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from commands.lib.agent_execution_history import AgentExecutionHistory, ExecutionRecord
+from commands.lib.agent_router import AgentWorkflow, CoordinationMode, WorkflowStep
+from commands.lib.coordination_engine import CoordinationEngine, ExecutionStatus
+from commands.lib.workflow_estimator import WorkflowEstimator
+from conftest import make_workflow
+
+
+WORKERS = ["architect-agent", "code-agent", "test-agent", "review-agent"]
+
+
+def make_pm_workflow(registry, mode=CoordinationMode.HIERARCHICAL, workers=WORKERS):
+    """PM → workers (parallel group 1) → PM"""
+    pm = registry.get_agent("pm-agent")
+    steps = [WorkflowStep(agent=pm, role="coordinator", dependencies=[])]
+    steps += [
+        WorkflowStep(agent=registry.get_agent(name), role="worker",
+                     dependencies=["pm-agent"], parallel_group=1)
+        for name in workers
+    ]
+    steps.append(WorkflowStep(agent=pm, role="primary", dependencies=list(workers)))
+    return AgentWorkflow(
+        mode=mode, primary_agent=pm, steps=steps,
+        estimated_time="", confidence=0.9, explanation=""
+    )
+
+
+def record(agent, seconds):
+    return ExecutionRecord(
+        timestamp=datetime.now().isoformat(),
+        agent_id=agent,
+        agent_name=agent,
+        user_command="/wf_05_code",
+        agent_recommendation="/wf_05_code",
+        executed_command="/wf_05_code",
+        execution_status="success",
+        execution_time=seconds,
+    )
+
+
+class ConcurrencyProbe:
+    """step_executor that sleeps per agent and records peak concurrency"""
+
+    def __init__(self, delays=None, default=0.15):
+        self.delays = delays or {}
+        self.default = default
+        self.running = 0
+        self.peak = 0
+        self.contexts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, step, context):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.contexts.setdefault(step.agent.name, []).append(sorted(context))
+        time.sleep(self.delays.get(step.agent.name, self.default) if step.role == "worker" else 0)
+        with self._lock:
+            self.running -= 1
+        return f"{step.agent.name} done"
+
+
+class TestConcurrentWorkers:
+    """测试 worker 并发执行"""
+
+    @pytest.mark.parametrize("mode", [CoordinationMode.PARALLEL, CoordinationMode.HIERARCHICAL])
+    def test_workers_run_concurrently(self, registry, mode):
+        """测试：同组 worker 同时运行，墙钟时间接近最慢的 worker"""
+        probe = ConcurrencyProbe()
+        result = CoordinationEngine(step_executor=probe).execute(make_pm_workflow(registry, mode))
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert probe.peak == len(WORKERS)
+        assert result.total_duration < 0.15 * len(WORKERS) * 0.75
+
+    def test_pool_is_bounded(self, registry):
+        """测试：同时运行的步骤数不超过 max_workers"""
+        probe = ConcurrencyProbe(default=0.05)
+        CoordinationEngine(max_workers=2, step_executor=probe).execute(make_pm_workflow(registry))
+        assert probe.peak == 2
+
+    def test_deterministic_merge(self, registry):
+        """测试：结果按步骤顺序合并，每个步骤只看到其声明的依赖"""
+        delays = {"architect-agent": 0.2, "code-agent": 0.0, "test-agent": 0.1, "review-agent": 0.05}
+        probe = ConcurrencyProbe(delays)
+        result = CoordinationEngine(step_executor=probe).execute(make_pm_workflow(registry))
+
+        names = [r.step.agent.name for r in result.step_results]
+        assert names == ["pm-agent"] + WORKERS + ["pm-agent"]
+        assert all(probe.contexts[name] == [["pm-agent"]] for name in WORKERS)
+        assert probe.contexts["pm-agent"][-1] == sorted(WORKERS)  # Declared dependencies only
+
+
+class TestTimeoutsAndCancellation:
+    """测试超时与取消"""
+
+    def test_step_timeout(self, registry):
+        """测试：超时步骤标记为失败，不等待其线程结束"""
+        probe = ConcurrencyProbe({"code-agent": 1.0}, default=0.0)
+        engine = CoordinationEngine(step_timeout=0.2, step_executor=probe)
+        result = engine.execute(make_pm_workflow(registry))
+
+        assert result.status == ExecutionStatus.FAILED
+        timed_out = result.get_failed_steps()
+        assert [r.step.agent.name for r in timed_out] == ["code-agent"]
+        assert timed_out[0].metadata["timed_out"]
+        assert result.total_duration < 0.8
+
+    def test_async_step_executor(self, registry):
+        """测试：协程 step executor 并发运行，超时会真正取消协程"""
+        cancelled = []
+
+        async def step_executor(step, context):
+            try:
+                await asyncio.sleep(0.5 if step.agent.name == "test-agent" else 0.1)
+            except asyncio.CancelledError:
+                cancelled.append(step.agent.name)
+                raise
+            return f"{step.agent.name} done"
+
+        engine = CoordinationEngine(step_timeout=0.3, step_executor=step_executor)
+        result = engine.execute(make_pm_workflow(registry))
+
+        assert [r.step.agent.name for r in result.get_failed_steps()] == ["test-agent"]
+        assert cancelled == ["test-agent"]
+
+    def test_cancel_during_workers(self, registry):
+        """测试：执行中取消，未完成的步骤标记为已取消"""
+        probe = ConcurrencyProbe({"review-agent": 1.0}, default=0.05)
+        engine = CoordinationEngine(step_executor=probe)
+        timer = threading.Timer(0.2, engine.cancel)
+        timer.start()
+        result = engine.execute(make_pm_workflow(registry))
+        timer.join()
+
+        assert result.status == ExecutionStatus.CANCELLED
+        statuses = {r.step.agent.name: r.status for r in result.step_results}
+        assert statuses["review-agent"] == ExecutionStatus.CANCELLED
+        assert statuses["code-agent"] == ExecutionStatus.COMPLETED
+        assert len(result.step_results) == 1 + len(WORKERS)  # Consolidation skipped
+
+
+class TestProgress:
+    """测试进度报告"""
+
+    @pytest.mark.parametrize("mode", list(CoordinationMode))
+    def test_progress_monotonic(self, registry, mode):
+        """测试：进度单调递增并以 1.0 结束"""
+        reports = []
+        probe = ConcurrencyProbe(default=0.01)
+        workflow = make_pm_workflow(registry, mode)
+        if mode == CoordinationMode.SINGLE:
+            workflow.steps = workflow.steps[:1]
+        engine = CoordinationEngine(lambda message, progress: reports.append(progress), step_executor=probe)
+        engine.execute(workflow)
+
+        assert reports == sorted(reports)
+        assert reports[-1] == 1.0
+
+
+class TestDagScheduler:
+    """测试依赖驱动的就绪队列调度"""
+
+    def test_composite_workflow_overlaps(self, registry):
+        """测试：串行 → 扇出 → 合并 → 扇出，依赖满足即启动"""
+        specs = {
+            "pm-agent": [],
+            "architect-agent": ["pm-agent"],
+            "code-agent": ["architect-agent"],
+            "test-agent": ["architect-agent"],
+            "review-agent": ["code-agent", "test-agent"],
+            "doc-agent": ["review-agent"],
+            "context-agent": ["review-agent"],
+            "debug-agent": ["code-agent"],  # Only waits for its own branch
+        }
+        probe = ConcurrencyProbe(default=0.1)
+        workflow = make_workflow(registry, specs, CoordinationMode.HIERARCHICAL, specs)
+        result = CoordinationEngine(step_executor=probe).execute(workflow)
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert [r.step.agent.name for r in result.step_results] == list(specs)
+        # Chain of 5 levels, not 8 steps back to back
+        assert result.total_duration < 0.1 * 5 + 0.25
+        assert probe.contexts["review-agent"] == [["code-agent", "test-agent"]]
+        assert probe.contexts["debug-agent"] == [["code-agent"]]
+
+    def test_critical_path_first(self, registry):
+        """测试：并发受限时优先启动关键路径上的步骤"""
+        history = AgentExecutionHistory()
+        for _ in range(3):
+            history.add_record(record("review-agent", 3600))
+        specs = {
+            "code-agent": [],
+            "test-agent": [],
+            "architect-agent": [],
+            "review-agent": ["architect-agent"],
+        }
+        order = []
+        engine = CoordinationEngine(
+            max_workers=1,
+            step_executor=lambda step, context: order.append(step.agent.name) or "",
+            estimator=WorkflowEstimator(history)
+        )
+        engine.execute(make_workflow(registry, specs, CoordinationMode.HIERARCHICAL, specs))
+        assert order == ["architect-agent", "review-agent", "code-agent", "test-agent"]
+
+    def test_sequential_mode_chains_steps(self, registry):
+        """测试：顺序模式中每一步都等待上一步"""
+        specs = {"code-agent": [], "test-agent": [], "review-agent": []}
+        probe = ConcurrencyProbe(default=0.02)
+        workflow = make_workflow(registry, specs, CoordinationMode.SEQUENTIAL, specs)
+        CoordinationEngine(step_executor=probe).execute(workflow)
+
+        assert probe.peak == 1
+        assert probe.contexts["review-agent"] == [["test-agent"]]
+
+    def test_dependents_of_failed_step_skipped(self, registry):
+        """测试：失败步骤的下游不再执行，其余分支照常完成"""
+        def step_executor(step, context):
+            if step.agent.name == "code-agent":
+                raise RuntimeError("boom")
+            return "ok"
+
+        specs = {
+            "pm-agent": [],
+            "code-agent": ["pm-agent"],
+            "test-agent": ["pm-agent"],
+            "review-agent": ["code-agent"],
+        }
+        workflow = make_workflow(registry, specs, CoordinationMode.HIERARCHICAL, specs)
+        result = CoordinationEngine(step_executor=step_executor).execute(workflow)
+
+        assert result.status == ExecutionStatus.FAILED
+        statuses = {r.step.agent.name: r.status for r in result.step_results}
+        assert statuses == {
+            "pm-agent": ExecutionStatus.COMPLETED,
+            "code-agent": ExecutionStatus.FAILED,
+            "test-agent": ExecutionStatus.COMPLETED,
+        }
+        assert result.metadata["skipped_steps"] == ["review-agent"]
+
+    def test_cycle_fails_workflow(self, registry):
+        """测试：依赖成环时工作流直接失败"""
+        specs = {"code-agent": ["test-agent"], "test-agent": ["code-agent"]}
+        result = CoordinationEngine(step_executor=lambda step, context: "").execute(
+            make_workflow(registry, specs, CoordinationMode.HIERARCHICAL, specs)
+        )
+        assert result.status == ExecutionStatus.FAILED
+        assert "cycles" in result.output
@@ -0,0 +1,107 @@
+"""
+单元测试：KeywordLexicon 单次扫描多模式匹配
+
+验证 Aho-Corasick 自动机与逐个子串检查结果一致（含重叠/嵌套关键词），
+命中按表和类别分组，以及 TaskAnalyzer / MCPSelector / AgentRouter
+从同一次扫描读取分类结果。
+"""
+
+import pytest
+
+from commands.lib.agent_registry import TaskQuery
+from commands.lib.keyword_lexicon import (
+    LEXICON_TABLES,
+    TABLE_COMPLEXITY,
+    TABLE_COORDINATION,
+    TABLE_INTENT,
+    TABLE_MCP_TOOL,
+    KeywordLexicon,
+    get_lexicon,
+)
+from commands.lib.mcp_selector import MCPSelector
+from commands.lib.task_analyzer import TaskAnalyzer, TaskIntent
+
+
+SAMPLE_TASKS = [
+    "重构用户模块并添加单元测试",
+    "Implement REST API with FastAPI and Redis",
+    "端到端系统架构设计，多个服务并行部署",
+    "修复 next.js 页面 bug，参考 best practice",
+    "编写 API文档 和使用指南",
+    "Debug the failing CI pipeline",
+    "",
+]
+
+
+def brute_force(text):
+    """Reference: every table entry checked with a substring test"""
+    lower = text.lower()
+    return {
+        (table, category): {k.lower() for k in keywords if k.lower() in lower}
+        for table, categories in LEXICON_TABLES.items()
+        for category, keywords in categories.items()
+    }
+
+
+class TestKeywordLexicon:
+    """测试自动机匹配语义"""
+
+    @pytest.mark.parametrize("text", SAMPLE_TASKS)
+    def test_scan_matches_substring_checks(self, text):
+        """测试：单次扫描结果与逐表逐词子串检查一致"""
+        hits = get_lexicon().scan(text)
+        for (table, category), expected in brute_force(text).items():
+            assert hits.matched(table, category) == expected
+            assert hits.has(table, category) == bool(expected)
+
+    def test_overlapping_and_nested_keywords(self):
+        """测试：重叠和嵌套的关键词全部报告"""
+        lexicon = KeywordLexicon({"t": {"a": ["he", "she", "his", "hers"], "b": ["单元测试", "测试"]}})
+        hits = lexicon.scan("USHERS 单元测试")
+        assert hits.matched("t", "a") == {"she", "he", "hers"}
+        assert hits.matched("t", "b") == {"单元测试", "测试"}
+
+    def test_shared_keyword_tagged_in_every_table(self):
+        """测试：同一关键词在多个表中都会被标记"""
+        hits = get_lexicon().scan("架构")
+        assert hits.has(TABLE_INTENT, "planning")
+        assert hits.has(TABLE_COMPLEXITY, "high")
+        assert hits.has(TABLE_COORDINATION, "hierarchical")
+
+    def test_hits_memoized_on_task_query(self):
+        """测试：TaskQuery 对每个请求只扫描一次"""
+        query = TaskQuery.of("重构系统架构")
+        assert query.lexicon_hits is query.lexicon_hits
+
+
+class TestLexiconConsumers:
+    """测试各模块从共享扫描读取分类"""
+
+    @pytest.fixture
+    def analyzer(self):
+        return TaskAnalyzer()
+
+    def test_intent_detection(self, analyzer):
+        """测试：意图检测结果与归一化分数"""
+        intent, confidence = analyzer._detect_intent("重构并优化代码")
+        assert intent == TaskIntent.REFACTORING
+        assert confidence == pytest.approx(2 / 8)
+        assert analyzer._detect_intent("你好")[0] == TaskIntent.UNCLEAR
+
+    def test_technical_stack_keeps_table_order(self, analyzer):
+        """测试：技术栈按表顺序返回显示名称"""
+        assert analyzer._extract_technical_stack("redis + python + jwt") == ["Python", "Redis", "JWT"]
+
+    def test_mcp_tool_keyword_count(self):
+        """测试：MCP 工具关键词计数与子串检查一致"""
+        task = "重构代码并查找符号引用"
+        expected = sum(1 for k in MCPSelector.MCP_CAPABILITIES["Serena"]["keywords"] if k in task)
+        assert TaskQuery.of(task).lexicon_hits.count(TABLE_MCP_TOOL, "Serena") == expected == 4
+
+    def test_mcp_complexity_features(self):
+        """测试：复杂度特征（大小写不敏感）"""
+        complexity = MCPSelector()._analyze_complexity_v2("设计 api 接口并支持 Async 调用")
+        assert complexity.features["api_design"]
+        assert complexity.features["integration"]
+        assert complexity.features["concurrent"]
+        assert not complexity.features["data_migration"]
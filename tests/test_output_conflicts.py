@@ -0,0 +1,128 @@
+"""
+单元测试：output_conflicts 基于签名与 LSH 的冲突检测
+
+验证决策关键词按整词匹配、同一主题且决策相反才算冲突、
+LSH 候选对与暴力两两比较一致（高相似度对不漏检）、
+大规模扇出时候选对远少于全部配对，以及 CoordinationEngine 的冲突报告。
+"""
+
+import random
+
+import pytest
+
+from commands.lib.agent_router import CoordinationMode
+from commands.lib.coordination_engine import CoordinationEngine
+from commands.lib.output_conflicts import (
+    ConflictDetector,
+    decision_keywords,
+    jaccard,
+    shingle_set,
+)
+from conftest import make_workflow
+
+
+SUBJECTS = [
+    "login flow uses jwt access tokens with refresh rotation and redis sessions",
+    "database migration adds user email index and drops legacy audit table",
+    "payment retry policy backs off exponentially and alerts on third failure",
+    "file upload limit raised to fifty megabytes with virus scanning enabled",
+    "api rate limiter uses token bucket per client with burst allowance",
+]
+
+
+def review(subject, verdict, rng):
+    words = subject.split()
+    tail = words[-3:]
+    rng.shuffle(tail)  # Small wording differences between reviewers
+    words[-3:] = tail
+    return f"Review {verdict}: {' '.join(words)}"
+
+
+class TestSignatures:
+    """测试输出签名"""
+
+    def test_decision_keywords_are_whole_words(self):
+        """测试：know / node / password 等词不会误判为决策"""
+        assert decision_keywords("I know the node password is fine") == frozenset()
+        assert decision_keywords("Tests PASS, answer: No.") == {"pass", "no"}
+
+    def test_cjk_shingles(self):
+        """测试：中文按字切分，相同内容签名一致"""
+        assert shingle_set("实现用户登录") == shingle_set("实现 用户 登录")
+        assert jaccard(shingle_set("实现用户登录功能"), shingle_set("实现用户注册功能")) < 1.0
+
+
+class TestDetection:
+    """测试冲突判定"""
+
+    def test_same_subject_opposite_decisions(self):
+        """测试：同一主题、决策相反时报告冲突"""
+        detector = ConflictDetector()
+        detector.add(0, "review-agent", "Design approved: " + SUBJECTS[0])
+        detector.add(1, "security-agent", "Design rejected: " + SUBJECTS[0])
+        detector.add(2, "test-agent", "Design approved: " + SUBJECTS[0])
+
+        conflicts = detector.detect()
+        assert [c.describe() for c in conflicts] == [
+            "Potential conflict between review-agent and security-agent (approved vs rejected)",
+            "Potential conflict between security-agent and test-agent (rejected vs approved)",
+        ]
+
+    def test_different_subjects_do_not_conflict(self):
+        """测试：不同主题的相反决策、或相同决策都不算冲突"""
+        detector = ConflictDetector()
+        detector.add(0, "a", "approved: " + SUBJECTS[0])
+        detector.add(1, "b", "rejected: " + SUBJECTS[1])
+        detector.add(2, "c", "approved: " + SUBJECTS[1])
+        detector.add(3, "d", "no decision here: " + SUBJECTS[1])
+        assert [(c.first, c.second) for c in detector.detect()] == [("b", "c")]
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_brute_force(self, seed):
+        """测试：高相似度的冲突对与暴力两两比较结果一致"""
+        rng = random.Random(seed)
+        verdicts = ["approved", "rejected", "pass", "fail"]
+        outputs = [review(rng.choice(SUBJECTS), rng.choice(verdicts), rng) for _ in range(40)]
+
+        detector = ConflictDetector(min_similarity=0.5)
+        for index, output in enumerate(outputs):
+            detector.add(index, f"agent-{index}", output)
+        found = {(c.first, c.second) for c in detector.detect()}
+
+        expected = set()
+        for i in range(len(outputs)):
+            for j in range(i + 1, len(outputs)):
+                a, b = detector._signatures[i], detector._signatures[j]
+                if ConflictDetector._opposing(a.decisions, b.decisions) and \
+                        jaccard(a.shingles, b.shingles) >= 0.5:
+                    expected.add((f"agent-{i}", f"agent-{j}"))
+        assert found == expected
+
+    def test_candidates_near_linear(self):
+        """测试：大规模扇出时只比较少量候选对"""
+        rng = random.Random(7)
+        detector = ConflictDetector()
+        count = 200
+        for index in range(count):
+            topic = " ".join(rng.choice(["alpha", "beta", "gamma", "delta", "omega", "sigma"])
+                             + str(rng.randrange(1000)) for _ in range(30))
+            detector.add(index, f"reviewer-{index}", f"{rng.choice(['approved', 'rejected'])}: {topic}")
+        detector.detect()
+        assert detector.stats.candidates < count * (count - 1) // 2 // 20
+
+
+class TestEngineConflicts:
+    """测试 CoordinationEngine 冲突报告"""
+
+    def test_reports_correct_pair(self, registry):
+        """测试：冲突报告指向真正冲突的两个步骤"""
+        workflow = make_workflow(registry, ["code-agent", "doc-agent", "test-agent"], CoordinationMode.PARALLEL)
+        outputs = {
+            "code-agent": "Migration approved: " + SUBJECTS[1],
+            "doc-agent": "Docs updated for the upload limit",
+            "test-agent": "Migration rejected: " + SUBJECTS[1],
+        }
+        result = CoordinationEngine(step_executor=lambda step, context: outputs[step.agent.name]).execute(workflow)
+        assert result.conflicts == [
+            "Potential conflict between code-agent and test-agent (approved vs rejected)"
+        ]
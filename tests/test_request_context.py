@@ -0,0 +1,169 @@
+"""
+单元测试：RequestContext 请求级记忆化
+
+验证同一请求中 AgentRouter / TaskAnalyzer / AgentCoordinator / MCPSelector
+共享一次 agent 匹配与 MCP 推荐，较小的 top_k 由已有结果的前缀提供，
+并由计数器证明每类计算至多执行一次。
+"""
+
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from commands.lib.agent_coordinator import AgentCoordinator
+from commands.lib.agent_execution_pipeline import AgentExecutionPipeline
+from commands.lib.agent_registry import AgentRegistry, get_agent_registry
+from commands.lib.agent_router import AgentRouter
+from commands.lib.mcp_selector import MCPSelector
+from commands.lib.request_context import RequestContext
+from commands.lib.task_analyzer import TaskAnalyzer
+
+
+TASK = "设计完整的用户认证系统架构"
+
+
+@pytest.fixture
+def registry():
+    return AgentRegistry(cache_size=0)
+
+
+class TestRequestContext:
+    """测试记忆化与计数"""
+
+    def test_smaller_top_k_served_as_prefix(self, registry):
+        """测试：top_k 前缀与直接调用 select_agent 一致，只计算一次"""
+        ctx = RequestContext(TASK)
+        for top_k in (3, 1, 2):
+            expected = registry.select_agent(TASK, top_k=top_k)
+            assert [m.agent.name for m in ctx.select_agent(registry, top_k)] == \
+                [m.agent.name for m in expected]
+        assert ctx.stats.computed['matches'] == 1
+        assert ctx.stats.reused['matches'] == 2
+
+    def test_larger_top_k_recomputes(self, registry):
+        """测试：超出已记忆深度时重新选择"""
+        ctx = RequestContext(TASK)
+        ctx.select_agent(registry, 1)
+        assert len(ctx.select_agent(registry, 5)) == len(registry.select_agent(TASK, top_k=5))
+        assert ctx.stats.computed['matches'] == 2
+
+    def test_returned_lists_are_independent(self, registry):
+        """测试：调用方修改返回列表不影响记忆值"""
+        ctx = RequestContext(TASK)
+        ctx.select_agent(registry, 3).clear()
+        assert ctx.select_agent(registry, 3)
+
+    def test_of_reuses_given_context(self):
+        """测试：of() 优先使用传入的上下文（空白和大小写差异视为同一任务）"""
+        ctx = RequestContext(TASK)
+        assert RequestContext.of(f"  {TASK} ", ctx) is ctx
+        assert RequestContext.of(TASK).query.text == TASK
+
+    def test_of_rejects_other_task(self):
+        """测试：为其他任务创建的上下文被拒绝"""
+        with pytest.raises(ValueError, match="different task"):
+            RequestContext.of("other", RequestContext(TASK))
+
+
+class TestSharedAcrossComponents:
+    """测试组件间共享同一请求上下文"""
+
+    def test_route_analyze_intercept_select_once(self):
+        """测试：分层路由 + 分析 + 拦截只做一次 agent 匹配"""
+        registry = get_agent_registry()
+        ctx = RequestContext(TASK)
+        with patch.object(registry, 'select_agent', wraps=registry.select_agent) as spy:
+            workflow = AgentRouter(registry, cache_size=0).route(
+                TASK, mode="hierarchical", request_context=ctx
+            )
+            analysis = TaskAnalyzer(registry).analyze(TASK, request_context=ctx)
+            agent_context = AgentCoordinator().intercept(TASK, "wf_05_code", request_context=ctx)
+
+        assert spy.call_count == 1
+        assert ctx.stats.computed['matches'] == 1
+        assert ctx.stats.reused['matches'] >= 3
+        assert workflow.steps
+        assert analysis.primary_agent.agent.name == agent_context['agent'].name
+
+    def test_results_match_uncontexted_calls(self, registry):
+        """测试：共享上下文不改变分析结果"""
+        analyzer = TaskAnalyzer(registry)
+        shared = analyzer.analyze(TASK, request_context=RequestContext(TASK))
+        plain = analyzer.analyze(TASK)
+        assert shared.intent == plain.intent
+        assert shared.complexity == plain.complexity
+        assert shared.primary_agent.agent.name == plain.primary_agent.agent.name
+        assert shared.confidence == pytest.approx(plain.confidence)
+
+    def test_mcp_recommendations_memoized_per_agent(self, registry):
+        """测试：MCP 推荐和复杂度每个请求只计算一次"""
+        agent = registry.get_agent("architect-agent")
+        selector = MCPSelector()
+        ctx = RequestContext(TASK)
+        first = selector.select_tools_v2(agent, TASK, request_context=ctx)
+        second = selector.select_tools_v2(agent, TASK, request_context=ctx)
+        assert [r.tool_name for r in first] == [r.tool_name for r in second]
+        assert [r.tool_name for r in first] == \
+            [r.tool_name for r in selector.select_tools_v2(agent, TASK)]
+        assert ctx.stats.computed['mcp_tools'] == 1
+        assert ctx.stats.reused['mcp_tools'] == 1
+        assert ctx.stats.computed['mcp_complexity'] == 1
+
+    def test_route_cache_hit_feeds_context(self, registry):
+        """测试：route 命中跨请求缓存时，缓存的匹配结果交给本请求的上下文"""
+        router = AgentRouter(registry)
+        router.route(TASK)
+
+        ctx = RequestContext(TASK)
+        with patch.object(registry, 'select_agent', wraps=registry.select_agent) as spy:
+            router.route(TASK, request_context=ctx)
+            analysis = TaskAnalyzer(registry).analyze(TASK, request_context=ctx)
+
+        assert router.routing_cache.stats.hits == 1
+        assert spy.call_count == 0
+        assert ctx.stats.computed['matches'] == 0
+        assert ctx.stats.reused['matches'] == 2
+        assert analysis.primary_agent.agent.name == TaskAnalyzer(registry).analyze(TASK).primary_agent.agent.name
+
+
+class TestPipeline:
+    """测试执行管道共享请求上下文"""
+
+    def test_decision_stage_shares_context(self, registry):
+        """测试：决策阶段通过 context['request_context'] 复用调用方已完成的 agent 匹配"""
+        ctx = RequestContext(TASK)
+        TaskAnalyzer(registry).analyze(TASK, request_context=ctx)
+
+        def recommend(user_input, command_name, context):
+            context['request_context'].select_agent(registry, 1)
+            return SimpleNamespace(confidence=0.5, matched_agent=None)
+
+        pipeline = AgentExecutionPipeline()
+        pipeline.decision_engine.analyze_and_recommend = Mock(side_effect=recommend)
+        result = pipeline.execute_single_agent(TASK, "wf_03_prd", request_context=ctx)
+
+        stats = result.metadata['request_stats']
+        assert result.metadata['skipped']
+        assert stats['computed']['matches'] == 1
+        assert stats['reused']['matches'] == 1
+        assert stats['computed']['intent'] == 1
+
+    def test_default_context_created(self):
+        """测试：未传入上下文时管道新建一个，并记录决策阶段的计数"""
+        pipeline = AgentExecutionPipeline()
+        pipeline.decision_engine.analyze_and_recommend = Mock(
+            return_value=SimpleNamespace(confidence=0.5, matched_agent=None)
+        )
+        result = pipeline.execute_single_agent(TASK, "wf_03_prd")
+
+        ctx = pipeline.decision_engine.analyze_and_recommend.call_args.kwargs['context']['request_context']
+        assert ctx.query.text == TASK
+        assert result.metadata['request_stats'] == ctx.stats.as_dict()
+
+    def test_rejects_context_of_other_task(self):
+        """测试：传入其他任务的上下文时报错"""
+        with pytest.raises(ValueError):
+            AgentExecutionPipeline().execute_single_agent(
+                TASK, "wf_03_prd", request_context=RequestContext("other")
+            )
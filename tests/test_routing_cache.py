@@ -0,0 +1,187 @@
+"""
+单元测试：RoutingCache 路由结果缓存
+
+验证 LRU 容量、TTL 过期、MinHash 近似重复命中、registry reload
+失效，以及 select_agent / route 的缓存接入。
+"""
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry, TaskQuery
+from commands.lib.agent_router import AgentRouter
+from commands.lib.routing_cache import RoutingCache, jaccard, shingle_hashes
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def put(cache, text, value, context=None, generation=None):
+    query = TaskQuery.from_text(text)
+    cache.put(query.key, query.clean, value, context=context, generation=generation)
+
+
+def get(cache, text, context=None, generation=None):
+    query = TaskQuery.from_text(text)
+    return cache.get(query.key, query.clean, context=context, generation=generation)
+
+
+class TestRoutingCache:
+    """测试缓存本身的命中、淘汰和失效"""
+
+    def test_exact_hit_ignores_case_and_whitespace(self):
+        """测试：大小写和多余空白不影响精确命中"""
+        cache = RoutingCache()
+        put(cache, "Fix the login bug", "v")
+        assert get(cache, "  fix   the LOGIN bug ") == "v"
+        assert cache.stats.hits == 1
+
+    def test_lru_eviction(self):
+        """测试：超过容量时淘汰最久未使用的条目"""
+        cache = RoutingCache(max_size=2, near_duplicates=False)
+        put(cache, "a", 1)
+        put(cache, "b", 2)
+        get(cache, "a")
+        put(cache, "c", 3)
+
+        assert get(cache, "b") is None
+        assert get(cache, "a") == 1
+        assert cache.stats.evictions == 1
+
+    def test_ttl_expiry(self):
+        """测试：超过 TTL 的条目不再命中"""
+        clock = FakeClock()
+        cache = RoutingCache(ttl=10, clock=clock)
+        put(cache, "实现用户登录功能支持邮箱", "v")
+        clock.now = 11
+
+        assert get(cache, "实现用户登录功能支持邮箱") is None
+        assert cache.stats.expirations == 1
+        assert len(cache) == 0
+
+    def test_near_duplicate_typo_and_punctuation(self):
+        """测试：开启近似匹配时，错别字和追加标点命中近似重复条目"""
+        cache = RoutingCache(near_duplicates=True)
+        put(cache, "实现用户登录功能，支持邮箱和手机号", "v")
+
+        assert get(cache, "实现用户登陆功能，支持邮箱和手机号") == "v"
+        assert get(cache, "实现用户登录功能，支持邮箱和手机号！！") == "v"
+        assert cache.stats.near_hits == 2
+
+    def test_different_task_is_not_near_duplicate(self):
+        """测试：不同任务不会误命中"""
+        cache = RoutingCache(near_duplicates=True)
+        put(cache, "实现用户登录功能，支持邮箱和手机号", "v")
+        assert get(cache, "设计数据库架构并评估分库分表方案") is None
+        assert cache.stats.misses == 1
+
+    def test_short_text_requires_exact_match(self):
+        """测试：过短文本不做近似匹配"""
+        cache = RoutingCache(near_duplicates=True)
+        put(cache, "修复登录bug", "v")
+        assert get(cache, "修复注册bug") is None
+
+    def test_exact_only_by_default(self):
+        """测试：默认只做精确命中"""
+        cache = RoutingCache()
+        put(cache, "实现用户登录功能，支持邮箱和手机号", "v")
+        assert get(cache, "实现用户登陆功能，支持邮箱和手机号") is None
+        assert cache.stats.near_hits == 0
+
+    def test_context_separates_entries(self):
+        """测试：不同 context（top_k / mode）互不命中"""
+        cache = RoutingCache()
+        put(cache, "实现用户登录功能支持邮箱", "one", context=1)
+        assert get(cache, "实现用户登录功能支持邮箱", context=3) is None
+        assert get(cache, "实现用户登录功能支持邮箱", context=1) == "one"
+
+    def test_generation_change_invalidates(self):
+        """测试：generation（registry 快照）变化时清空缓存"""
+        cache = RoutingCache()
+        old, new = object(), object()
+        put(cache, "实现用户登录功能支持邮箱", "v", generation=old)
+
+        assert get(cache, "实现用户登录功能支持邮箱", generation=new) is None
+        assert cache.stats.invalidations == 1
+
+    def test_hit_rate(self):
+        """测试：命中率统计"""
+        cache = RoutingCache()
+        put(cache, "abc", "v")
+        get(cache, "abc")
+        get(cache, "xyz")
+        assert cache.stats.hit_rate == 0.5
+
+    def test_jaccard_of_shingles(self):
+        """测试：二元组 Jaccard 相似度"""
+        a = shingle_hashes("实现用户登录功能")
+        assert jaccard(a, a) == 1.0
+        assert jaccard(a, shingle_hashes("实现用户注册功能")) < 0.6
+
+
+class TestRoutingCacheIntegration:
+    """测试 select_agent / route 接入缓存"""
+
+    @pytest.fixture
+    def registry(self):
+        return AgentRegistry()
+
+    def test_select_agent_cached(self, registry):
+        """测试：重复请求命中缓存且结果一致"""
+        first = registry.select_agent("修复支付API的bug", top_k=3)
+        second = registry.select_agent("修复支付API的BUG ", top_k=3)
+
+        assert second == first
+        assert second is not first
+        assert registry.routing_cache.stats.hits == 1
+
+    def test_similar_task_is_routed_afresh(self, registry):
+        """测试：字面相似但意图不同的任务不复用上一个任务的结果"""
+        registry.select_agent("重构用户登录模块代码", top_k=3)
+        matches = registry.select_agent("测试用户登录模块代码", top_k=3)
+
+        assert matches == AgentRegistry(cache_size=0).select_agent("测试用户登录模块代码", top_k=3)
+        assert "test-agent" in [m.agent.name for m in matches]
+        assert registry.routing_cache.stats.hits == 0
+
+    def test_top_k_is_part_of_key(self, registry):
+        """测试：不同 top_k 分别缓存"""
+        registry.select_agent("修复支付API的bug", top_k=1)
+        assert len(registry.select_agent("修复支付API的bug", top_k=3)) > 1
+
+    def test_reload_invalidates(self, registry):
+        """测试：registry reload 后缓存失效"""
+        registry.select_agent("修复支付API的bug")
+        registry.reload()
+        registry.select_agent("修复支付API的bug")
+
+        assert registry.routing_cache.stats.hits == 0
+        assert registry.routing_cache.stats.invalidations == 1
+
+    def test_cache_disabled(self):
+        """测试：cache_size=0 关闭缓存"""
+        assert AgentRegistry(cache_size=0).routing_cache is None
+
+    def test_route_cached_returns_copy(self, registry):
+        """测试：route 命中缓存时返回可修改的副本"""
+        router = AgentRouter(registry)
+        first = router.route("实现用户认证系统并编写测试", mode="sequential")
+        first.steps.clear()
+        second = router.route("实现用户认证系统并编写测试", mode="sequential")
+
+        assert second.steps
+        assert router.routing_cache.stats.hits == 1
+
+    def test_route_similar_task_not_reused(self, registry):
+        """测试：route 对字面相似的不同任务重新路由"""
+        router = AgentRouter(registry)
+        router.route("重构用户登录模块代码")
+        workflow = router.route("测试用户登录模块代码")
+
+        fresh = AgentRouter(AgentRegistry(cache_size=0), cache_size=0).route("测试用户登录模块代码")
+        assert workflow.primary_agent.name == fresh.primary_agent.name
+        assert router.routing_cache.stats.hits == 0
@@ -0,0 +1,136 @@
+"""
+单元测试：StepCache 步骤输出缓存
+
+验证内容寻址键（agent、角色、依赖输出、任务）、内存 LRU 与磁盘两级缓存、
+StepResult.metadata 中的命中/未命中记录、按 agent 退出缓存，
+以及上游输出变化时下游步骤重新计算。
+"""
+
+from commands.lib.agent_router import WorkflowStep
+from commands.lib.coordination_engine import CoordinationEngine, ExecutionStatus
+from commands.lib.step_cache import TIER_DISK, TIER_MEMORY, StepCache
+from conftest import make_workflow
+
+
+AGENTS = ["architect-agent", "code-agent", "test-agent"]
+
+
+class CountingExecutor:
+    """step_executor with configurable outputs that counts calls"""
+
+    def __init__(self, outputs=None):
+        self.outputs = outputs or {}
+        self.calls = []
+
+    def __call__(self, step, context):
+        self.calls.append(step.agent.name)
+        return self.outputs.get(step.agent.name, f"{step.agent.name} output")
+
+
+def cache_states(result):
+    return [r.metadata.get("cache") for r in result.step_results]
+
+
+class TestStepCacheKey:
+    """测试内容寻址键"""
+
+    def test_key_covers_inputs(self, registry):
+        """测试：agent、角色、依赖输出、任务任一变化都会改变键"""
+        cache = StepCache()
+        step = WorkflowStep(agent=registry.get_agent("code-agent"), role="worker", dependencies=[])
+        base = cache.key(step, {"architect-agent": "design"}, "task")
+
+        assert cache.key(step, {"architect-agent": "design"}, "task") == base
+        assert cache.key(step, {"architect-agent": "design v2"}, "task") != base
+        assert cache.key(step, {"architect-agent": "design"}, "other task") != base
+        other_role = WorkflowStep(agent=step.agent, role="primary", dependencies=[])
+        assert cache.key(other_role, {"architect-agent": "design"}, "task") != base
+        assert StepCache(namespace="v2").key(step, {"architect-agent": "design"}, "task") != base
+
+    def test_lru_bound(self):
+        """测试：内存层按 LRU 淘汰"""
+        cache = StepCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == ("1", TIER_MEMORY)
+        assert cache.stats.evictions == 1
+
+
+class TestEngineCaching:
+    """测试 CoordinationEngine 使用步骤缓存"""
+
+    def test_rerun_hits_cache(self, registry):
+        """测试：相同工作流重跑时全部命中，不再调用 agent"""
+        cache = StepCache()
+        first = CountingExecutor()
+        result = CoordinationEngine(step_executor=first, step_cache=cache).execute(
+            make_workflow(registry, AGENTS), task="实现登录"
+        )
+        assert cache_states(result) == ["miss", "miss", "miss"]
+
+        second = CountingExecutor()
+        result = CoordinationEngine(step_executor=second, step_cache=cache).execute(
+            make_workflow(registry, AGENTS), task="实现登录"
+        )
+        assert result.status == ExecutionStatus.COMPLETED
+        assert second.calls == []
+        assert cache_states(result) == ["hit", "hit", "hit"]
+        assert all(r.metadata["cache_tier"] == TIER_MEMORY for r in result.step_results)
+
+    def test_changed_upstream_recomputes_downstream(self, registry, tmp_path):
+        """测试：依赖输出变化的步骤重新计算，依赖未变的步骤仍命中"""
+        directory = str(tmp_path / "step_cache")
+        CoordinationEngine(
+            step_executor=CountingExecutor(), step_cache=StepCache(directory=directory)
+        ).execute(make_workflow(registry, AGENTS))
+
+        # architect-agent reruns (excluded) and now answers differently
+        executor = CountingExecutor({"architect-agent": "new design"})
+        cache = StepCache(directory=directory, exclude_agents=["architect-agent"])
+        result = CoordinationEngine(step_executor=executor, step_cache=cache).execute(make_workflow(registry, AGENTS))
+
+        # test-agent only sees code-agent, whose output did not change
+        assert executor.calls == ["architect-agent", "code-agent"]
+        assert cache_states(result) == ["bypass", "miss", "hit"]
+
+    def test_disk_tier_survives_new_cache(self, registry, tmp_path):
+        """测试：磁盘层在新进程（新缓存实例）中命中"""
+        directory = str(tmp_path / "step_cache")
+        CoordinationEngine(
+            step_executor=CountingExecutor(), step_cache=StepCache(directory=directory)
+        ).execute(make_workflow(registry, AGENTS))
+
+        executor = CountingExecutor()
+        cache = StepCache(directory=directory)
+        result = CoordinationEngine(step_executor=executor, step_cache=cache).execute(make_workflow(registry, AGENTS))
+        assert executor.calls == []
+        assert all(r.metadata["cache_tier"] == TIER_DISK for r in result.step_results)
+        assert cache.stats.disk_hits == 3
+
+    def test_agents_can_opt_out(self, registry):
+        """测试：声明 cacheable: false 或被排除的 agent 总是重新执行"""
+        assert registry.get_agent("research-agent").decision_criteria["cacheable"] is False
+
+        cache = StepCache(exclude_agents=["test-agent"])
+        workflow = make_workflow(registry, ["research-agent"] + AGENTS[1:])
+        CoordinationEngine(step_executor=CountingExecutor(), step_cache=cache).execute(workflow)
+
+        executor = CountingExecutor()
+        result = CoordinationEngine(step_executor=executor, step_cache=cache).execute(workflow)
+        assert executor.calls == ["research-agent", "test-agent"]
+        assert cache_states(result) == ["bypass", "hit", "bypass"]
+
+    def test_failed_steps_not_cached(self, registry):
+        """测试：失败步骤不写入缓存"""
+        cache = StepCache()
+
+        def failing(step, context):
+            raise RuntimeError("boom")
+
+        result = CoordinationEngine(step_executor=failing, step_cache=cache).execute(make_workflow(registry, AGENTS))
+        assert result.status == ExecutionStatus.FAILED
+        assert result.step_results[0].metadata["cache"] == "miss"
+        assert len(cache) == 0
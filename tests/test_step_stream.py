@@ -0,0 +1,158 @@
+"""
+单元测试：步骤之间的流式流水线交接
+
+验证 StepStream 的有界滞后（背压）与防死锁、上游失败向读取方传播，
+以及 CoordinationEngine 中声明流式输入的步骤在上游仍在输出时启动、
+缩短链路总耗时，上游失败时其结果不被采用。
+"""
+
+import threading
+import time
+
+import pytest
+
+from commands.lib.coordination_engine import CoordinationEngine, ExecutionStatus
+from commands.lib.step_stream import StepStream, UpstreamFailed
+from conftest import make_workflow
+
+
+CHAIN = ["code-agent", "review-agent", "doc-agent"]
+
+
+class PipelineExecutor:
+    """code-agent yields files slowly, review-agent reviews each file, doc-agent summarizes"""
+
+    def __init__(self, files=5, delay=0.05, fail_after=None):
+        self.files = files
+        self.delay = delay
+        self.fail_after = fail_after
+        self.events = []
+        self._lock = threading.Lock()
+
+    def log(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def __call__(self, step, context):
+        name = step.agent.name
+        if name == "code-agent":
+            return self.produce()
+        if name == "review-agent":
+            reviews = []
+            stream = context.stream("code-agent") if hasattr(context, "stream") else [context["code-agent"]]
+            for chunk in stream:
+                self.log(("review", chunk.strip()))
+                time.sleep(self.delay)
+                reviews.append(f"ok {chunk}")
+            return "".join(reviews)
+        return f"summary of {len(context['review-agent'].splitlines())} reviews"
+
+    def produce(self):
+        for i in range(self.files):
+            if self.fail_after is not None and i == self.fail_after:
+                raise RuntimeError("compiler crashed")
+            time.sleep(self.delay)
+            self.log(("code", f"file{i}"))
+            yield f"file{i}\n"
+
+
+class TestStepStream:
+    """测试 StepStream"""
+
+    def test_bounded_lag(self):
+        """测试：读取方落后超过 maxsize 时生产方等待"""
+        stream = StepStream("code-agent", maxsize=3)
+        reader = stream.reader()
+        lags = []
+
+        def produce():
+            for i in range(30):
+                stream.publish(str(i))
+            stream.close()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        for _ in reader:
+            lags.append(stream.stats.chunks - reader.position)
+            time.sleep(0.002)
+        producer.join()
+
+        assert reader.stream.text == "".join(str(i) for i in range(30))
+        assert max(lags) <= 3
+        assert stream.stats.stalls > 0 and stream.stats.overruns == 0
+
+    def test_stall_limit_and_detach(self):
+        """测试：读取方不读取时生产方最多等待 max_stall，关闭读取方后不再等待"""
+        stream = StepStream("code-agent", maxsize=1, max_stall=0.02)
+        idle = stream.reader()
+        for i in range(3):
+            stream.publish(str(i))
+        assert stream.stats.overruns == 2
+
+        idle.close()
+        stream.publish("3")
+        assert stream.stats.overruns == 2
+
+    def test_upstream_error(self):
+        """测试：带错误关闭的流先交付已有块，再抛出 UpstreamFailed"""
+        stream = StepStream("code-agent")
+        reader = stream.reader()
+        stream.publish("partial")
+        stream.close("compiler crashed")
+
+        assert next(reader) == "partial"
+        with pytest.raises(UpstreamFailed, match="compiler crashed"):
+            next(reader)
+
+
+class TestPipelinedWorkflow:
+    """测试 CoordinationEngine 流水线交接"""
+
+    def test_consumer_starts_before_producer_finishes(self, registry):
+        """测试：声明流式输入的步骤边接收边处理，总耗时低于串行"""
+        executor = PipelineExecutor()
+        engine = CoordinationEngine(step_executor=executor, streaming_agents=["review-agent", "doc-agent"])
+        result = engine.execute(make_workflow(registry, CHAIN))
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert executor.events.index(("review", "file0")) < executor.events.index(("code", "file4"))
+        assert result.step_results[1].output == "".join(f"ok file{i}\n" for i in range(5))
+        assert result.step_results[1].metadata["streamed_from"] == ["code-agent"]
+        assert result.step_results[2].output == "summary of 5 reviews"
+        assert result.total_duration < 0.45  # Sequential: 5 × 0.05 + 5 × 0.05
+
+    def test_opt_in(self, registry):
+        """测试：未声明流式输入的步骤仍等待上游完成"""
+        executor = PipelineExecutor(delay=0.01)
+        result = CoordinationEngine(step_executor=executor).execute(make_workflow(registry, CHAIN))
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert executor.events.index(("code", "file4")) < executor.events.index(("review", "file0\nfile1\nfile2\nfile3\nfile4"))
+        assert "streamed_from" not in result.step_results[1].metadata
+
+    def test_upstream_failure(self, registry):
+        """测试：上游失败时提前启动的步骤不被视为完成，下游被跳过"""
+        executor = PipelineExecutor(delay=0.01, fail_after=2)
+        engine = CoordinationEngine(step_executor=executor, streaming_agents=["review-agent"])
+        result = engine.execute(make_workflow(registry, CHAIN))
+
+        assert result.status == ExecutionStatus.FAILED
+        code, review = result.step_results
+        assert code.error == "compiler crashed"
+        assert review.status == ExecutionStatus.FAILED
+        assert review.error == "Upstream step code-agent failed"
+        assert result.metadata["skipped_steps"] == ["doc-agent"]
+
+    def test_consumer_finishing_first_is_held(self, registry):
+        """测试：先于上游结束的步骤，其结果在上游完成后才被采用"""
+        def step_executor(step, context):
+            if step.agent.name == "code-agent":
+                time.sleep(0.2)
+                return "code"
+            return "review without reading"
+
+        engine = CoordinationEngine(step_executor=step_executor, streaming_agents=["review-agent"])
+        result = engine.execute(make_workflow(registry, CHAIN[:2]))
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert [r.output for r in result.step_results] == ["code", "review without reading"]
@@ -0,0 +1,90 @@
+"""
+单元测试：TaskAnalyzer.analyze_stream 批量 JSONL 分析
+
+验证紧凑结果与 analyze() 一致、保持输入顺序、惰性读取（有界内存），
+以及无效行的错误报告。
+"""
+
+import itertools
+import json
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry
+from commands.lib.task_analyzer import TaskAnalyzer
+
+
+TASKS = [
+    "实现用户登录功能",
+    "修复支付API的bug",
+    "设计数据库架构",
+    "为订单模块编写单元测试",
+    "review the authentication code",
+    "优化查询性能",
+    "write README documentation",
+]
+
+
+@pytest.fixture
+def analyzer():
+    return TaskAnalyzer(AgentRegistry(cache_size=0))
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    lines = [json.dumps({"id": i, "task": task}, ensure_ascii=False) for i, task in enumerate(TASKS)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def endless_log():
+    for i in itertools.count():
+        yield json.dumps({"id": i, "task": TASKS[i % len(TASKS)]}, ensure_ascii=False)
+
+
+class TestAnalyzeStream:
+    """测试流式分析"""
+
+    def test_summary_matches_full_analysis(self, analyzer, log_file):
+        """测试：紧凑结果与 analyze() 的对应字段一致"""
+        rows = list(analyzer.analyze_stream(log_file, chunk_size=3))
+
+        assert [row.task_id for row in rows] == list(range(len(TASKS)))
+        for row, task in zip(rows, TASKS):
+            analysis = analyzer.analyze(task)
+            assert row.intent == analysis.intent.value
+            assert row.complexity == analysis.complexity.value
+            assert row.primary_agent == analysis.primary_agent.agent.name
+            assert row.confidence == pytest.approx(analysis.confidence)
+            assert row.error is None
+
+    def test_process_pool_preserves_order(self, analyzer, log_file):
+        """测试：进程池分块处理后仍按输入顺序返回"""
+        serial = list(analyzer.analyze_stream(log_file))
+        parallel = list(analyzer.analyze_stream(log_file, processes=2, chunk_size=2))
+        assert parallel == serial
+
+    @pytest.mark.parametrize("processes", [None, 2])
+    def test_stream_is_lazy(self, analyzer, processes):
+        """测试：无限输入也能按需读取前几行（内存有界）"""
+        rows = list(itertools.islice(
+            analyzer.analyze_stream(endless_log(), processes=processes, chunk_size=4), 10
+        ))
+        assert [row.line for row in rows] == list(range(1, 11))
+
+    def test_invalid_rows_reported(self, analyzer):
+        """测试：无效行返回错误，空行被跳过，纯字符串行可用"""
+        lines = ['{"task": "修复bug"}', '', 'not json', '"设计架构"', '{"id": 7}', '[1, 2]']
+        rows = list(analyzer.analyze_stream(lines))
+
+        assert [row.line for row in rows] == [1, 3, 4, 5, 6]
+        assert rows[0].error is None and rows[2].error is None
+        assert rows[1].error.startswith("invalid JSON")
+        assert rows[3].error == "missing 'task' field"
+        assert rows[4].error == "expected object, got list"
+
+    def test_custom_task_field(self, analyzer):
+        """测试：自定义任务字段名"""
+        rows = list(analyzer.analyze_stream(['{"prompt": "调试错误"}'], task_field="prompt"))
+        assert rows[0].intent == "debugging"
@@ -0,0 +1,84 @@
+"""
+单元测试：TaskQuery 请求级文本归一化
+
+验证 TaskQuery 只归一化一次，并且 AgentRegistry、TaskAnalyzer、
+MCPSelector、AgentRouter 接受 TaskQuery 与原始字符串时结果一致。
+"""
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry, TaskQuery
+from commands.lib.agent_router import AgentRouter
+from commands.lib.mcp_selector import MCPSelector
+from commands.lib.task_analyzer import TaskAnalyzer
+
+
+TASKS = [
+    "实现用户登录功能",
+    "Fix the failing API test",
+    "设计 React 前端组件架构",
+    "!!!",
+]
+
+
+class TestTaskQueryNormalization:
+    """测试 TaskQuery 字段"""
+
+    def test_fields_computed_once(self):
+        """测试：小写、清理、单词集合和中文字符集合"""
+        query = TaskQuery.from_text("修复 Payment API 的 Bug!")
+        assert query.text == "修复 Payment API 的 Bug!"
+        assert query.lower == "修复 payment api 的 bug!"
+        assert query.clean == "修复paymentapi的bug"
+        assert query.words == frozenset({"修复", "payment", "api", "的", "bug!"})
+        assert query.cjk_chars == frozenset("修复的")
+        assert query.has_chinese is True
+        assert query.is_english is False
+
+    def test_english_only(self):
+        """测试：纯英文任务"""
+        query = TaskQuery.from_text("Review the code")
+        assert query.has_chinese is False
+        assert query.cjk_chars == frozenset()
+
+    def test_of_returns_same_instance(self):
+        """测试：TaskQuery.of 不会重复归一化"""
+        query = TaskQuery.from_text("调试")
+        assert TaskQuery.of(query) is query
+        assert TaskQuery.of("调试") == query
+
+
+class TestTaskQueryEntryPoints:
+    """测试各入口接受 TaskQuery"""
+
+    @pytest.fixture
+    def registry(self):
+        return AgentRegistry()
+
+    @pytest.mark.parametrize("task", TASKS)
+    def test_registry_accepts_query(self, registry, task):
+        """测试：select_agent 对 str 与 TaskQuery 结果一致"""
+        query = TaskQuery.from_text(task)
+        assert registry.select_agent(query, top_k=5) == registry.select_agent(task, top_k=5)
+
+    @pytest.mark.parametrize("task", TASKS)
+    def test_analyzer_accepts_query(self, registry, task):
+        """测试：TaskAnalyzer.analyze 对 str 与 TaskQuery 结果一致"""
+        analyzer = TaskAnalyzer(registry)
+        from_query = analyzer.analyze(TaskQuery.from_text(task))
+        from_text = analyzer.analyze(task)
+        assert from_query == from_text
+        assert from_query.task_description == task
+
+    @pytest.mark.parametrize("task", TASKS)
+    def test_selector_accepts_query(self, task):
+        """测试：MCPSelector 复杂度分析接受 TaskQuery"""
+        selector = MCPSelector()
+        assert selector._analyze_complexity_v2(TaskQuery.from_text(task)) == \
+            selector._analyze_complexity_v2(task)
+
+    def test_router_accepts_query(self, registry):
+        """测试：AgentRouter.route 接受 TaskQuery"""
+        router = AgentRouter(registry)
+        task = "实现用户登录功能"
+        assert str(router.route(TaskQuery.from_text(task))) == str(router.route(task))
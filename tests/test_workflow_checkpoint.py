@@ -0,0 +1,140 @@
+"""
+单元测试：工作流检查点与恢复
+
+验证每个完成步骤后原子写入状态文件、resume 跳过已完成步骤
+（失败与取消两种中断）、已完成步骤的上下文传递给后续步骤、
+工作流定义变化时的内容哈希校验，以及从检查点重建工作流。
+"""
+
+import json
+import threading
+
+import pytest
+
+from commands.lib.coordination_engine import CoordinationEngine, ExecutionStatus
+from commands.lib.workflow_checkpoint import CheckpointStore, workflow_hash
+from conftest import make_workflow
+
+
+AGENTS = ["pm-agent", "architect-agent", "code-agent", "test-agent", "review-agent", "doc-agent"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints"))
+
+
+class RecordingExecutor:
+    """step_executor that records calls and fails selected agents"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+        self.contexts = {}
+
+    def __call__(self, step, context):
+        name = step.agent.name
+        self.calls.append(name)
+        self.contexts[name] = dict(context)
+        if name in self.fail:
+            raise RuntimeError(f"{name} failed")
+        return f"{name} output"
+
+
+class TestCheckpointing:
+    """测试检查点写入"""
+
+    def test_state_file_after_each_step(self, registry, store):
+        """测试：状态文件包含已完成步骤输出与累积上下文，无残留临时文件"""
+        executor = RecordingExecutor(fail={"test-agent"})
+        engine = CoordinationEngine(step_executor=executor, checkpoint_store=store)
+        result = engine.execute(make_workflow(registry, AGENTS), workflow_id="wf-1")
+
+        assert result.status == ExecutionStatus.FAILED
+        assert result.metadata["workflow_id"] == "wf-1"
+        data = json.loads(store.path("wf-1").read_text(encoding="utf-8"))
+        assert sorted(data["completed"], key=int) == ["0", "1", "2"]
+        assert list(data["context"]) == AGENTS[:3]
+        assert data["status"] == "failed"
+        assert [p.name for p in store.directory.iterdir()] == ["wf-1.json"]
+
+    def test_failed_save_keeps_previous_checkpoint(self, registry, store, monkeypatch):
+        """测试：写入中途失败时保留上一个完整的检查点"""
+        engine = CoordinationEngine(step_executor=RecordingExecutor(), checkpoint_store=store)
+        engine.execute(make_workflow(registry, AGENTS[:2]), workflow_id="wf-2")
+        before = store.path("wf-2").read_text(encoding="utf-8")
+
+        def broken_dump(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr("commands.lib.workflow_checkpoint.json.dump", broken_dump)
+        result = engine.execute(make_workflow(registry, AGENTS[:2]), workflow_id="wf-2")
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert store.path("wf-2").read_text(encoding="utf-8") == before
+        assert [p.name for p in store.directory.iterdir()] == ["wf-2.json"]
+
+    def test_invalid_workflow_id(self, store):
+        """测试：workflow_id 必须是安全的文件名"""
+        with pytest.raises(ValueError):
+            store.path("../escape")
+        assert store.load("missing") is None
+
+
+class TestResume:
+    """测试从检查点恢复"""
+
+    def test_resume_after_failure(self, registry, store):
+        """测试：恢复时只运行未完成的步骤，并获得已完成步骤的上下文"""
+        workflow = make_workflow(registry, AGENTS)
+        CoordinationEngine(
+            step_executor=RecordingExecutor(fail={"test-agent"}), checkpoint_store=store
+        ).execute(workflow, workflow_id="wf-3")
+
+        executor = RecordingExecutor()
+        engine = CoordinationEngine(step_executor=executor, checkpoint_store=store)
+        result = engine.resume("wf-3", workflow)
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert executor.calls == AGENTS[3:]
+        assert executor.contexts["test-agent"] == {"code-agent": "code-agent output"}
+        assert [r.step.agent.name for r in result.step_results] == AGENTS
+        assert result.metadata["resumed_steps"] == 3
+        assert store.load("wf-3").status == "completed"
+
+    def test_resume_after_cancel(self, registry, store):
+        """测试：取消后恢复，从第一个未完成步骤继续"""
+        engine = CoordinationEngine(checkpoint_store=store)
+        workflow = make_workflow(registry, AGENTS)
+
+        def step_executor(step, context):
+            if step.agent.name == "code-agent":
+                engine.cancel()
+                threading.Event().wait(0.2)
+            return f"{step.agent.name} output"
+
+        engine.step_executor = step_executor
+        result = engine.execute(workflow, workflow_id="wf-4")
+        assert result.status == ExecutionStatus.CANCELLED
+        assert len(store.load("wf-4").completed) == 2
+
+        executor = RecordingExecutor()
+        engine.step_executor = executor
+        result = engine.resume("wf-4")  # Rebuilt from the stored definition
+        assert result.status == ExecutionStatus.COMPLETED
+        assert executor.calls == AGENTS[2:]
+
+    def test_changed_definition_rejected(self, registry, store):
+        """测试：工作流定义变化后拒绝恢复"""
+        workflow = make_workflow(registry, AGENTS)
+        CoordinationEngine(
+            step_executor=RecordingExecutor(fail={"code-agent"}), checkpoint_store=store
+        ).execute(workflow, workflow_id="wf-5")
+
+        changed = make_workflow(registry, AGENTS[:2] + ["debug-agent"] + AGENTS[3:])
+        assert workflow_hash(changed) != workflow_hash(workflow)
+        engine = CoordinationEngine(step_executor=RecordingExecutor(), checkpoint_store=store)
+        with pytest.raises(ValueError, match="changed"):
+            engine.resume("wf-5", changed)
+        with pytest.raises(ValueError, match="No checkpoint"):
+            engine.resume("unknown")
@@ -0,0 +1,124 @@
+"""
+单元测试：workflow_dag 线性时间依赖校验
+
+验证依赖名称解析（重复 agent 为独立节点）、Tarjan 环检测
+（与可达性暴力检查一致）、缺失依赖与不可达步骤、拓扑层级，
+以及 AgentRouter.detect_conflicts 的兼容输出和大规模工作流。
+"""
+
+import random
+
+import pytest
+
+from commands.lib.agent_registry import AgentRegistry
+from commands.lib.agent_router import AgentRouter, WorkflowStep
+from commands.lib.workflow_dag import find_cycles, resolve_dependencies, validate_workflow
+
+
+PARALLEL_STEPS = [
+    ("pm-agent", []),
+    ("code-agent", ["pm-agent"]),
+    ("test-agent", ["pm-agent"]),
+    ("pm-agent", ["code-agent", "test-agent"]),
+]
+
+
+def brute_force_cyclic(predecessors):
+    """Reference: nodes that can reach themselves"""
+    cyclic = set()
+    for start in range(len(predecessors)):
+        seen, frontier = set(), list(predecessors[start])
+        while frontier:
+            node = frontier.pop()
+            if node == start:
+                cyclic.add(start)
+                break
+            if node not in seen:
+                seen.add(node)
+                frontier.extend(predecessors[node])
+    return cyclic
+
+
+class TestValidation:
+    """测试校验结果"""
+
+    def test_parallel_workflow_levels(self):
+        """测试：重复的协调者是独立节点，层级按依赖波次"""
+        validation = validate_workflow(PARALLEL_STEPS)
+        assert validation.is_valid
+        assert validation.levels == [[0], [1, 2], [3]]
+        assert validation.duplicates == {"pm-agent": 2}
+
+    def test_cycles_missing_and_unreachable(self):
+        """测试：报告所有环、缺失依赖和被阻塞的步骤"""
+        validation = validate_workflow([
+            ("a", ["b"]), ("b", ["a"]),        # cycle
+            ("c", ["c"]),                      # self-loop
+            ("d", ["ghost"]),                  # missing dependency
+            ("e", ["a"]), ("f", ["d", "x"]),   # blocked
+            ("x", []),
+        ])
+        assert not validation.is_valid
+        assert validation.cycles == [[0, 1], [2]]
+        assert validation.missing_dependencies == [(3, "ghost")]
+        assert validation.unreachable == [4, 5]
+        assert validation.level_names() == [["x"]]
+
+    def test_forward_reference_resolves_to_first_step(self):
+        """测试：引用尚未出现的 agent 时指向其第一个步骤"""
+        predecessors, missing = resolve_dependencies([("a", ["b"]), ("b", []), ("b", ["a"])])
+        assert predecessors == [[1], [], [0]]
+        assert missing == []
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_cycles_match_reachability(self, seed):
+        """测试：Tarjan 结果与暴力可达性检查一致"""
+        rng = random.Random(seed)
+        count = 30
+        predecessors = [
+            sorted(set(rng.sample(range(count), rng.randint(0, 2)))) for _ in range(count)
+        ]
+        cycles = find_cycles(predecessors)
+        assert {node for cycle in cycles for node in cycle} == brute_force_cyclic(predecessors)
+
+
+class TestScale:
+    """测试大规模工作流"""
+
+    def test_long_chain_and_wide_fan_in(self):
+        """测试：长链与大扇入不触发递归限制"""
+        count = 50_000
+        steps = [("agent-0", [])] + [(f"agent-{i}", [f"agent-{i - 1}"]) for i in range(1, count)]
+        steps.append(("merge", [f"agent-{i}" for i in range(count)]))
+        validation = validate_workflow(steps)
+        assert validation.is_valid
+        assert len(validation.levels) == count + 1
+        assert validation.levels[-1] == [count]
+
+        cyclic = validate_workflow(steps[1:] + [("agent-0", [f"agent-{count - 1}"])])
+        assert len(cyclic.cycles) == 1 and len(cyclic.cycles[0]) == count
+
+
+class TestRouterConflicts:
+    """测试 AgentRouter.detect_conflicts 兼容性"""
+
+    @pytest.fixture
+    def router(self):
+        return AgentRouter(AgentRegistry(cache_size=0), cache_size=0)
+
+    def test_self_dependency_and_duplicates(self, router):
+        """测试：保留原有的重复与自依赖提示"""
+        agent = router.registry.get_agent("code-agent")
+        steps = [
+            WorkflowStep(agent=agent, role="primary", dependencies=["code-agent"]),
+            WorkflowStep(agent=agent, role="collaborator", dependencies=[]),
+        ]
+        conflicts = router.detect_conflicts(steps)
+        assert "Duplicate agents detected: {'code-agent'}" in conflicts
+        assert "Circular dependency: code-agent depends on itself" in conflicts
+
+    def test_generated_workflows_are_valid(self, router):
+        """测试：路由生成的工作流通过校验"""
+        for mode in ("single", "sequential", "parallel", "hierarchical"):
+            workflow = router.route("设计完整的用户认证系统", mode=mode)
+            assert router.validate(workflow.steps).is_valid
@@ -0,0 +1,139 @@
+"""
+单元测试：WorkflowEstimator 关键路径时间估算
+
+验证执行历史分位数、基于依赖 DAG 的最长路径（并行分支取最慢者）、
+重复 agent 的合并节点、环检测，以及 AgentRouter / MultiAgentOrchestrator
+使用历史数据估算时间。
+"""
+
+from datetime import datetime
+
+import pytest
+
+from commands.lib.agent_execution_history import AgentExecutionHistory, ExecutionRecord
+from commands.lib.agent_registry import AgentRegistry
+from commands.lib.agent_router import AgentRouter
+from commands.lib.multi_agent_orchestrator import (
+    AgentTask,
+    ExecutionMode,
+    MultiAgentOrchestrator,
+)
+from commands.lib.workflow_estimator import (
+    DEFAULT_P50_SECONDS,
+    DEFAULT_P90_SECONDS,
+    WorkflowEstimator,
+)
+
+
+def record(agent, seconds):
+    return ExecutionRecord(
+        timestamp=datetime.now().isoformat(),
+        agent_id=agent,
+        agent_name=agent,
+        user_command="/wf_05_code",
+        agent_recommendation="/wf_05_code",
+        executed_command="/wf_05_code",
+        execution_status="success",
+        execution_time=seconds,
+    )
+
+
+@pytest.fixture
+def history():
+    history = AgentExecutionHistory()
+    for minutes in (10, 12, 14, 16, 40):
+        history.add_record(record("code-agent", minutes * 60))
+    for minutes in (5, 5, 6):
+        history.add_record(record("test-agent", minutes * 60))
+    history.add_record(record("review-agent", 99 * 60))  # Below min_samples
+    return history
+
+
+class TestDurationPercentiles:
+    """测试执行历史的时长分位数"""
+
+    def test_nearest_rank_percentiles(self, history):
+        """测试：最近秩法分位数"""
+        stats = history.get_duration_percentiles("code-agent")
+        assert stats == {"count": 5, "p50": 14 * 60, "p90": 40 * 60}
+
+    def test_no_samples(self, history):
+        """测试：无记录时分位数为 0"""
+        assert history.get_duration_percentiles("ghost-agent") == {"count": 0, "p50": 0.0, "p90": 0.0}
+
+
+class TestCriticalPath:
+    """测试关键路径计算"""
+
+    def test_sequential_chain_sums(self, history):
+        """测试：串行链路时长累加"""
+        estimate = WorkflowEstimator(history).estimate([
+            ("code-agent", []),
+            ("test-agent", ["code-agent"]),
+        ])
+        assert estimate.p50_seconds == (14 + 5) * 60
+        assert estimate.p90_seconds == (40 + 6) * 60
+        assert estimate.critical_path == ["code-agent", "test-agent"]
+        assert estimate.format() == "19-46 minutes"
+
+    def test_parallel_branches_take_slowest(self, history):
+        """测试：并行分支取最慢分支，而不是求和"""
+        estimate = WorkflowEstimator(history).estimate([
+            ("pm-agent", []),
+            ("code-agent", ["pm-agent"]),
+            ("test-agent", ["pm-agent"]),
+            ("pm-agent", ["code-agent", "test-agent"]),
+        ])
+        assert estimate.p50_seconds == DEFAULT_P50_SECONDS * 2 + 14 * 60
+        assert estimate.critical_path == ["pm-agent", "code-agent", "pm-agent"]
+
+    def test_default_durations_below_min_samples(self, history):
+        """测试：样本不足时使用默认时长"""
+        step = WorkflowEstimator(history).agent_estimate("review-agent")
+        assert (step.p50, step.p90, step.source, step.samples) == \
+            (DEFAULT_P50_SECONDS, DEFAULT_P90_SECONDS, "default", 1)
+
+    def test_cycle_rejected(self):
+        """测试：依赖成环时报错"""
+        with pytest.raises(ValueError, match="cycle"):
+            WorkflowEstimator().estimate([("a", ["b"]), ("b", ["a"])])
+
+    def test_unknown_dependencies_ignored_and_empty_workflow(self):
+        """测试：工作流外的依赖被忽略；空工作流为 0"""
+        estimate = WorkflowEstimator().estimate([("a", ["outside-agent"])])
+        assert estimate.p50_seconds == DEFAULT_P50_SECONDS
+        assert WorkflowEstimator().estimate([]).format() == "0-0 minutes"
+
+    def test_statistics_refresh_after_new_records(self, history):
+        """测试：新增执行记录后重新读取统计"""
+        estimator = WorkflowEstimator(history)
+        assert estimator.agent_estimate("review-agent").source == "default"
+        for _ in range(2):
+            history.add_record(record("review-agent", 99 * 60))
+        assert estimator.agent_estimate("review-agent").source == "history"
+
+
+class TestEstimatorIntegration:
+    """测试路由器和协调器使用历史估算"""
+
+    def test_router_uses_history(self, history):
+        """测试：AgentRouter 的时间估算来自执行历史"""
+        registry = AgentRegistry(cache_size=0)
+        router = AgentRouter(registry, cache_size=0, history=history)
+        workflow = router._create_single_workflow(
+            registry.select_agent("实现用户登录功能", top_k=1)[0]
+        )
+        assert workflow.primary_agent.name == "code-agent"
+        assert workflow.estimated_time == "14-40 minutes"
+
+    def test_orchestrator_sequential_plan_is_chained(self, history):
+        """测试：顺序编排按执行顺序串联，并行编排取最慢任务"""
+        registry = AgentRegistry(cache_size=0)
+        orchestrator = MultiAgentOrchestrator(registry=registry, history=history)
+        tasks = [
+            AgentTask(agent=registry.get_agent(name), command="wf_05_code",
+                      task_description="", execution_order=order)
+            for order, name in enumerate(["code-agent", "test-agent"])
+        ]
+        assert orchestrator._estimate_duration(tasks, ExecutionMode.SEQUENTIAL) == "19-46 minutes"
+        assert orchestrator._estimate_duration(tasks, ExecutionMode.PARALLEL) == "14-40 minutes"
@@ -0,0 +1,145 @@
+"""
+单元测试：workflow_events 非阻塞事件流
+
+验证慢消费者的合并/丢弃策略（生命周期事件不丢失）、
+async for 与阻塞 get 消费、JSONL sink，以及 CoordinationEngine
+发出的类型化事件（开始、输出分块、完成、冲突）。
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from commands.lib.coordination_engine import CoordinationEngine, ExecutionStatus
+from commands.lib.workflow_events import EventBus, EventType, JsonlEventSink
+from conftest import make_workflow
+
+
+AGENTS = ["code-agent", "test-agent"]
+
+
+def drain(subscription):
+    events = []
+    while len(subscription):
+        events.append(subscription.get())
+    return events
+
+
+class TestOverflowPolicy:
+    """测试慢消费者的合并/丢弃策略"""
+
+    def test_chunks_coalesce_per_step(self):
+        """测试：队列满时同一步骤的输出分块拼接，不丢内容"""
+        bus = EventBus()
+        subscription = bus.subscribe(maxsize=3)
+        bus.publish(EventType.STEP_STARTED, 0, "code-agent")
+        for i in range(100):
+            bus.publish(EventType.STEP_OUTPUT_CHUNK, 0, "code-agent", chunk=str(i % 10))
+        bus.publish(EventType.STEP_COMPLETED, 0, "code-agent", status="completed")
+
+        events = drain(subscription)
+        assert [e.type for e in events] == [
+            EventType.STEP_STARTED, EventType.STEP_OUTPUT_CHUNK, EventType.STEP_COMPLETED,
+        ]
+        text = "".join(e.data["chunk"] for e in events if e.type == EventType.STEP_OUTPUT_CHUNK)
+        assert text == "0123456789" * 10
+        assert events[1].data["chunks"] == 100
+        assert subscription.stats.coalesced == 99 and subscription.stats.dropped == 0
+        assert [e.sequence for e in events] == sorted(e.sequence for e in events)
+
+    def test_progress_keeps_latest(self):
+        """测试：进度事件只保留最新值"""
+        bus = EventBus()
+        subscription = bus.subscribe(maxsize=2)
+        bus.publish(EventType.WORKFLOW_STARTED)
+        for i in range(1, 11):
+            bus.publish(EventType.PROGRESS, progress=i / 10)
+
+        events = drain(subscription)
+        assert [e.type for e in events] == [EventType.WORKFLOW_STARTED, EventType.PROGRESS]
+        assert events[-1].data["progress"] == 1.0
+
+    def test_lifecycle_events_never_dropped(self):
+        """测试：生命周期事件不会被丢弃，必要时挤掉有损事件"""
+        bus = EventBus()
+        subscription = bus.subscribe(maxsize=2)
+        bus.publish(EventType.STEP_OUTPUT_CHUNK, 0, "a", chunk="x")
+        for index in range(5):
+            bus.publish(EventType.STEP_COMPLETED, index, "a")
+
+        events = drain(subscription)
+        assert [e.type for e in events] == [EventType.STEP_COMPLETED] * 5
+        assert subscription.stats.dropped == 1
+
+    def test_publish_never_blocks(self):
+        """测试：无人消费时发布仍然是常数开销"""
+        bus = EventBus()
+        subscription = bus.subscribe(maxsize=8)
+        start = time.perf_counter()
+        for i in range(20_000):
+            bus.publish(EventType.STEP_OUTPUT_CHUNK, i % 4, "a", chunk="x")
+        assert time.perf_counter() - start < 2.0
+        assert len(subscription) <= 8
+
+
+class TestEngineEvents:
+    """测试 CoordinationEngine 事件流"""
+
+    def test_async_iteration(self, registry):
+        """测试：async for 接收完整事件序列并在工作流结束后停止"""
+        engine = CoordinationEngine(step_executor=lambda step, context: iter(["a", "b"]))
+
+        async def run():
+            events = engine.events()
+            execution = asyncio.create_task(asyncio.to_thread(engine.execute, make_workflow(registry, AGENTS)))
+            received = [event async for event in events]
+            return received, await execution
+
+        received, result = asyncio.run(run())
+        assert result.status == ExecutionStatus.COMPLETED
+        assert result.step_results[0].output == "ab"
+        types = [e.type for e in received]
+        assert types[0] == EventType.WORKFLOW_STARTED
+        assert types[-1] == EventType.WORKFLOW_COMPLETED
+        chunks = [e.data["chunk"] for e in received
+                  if e.type == EventType.STEP_OUTPUT_CHUNK and e.agent_name == "code-agent"]
+        assert chunks == ["a", "b"]
+        completed = [e.agent_name for e in received if e.type == EventType.STEP_COMPLETED]
+        assert completed == ["code-agent", "test-agent"]
+        assert not engine.event_bus.has_subscribers
+
+    def test_conflict_events(self, registry):
+        """测试：检测到的冲突作为事件发出"""
+        outputs = {
+            "code-agent": "Login flow approved: JWT access token with refresh rotation",
+            "test-agent": "Login flow rejected: JWT access token with refresh rotation",
+        }
+        engine = CoordinationEngine(step_executor=lambda step, context: outputs[step.agent.name])
+        subscription = engine.events()
+        result = engine.execute(make_workflow(registry, AGENTS))
+
+        conflicts = [e.data["description"] for e in drain(subscription)
+                     if e.type == EventType.CONFLICT_DETECTED]
+        assert conflicts == result.conflicts and conflicts
+
+    def test_slow_sink_does_not_throttle(self, registry, tmp_path):
+        """测试：JSONL sink 在后台写入，慢消费者不拖慢执行"""
+        path = tmp_path / "events.jsonl"
+        sink = JsonlEventSink(str(path))
+        engine = CoordinationEngine(
+            step_executor=lambda step, context: iter(["x"] * 2000),
+            event_sinks=[sink]
+        )
+        slow = engine.events(maxsize=4)  # Never read during execution
+        result = engine.execute(make_workflow(registry, AGENTS))
+        sink.close(timeout=5)
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert len(slow) <= 4 + 2 * len(result.step_results) + 2
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert lines[0]["type"] == "workflow_started"
+        assert lines[-1]["type"] == "workflow_completed"
+        written = "".join(line["data"]["chunk"] for line in lines if line["type"] == "step_output_chunk")
+        assert written == "x" * 4000
@@ -0,0 +1,133 @@
+"""
+单元测试：AgentRouter 预编译工作流模板
+
+验证 single / sequential / parallel 模板与协作配置一致、
+route 只选择模板并写入置信度（不再逐个查找协作者）、
+模板依赖校验，以及 registry reload 后重新编译。
+"""
+
+from dataclasses import replace
+from unittest.mock import patch
+
+import pytest
+
+from commands.lib.agent_registry import AgentMatch, AgentRegistry
+from commands.lib.agent_router import (
+    AgentRouter,
+    CoordinationMode,
+    WorkflowStep,
+    WorkflowTemplates,
+)
+
+
+@pytest.fixture
+def registry():
+    return AgentRegistry(cache_size=0)
+
+
+@pytest.fixture
+def router(registry):
+    return AgentRouter(registry, cache_size=0)
+
+
+def active_collaborators(registry, agent, mode):
+    """Reference: collaborators resolved one by one through get_agent"""
+    names = []
+    for collab in agent.collaboration_modes:
+        collab_agent = registry.get_agent(collab.get('agent'))
+        if collab.get('mode') == mode and collab_agent and collab_agent.status == 'active':
+            names.append(collab_agent.name)
+    return names
+
+
+class TestTemplateShapes:
+    """测试模板结构与协作配置一致"""
+
+    def test_every_agent_and_mode_compiled(self, registry, router):
+        """测试：每个 agent 的三种模式都已编译"""
+        assert len(router.templates) == 3 * len(registry.agents)
+
+    def test_sequential_chain(self, registry, router):
+        """测试：顺序模板依次依赖前一步"""
+        for agent in registry.agents.values():
+            workflow = router._create_sequential_workflow(AgentMatch(agent, 0.8, [], [], ""), "")
+            expected = [agent.name] + active_collaborators(registry, agent, 'sequential')
+            assert [s.agent.name for s in workflow.steps] == expected
+            assert [s.dependencies for s in workflow.steps] == \
+                [[]] + [[name] for name in expected[:-1]]
+            assert workflow.confidence == pytest.approx(0.8 * 0.95)
+
+    def test_parallel_fan_out_and_merge(self, registry, router):
+        """测试：并行模板扇出后由主 agent 合并"""
+        agent = registry.get_agent("code-agent")
+        workers = active_collaborators(registry, agent, 'parallel')
+        assert workers
+
+        workflow = router._create_parallel_workflow(AgentMatch(agent, 0.8, [], [], ""), "")
+        assert [s.agent.name for s in workflow.steps] == [agent.name] + workers + [agent.name]
+        assert all(s.dependencies == [agent.name] for s in workflow.steps[1:-1])
+        assert workflow.steps[-1].dependencies == workers
+        assert workflow.explanation == f"Parallel workflow with {len(workers)} concurrent agents"
+
+
+class TestRouteUsesTemplates:
+    """测试 route 复用模板"""
+
+    @pytest.mark.parametrize("mode", ["single", "sequential", "parallel"])
+    def test_route_skips_collaborator_lookups(self, registry, router, mode):
+        """测试：route 不再逐个查找协作者"""
+        router.templates
+        with patch.object(registry, 'get_agent', wraps=registry.get_agent) as spy:
+            workflow = router.route("实现用户认证功能并编写测试", mode=mode)
+        assert spy.call_count == 0
+        assert workflow.mode == CoordinationMode(mode)
+
+    def test_instances_are_independent(self, registry, router):
+        """测试：修改返回的工作流不影响模板"""
+        first = router.route("实现用户认证功能并编写测试", mode="sequential")
+        first.steps[-1].dependencies.append("x")
+        first.steps.clear()
+        second = router.route("实现用户认证功能并编写测试", mode="sequential")
+        assert second.steps
+        assert "x" not in second.steps[-1].dependencies
+
+    def test_shared_by_routers(self, registry, router):
+        """测试：模板随 registry 快照编译，所有 router 共用"""
+        assert router.templates is registry.snapshot.templates
+        assert AgentRouter(registry).templates is router.templates
+
+    def test_recompiled_after_reload(self, registry, router):
+        """测试：registry reload 后模板重新编译"""
+        templates = router.templates
+        assert router.templates is templates
+        registry.reload()
+        assert router.templates is not templates
+        workflow = router.route("实现用户认证功能", mode="single")
+        assert workflow.primary_agent is registry.get_agent(workflow.primary_agent.name)
+
+
+class TestTemplateValidation:
+    """测试模板依赖校验"""
+
+    def test_invalid_dependency_rejected(self, registry):
+        """测试：依赖未在前序步骤出现时报错"""
+        agent = registry.get_agent("code-agent")
+        bad_steps = [WorkflowStep(agent=agent, role="primary", dependencies=["ghost-agent"])]
+        with pytest.raises(ValueError, match="ghost-agent"):
+            WorkflowTemplates._validate(agent, bad_steps)
+
+    def test_inactive_collaborators_excluded(self, registry):
+        """测试：非 active 协作者不进入模板"""
+        agent = registry.get_agent("code-agent")
+        agents = dict(registry.agents)
+        for name in active_collaborators(registry, agent, 'parallel'):
+            agents[name] = replace(agents[name], status='deprecated')
+
+        template = WorkflowTemplates.compile(agent, CoordinationMode.PARALLEL, agents)
+        assert [s.agent.name for s in template.steps] == [agent.name]
+
+    def test_hierarchical_not_templated(self, registry):
+        """测试：分层模式依赖任务匹配，不生成模板"""
+        agent = registry.get_agent("pm-agent")
+        with pytest.raises(ValueError):
+            WorkflowTemplates.compile(agent, CoordinationMode.HIERARCHICAL, registry.agents)